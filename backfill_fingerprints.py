@@ -0,0 +1,87 @@
+# backfill_fingerprints.py
+import argparse
+import os
+import tempfile
+
+from sqlalchemy import or_
+
+from db import shard_router, shard_session, tenant_session
+from models import Asset, AssetFingerprint
+from storage.factory import get_storage
+from utils.phash import fingerprint_file
+from utils.phash_index import store_fingerprint
+from utils.versions import blob_keys
+
+
+def backfill_fingerprints(tenant_id: str = None, batch_size: int = 500):
+    """
+    Compute perceptual hashes for image and video assets that have none.
+    Assets are walked in primary-key order in batches; each batch is committed
+    once. Assets that fail to decode are skipped and reported.
+    """
+    if tenant_id:
+        sessions = [tenant_session(tenant_id)]
+    else:
+        sessions = [shard_session(s) for s in shard_router.shard_names()]
+    done = failed = 0
+    for db in sessions:
+        try:
+            shard_done, shard_failed = _backfill_session(db, tenant_id, batch_size)
+        finally:
+            db.close()
+        done += shard_done
+        failed += shard_failed
+    print(f"Fingerprinted {done} assets, {failed} failed.")
+
+
+def _backfill_session(db, tenant_id: str, batch_size: int):
+    """
+    Backfill the assets reachable through one session (a shard or a tenant).
+    :return: (assets fingerprinted, assets that failed)
+    """
+    storage = get_storage()
+    last_id = ""
+    done = failed = 0
+    while True:
+        query = (
+            db.query(Asset.id, Asset.tenant_id, Asset.mimetype, Asset.version)
+            .outerjoin(AssetFingerprint, AssetFingerprint.asset_id == Asset.id)
+            .filter(
+                AssetFingerprint.asset_id.is_(None),
+                Asset.id > last_id,
+                or_(Asset.mimetype.like("image/%"), Asset.mimetype.like("video/%")),
+            )
+        )
+        if tenant_id:
+            query = query.filter(Asset.tenant_id == tenant_id)
+        batch = query.order_by(Asset.id).limit(batch_size).all()
+        if not batch:
+            break
+        keys = blob_keys(db, [(row[0], row[3]) for row in batch])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for asset_id, asset_tenant, mimetype, version in batch:
+                local_path = os.path.join(tmpdir, asset_id)
+                try:
+                    storage.download(keys[asset_id], local_path)
+                    hashes = fingerprint_file(local_path, mimetype)
+                except Exception as e:
+                    print(f"Fingerprint failed for {asset_id}: {e}")
+                    failed += 1
+                    continue
+                finally:
+                    if os.path.exists(local_path):
+                        os.remove(local_path)
+                if hashes:
+                    store_fingerprint(db, asset_id, asset_tenant, hashes)
+                    done += 1
+        db.commit()
+        last_id = batch[-1][0]
+    return done, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill asset perceptual hashes")
+    parser.add_argument("--tenant", help="Only backfill this tenant")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    backfill_fingerprints(args.tenant, args.batch_size)
@@ -0,0 +1,50 @@
+# benchmarks/bench_authz.py
+"""
+Micro-benchmark of the per-request cost of role-based authorization.
+Needs the application's environment (.env) since it imports the settings.
+
+    python -m benchmarks.bench_authz --iterations 1000000
+"""
+import argparse
+import time
+
+from dependencies.auth import TokenPayload
+from dependencies.authz import require_permission
+from utils.policy import Policy, DEFAULT_POLICY, policy_store
+
+
+def bench(label: str, fn, iterations: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn()
+    ns = (time.perf_counter_ns() - start) / iterations
+    print(f"{label:<40} {ns:>10.1f} ns/op")
+    return ns
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Authorization overhead benchmark")
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    args = parser.parse_args()
+    n = args.iterations
+
+    user = TokenPayload(
+        sub="user-1", tenant_id="tenant-1", exp=0, roles=["editor", "auditor"]
+    )
+    check = require_permission("schemas:write")
+    roles = tuple(user.roles)
+
+    baseline = bench("empty call (baseline)", lambda: None, n)
+
+    def memoized():
+        policy_store.allows(user.tenant_id, roles, "schemas:write")
+
+    bench("policy decision (memoized)", memoized, n)
+
+    def cold():
+        # A fresh policy each time: the decision is computed from the role table
+        Policy(DEFAULT_POLICY).allows(user.tenant_id, roles, "schemas:write")
+
+    bench("policy decision (cold, incl. build)", cold, max(1, n // 100))
+    dependency = bench("require_permission dependency", lambda: check(user), n)
+    print(f"{'overhead per request':<40} {dependency - baseline:>10.1f} ns")
@@ -0,0 +1,70 @@
+# benchmarks/bench_importtime.py
+"""
+Import-time regression check for the API and CLI entry points.
+Runs each module import in a fresh interpreter with `-X importtime` and
+reports the total and the slowest imports. Exits non-zero if a total exceeds
+its budget, so it can run in CI. Needs the application's environment (.env).
+
+    python -m benchmarks.bench_importtime --budget-ms 800
+"""
+import argparse
+import subprocess
+import sys
+from typing import List, Tuple
+
+ENTRY_POINTS = ["main", "create_first_user", "migrate"]
+
+
+def import_times(module: str) -> List[Tuple[str, int]]:
+    """
+    Cumulative import time per module (microseconds) for importing `module`.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    times = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times.append((name.strip(), int(cumulative)))
+    return times
+
+
+def best_total(module: str, runs: int) -> Tuple[float, List[Tuple[str, int]]]:
+    best = None
+    for _ in range(runs):
+        times = import_times(module)
+        total = dict(times).get(module, 0) / 1000
+        if best is None or total < best[0]:
+            best = (total, times)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time benchmark")
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--runs", type=int, default=5, help="Best of N runs")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument(
+        "--budget-ms", type=float, default=0, help="Fail above this total (0 = off)"
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        total, times = best_total(module, args.runs)
+        print(f"{module}: {total:.1f} ms")
+        # Top-level third-party packages are where regressions usually come from
+        top_level = [(n, us) for n, us in times if "." not in n and n != module]
+        for name, us in sorted(top_level, key=lambda t: -t[1])[: args.top]:
+            print(f"  {us / 1000:>8.1f} ms  {name}")
+        if args.budget_ms and total > args.budget_ms:
+            print(f"  over budget ({args.budget_ms:.0f} ms)")
+            failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,109 @@
+# benchmarks/bench_list_serialization.py
+"""
+Rows/sec of list endpoint serialization: the pydantic path (a response
+model per row, re-validated through response_model, jsonable_encoder, json)
+against the column-tuple path used by list_users and list_webhooks.
+Rows are synthetic tuples, so database time is not included.
+Needs the application's environment (.env) since it imports the routers.
+
+    python -m benchmarks.bench_list_serialization --rows 100 --repeat 2000
+"""
+import argparse
+import json
+import time
+import uuid
+
+from fastapi.encoders import jsonable_encoder
+
+from routers.users import USER_LIST_FIELDS, UserListResponse, UserResponse
+from routers.webhooks import (
+    WEBHOOK_LIST_FIELDS,
+    WebhookListResponse,
+    WebhookResponse,
+)
+from utils.serialization import FastJSONResponse, orjson, rows_to_dicts
+
+
+def user_rows(n: int) -> list:
+    return [
+        (str(uuid.uuid4()), f"user{i}@example.com", f"User {i}", True, ["editor"])
+        for i in range(n)
+    ]
+
+
+def webhook_rows(n: int) -> list:
+    return [
+        (
+            str(uuid.uuid4()),
+            f"https://hooks.example.com/{i}",
+            ["asset.created", "asset.updated"],
+            "s3cr3t-value",
+            True,
+            f"Hook {i}",
+            {"X-Source": "dam"},
+        )
+        for i in range(n)
+    ]
+
+
+def pydantic_path(list_model, item_model, fields, rows, extra) -> bytes:
+    items = [item_model(**dict(zip(fields, row))) for row in rows]
+    response = list_model(items=items, **extra)
+    # What FastAPI does with a returned model when response_model is set
+    validated = list_model.validate(response)
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def fast_path(fields, rows, extra) -> bytes:
+    return FastJSONResponse({"items": rows_to_dicts(rows, fields), **extra}).body
+
+
+def bench(label: str, fn, rows: int, repeat: int) -> float:
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    per_sec = rows * repeat / (time.perf_counter() - start)
+    print(f"{label:<36} {per_sec:>14,.0f} rows/s")
+    return per_sec
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List serialization benchmark")
+    parser.add_argument("--rows", type=int, default=100, help="Rows per page")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    print(f"encoder: {'orjson' if orjson is not None else 'json (orjson missing)'}")
+
+    cases = [
+        (
+            "users",
+            UserListResponse,
+            UserResponse,
+            USER_LIST_FIELDS,
+            user_rows(args.rows),
+            {"total": args.rows, "page": 1, "size": args.rows},
+        ),
+        (
+            "webhooks",
+            WebhookListResponse,
+            WebhookResponse,
+            WEBHOOK_LIST_FIELDS,
+            webhook_rows(args.rows),
+            {"total": args.rows},
+        ),
+    ]
+    for name, list_model, item_model, fields, rows, extra in cases:
+        before = bench(
+            f"{name}: pydantic + response_model",
+            lambda: pydantic_path(list_model, item_model, fields, rows, extra),
+            args.rows,
+            args.repeat,
+        )
+        after = bench(
+            f"{name}: column tuples + fast encoder",
+            lambda: fast_path(fields, rows, extra),
+            args.rows,
+            args.repeat,
+        )
+        print(f"{name}: {after / before:.1f}x")
@@ -0,0 +1,187 @@
+# benchmarks/harness.py
+"""
+Timing, percentile and result-file helpers shared by the benchmark suite
+(see benchmarks/run.py). Has no application imports, so it can be loaded
+before the stand-in environment is configured.
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+# Lower is better for these result fields; higher is better for the others
+LATENCY_FIELDS = ("p50_ms", "p95_ms", "p99_ms")
+THROUGHPUT_FIELDS = ("ops_per_sec", "throughput_rps")
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def latency_summary(seconds: List[float]) -> dict:
+    values = sorted(seconds)
+    return {
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def micro(fn: Callable[[], object], iterations: int, warmup: int = 3) -> dict:
+    """
+    Call `fn` repeatedly in this thread, timing every call.
+    """
+    for _ in range(warmup):
+        fn()
+    timings = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - started
+    return {
+        "kind": "micro",
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / elapsed, 2),
+        **latency_summary(timings),
+    }
+
+
+def load(
+    calls: List[Callable[[object], int]],
+    concurrency: int,
+    client_factory: Callable[[], object],
+) -> dict:
+    """
+    Run every call once on a pool of `concurrency` threads. Each thread gets
+    its own client from `client_factory`; a call takes the client and returns
+    the HTTP status. Statuses of 400 and above count as errors.
+    """
+    local = threading.local()
+
+    def one(call):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = client_factory()
+        start = time.perf_counter()
+        try:
+            status = call(client)
+        except Exception:
+            status = 0  # transport failure or unhandled server error
+        return time.perf_counter() - start, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, calls))
+    elapsed = time.perf_counter() - started
+    statuses = Counter(str(status) for _, status in outcomes)
+    return {
+        "kind": "load",
+        "requests": len(outcomes),
+        "concurrency": concurrency,
+        "errors": sum(n for s, n in statuses.items() if not 0 < int(s) < 400),
+        "statuses": dict(sorted(statuses.items())),
+        "throughput_rps": round(len(outcomes) / elapsed, 2) if elapsed else 0.0,
+        **latency_summary([seconds for seconds, _ in outcomes]),
+    }
+
+
+def skipped(reason: str) -> dict:
+    return {"kind": "skipped", "reason": reason}
+
+
+def git_revision() -> Dict[str, Optional[object]]:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def git(*args) -> Optional[str]:
+        try:
+            proc = subprocess.run(
+                ["git", *args], cwd=root, capture_output=True, text=True, timeout=10
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        return proc.stdout.strip() if proc.returncode == 0 else None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+    }
+
+
+def write_results(path: str, results: Dict[str, dict], args: dict):
+    """
+    Write one suite run as JSON. Keys are sorted and floats rounded, so two
+    result files diff cleanly line by line.
+    """
+    document = {
+        "meta": {
+            **git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "args": args,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> List[str]:
+    """
+    Regressions of `current` against `baseline` (both result documents):
+    latency percentiles up, or throughput down, by more than `tolerance`
+    (a fraction, e.g. 0.1 for 10%).
+    """
+    regressions = []
+    for name, result in sorted(current["results"].items()):
+        before = baseline["results"].get(name)
+        if not before or before.get("kind") != result.get("kind"):
+            continue
+        for field in LATENCY_FIELDS + THROUGHPUT_FIELDS:
+            old, new = before.get(field), result.get(field)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if field in LATENCY_FIELDS:
+                worse = change > tolerance
+            else:
+                worse = change < -tolerance
+            if worse:
+                regressions.append(f"{name} {field}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def print_result(name: str, result: dict):
+    if result["kind"] == "skipped":
+        print(f"{name:<48} skipped: {result['reason']}")
+        return
+    rate = result.get("ops_per_sec") or result.get("throughput_rps")
+    unit = "ops/s" if result["kind"] == "micro" else "req/s"
+    line = (
+        f"{name:<48} {rate:>10,.1f} {unit}  p50 {result['p50_ms']:>8.2f} ms"
+        f"  p95 {result['p95_ms']:>8.2f}  p99 {result['p99_ms']:>8.2f}"
+    )
+    if result["kind"] == "load" and result["errors"]:
+        line += f"  errors {result['errors']} {result['statuses']}"
+    print(line)
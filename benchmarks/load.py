@@ -0,0 +1,134 @@
+# benchmarks/load.py
+"""
+Scripted load scenarios against the API, served in-process through
+Starlette's TestClient with one client per worker thread. Run through
+benchmarks/run.py, which sets up the stand-ins and seeds the tenant first.
+"""
+from functools import partial
+from typing import Dict, List
+
+from benchmarks.harness import load
+from benchmarks.standins import PASSWORD, SEARCH_TERM
+
+SEARCH_PAGE_SIZE = 50
+
+
+def auth_headers(user_id: str, tenant_id: str) -> dict:
+    from routers.auth import create_access_token
+
+    token = create_access_token(
+        {"sub": user_id, "tenant_id": tenant_id, "roles": ["editor"]}
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _status(response) -> int:
+    return response.status_code
+
+
+def _login(email: str, client) -> int:
+    return _status(
+        client.post("/auth/login", json={"email": email, "password": PASSWORD})
+    )
+
+
+def _get(url: str, headers: dict, client) -> int:
+    return _status(client.get(url, headers=headers))
+
+
+def _upload_version(url: str, content: bytes, headers: dict, client) -> int:
+    files = {"file": ("ingest.jpg", content, "image/jpeg")}
+    return _status(client.post(url, files=files, headers=headers))
+
+
+def login_storm(seeded: dict, requests: int) -> List:
+    """
+    Users logging in at once, e.g. after a token signing key rotation. Each
+    login is one user lookup and one bcrypt verification.
+    """
+    emails = [email for _, email in seeded["users"]]
+    return [partial(_login, emails[i % len(emails)]) for i in range(requests)]
+
+
+def thumbnail_miss_storm(seeded: dict, requests: int, headers: dict) -> List:
+    """
+    A CDN purge or a new rendition size: every request is a cache miss (no
+    If-None-Match, sizes not seen before) and renders from the source blob.
+    """
+    assets = seeded["assets"]
+    return [
+        partial(
+            _get,
+            f"/transform/image/{assets[i % len(assets)]}"
+            f"?width={64 + (i // len(assets)) % 64 * 8}&v=1",
+            headers,
+        )
+        for i in range(requests)
+    ]
+
+
+def bulk_ingest(seeded: dict, requests: int, headers: dict, content: bytes) -> List:
+    """
+    New content for many assets at once. Uploads go through POST
+    /assets/{id}/versions (upload_asset and bulk_upload are not implemented
+    yet); consecutive requests target different assets, so version
+    compare-and-swap conflicts only appear when `requests` exceeds the asset
+    count and concurrency is high.
+    """
+    assets = seeded["assets"]
+    return [
+        partial(
+            _upload_version,
+            f"/assets/{assets[i % len(assets)]}/versions",
+            content,
+            headers,
+        )
+        for i in range(requests)
+    ]
+
+
+def search_paging(seeded: dict, requests: int, headers: dict) -> List:
+    """
+    Users paging through search results: each session walks every page of a
+    query matching all seeded assets, resolved through the fake index and
+    the projected asset listing.
+    """
+    pages = max(1, -(-len(seeded["assets"]) // SEARCH_PAGE_SIZE))
+    return [
+        partial(
+            _get,
+            f"/assets/?q={SEARCH_TERM}&page={i % pages + 1}&size={SEARCH_PAGE_SIZE}",
+            headers,
+        )
+        for i in range(requests)
+    ]
+
+
+def run_load(
+    seeded: dict, scale: float, concurrency: int, ingest_content: bytes
+) -> Dict[str, dict]:
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    user_id, _ = seeded["users"][0]
+    headers = auth_headers(user_id, seeded["tenant_id"])
+
+    def count(base: int) -> int:
+        return max(concurrency, int(base * scale))
+
+    scenarios = {
+        "load.login_storm": login_storm(seeded, count(200)),
+        "load.thumbnail_miss_storm": thumbnail_miss_storm(
+            seeded, count(400), headers
+        ),
+        "load.bulk_ingest": bulk_ingest(seeded, count(200), headers, ingest_content),
+        "load.search_paging": search_paging(seeded, count(400), headers),
+    }
+    results = {}
+    # Entering the context runs the app's startup and shutdown handlers once;
+    # the worker threads share the app through their own clients
+    with TestClient(app):
+        for name, calls in scenarios.items():
+            results[name] = load(calls, concurrency, partial(TestClient, app))
+    return results
@@ -0,0 +1,153 @@
+# benchmarks/micro.py
+"""
+Micro-benchmarks of hot request-path functions, timed call by call in this
+thread. Run through benchmarks/run.py, which sets up the stand-ins first.
+"""
+import os
+from functools import partial
+from typing import Dict
+
+from benchmarks.harness import micro, skipped
+from benchmarks.standins import WEBHOOK_EVENT, write_image, write_pdf
+
+# Output options for transform_image on a 3000x2000 JPEG
+IMAGE_CASES = {
+    "thumbnail_256": {"width": 256},
+    "resize_1024x683": {"width": 1024, "height": 683},
+    "crop_512": {"width": 512, "height": 512, "crop": True},
+    "webp_1024": {"width": 1024, "format": "WEBP"},
+}
+PDF_DPIS = (72, 200)
+
+
+def iterations(base: int, scale: float) -> int:
+    return max(1, int(base * scale))
+
+
+def bench_transform_image(workdir: str, scale: float) -> Dict[str, dict]:
+    from utils.image_transform import transform_image
+
+    source = write_image(os.path.join(workdir, "micro-source.jpg"), 3000, 2000)
+    output = os.path.join(workdir, "micro-output")
+    return {
+        f"micro.transform_image.{name}": micro(
+            partial(transform_image, source, output, **options),
+            iterations(20, scale),
+        )
+        for name, options in IMAGE_CASES.items()
+    }
+
+
+def bench_pdf_to_image(workdir: str, scale: float) -> Dict[str, dict]:
+    from utils.pdf_transform import pdf_to_image
+
+    source = write_pdf(os.path.join(workdir, "micro-source.pdf"))
+    output = os.path.join(workdir, "micro-page.jpg")
+    names = [f"micro.pdf_to_image.page2_{dpi}dpi" for dpi in PDF_DPIS]
+    try:
+        pdf_to_image(source, output, page=2)
+    except Exception as e:
+        # pdf2image shells out to poppler, which may not be installed
+        return {name: skipped(f"pdf_to_image failed: {e}") for name in names}
+    return {
+        name: micro(
+            partial(pdf_to_image, source, output, page=2, dpi=dpi),
+            iterations(10, scale),
+        )
+        for name, dpi in zip(names, PDF_DPIS)
+    }
+
+
+def bench_get_current_user(scale: float) -> Dict[str, dict]:
+    from starlette.requests import Request
+
+    from dependencies.auth import get_current_user
+    from routers.auth import create_access_token
+
+    token = create_access_token(
+        {"sub": "bench-user", "tenant_id": "bench", "roles": ["editor"]}
+    )
+    headers = [(b"authorization", f"Bearer {token}".encode())]
+
+    def call():
+        get_current_user(Request({"type": "http", "headers": headers}))
+
+    return {"micro.get_current_user": micro(call, iterations(20_000, scale))}
+
+
+def bench_trigger_webhooks(seeded: dict, webhooks: int, scale: float):
+    from db import tenant_session
+    from utils.webhook import trigger_webhooks
+
+    tenant_id = seeded["tenant_id"]
+    payload = {"event": WEBHOOK_EVENT, "asset_id": seeded["assets"][0]}
+    db = tenant_session(tenant_id)
+    try:
+        return {
+            f"micro.trigger_webhooks.{webhooks}_hooks": micro(
+                partial(trigger_webhooks, db, tenant_id, WEBHOOK_EVENT, payload),
+                iterations(50, scale),
+            )
+        }
+    finally:
+        db.close()
+
+
+def bench_list_serialization(scale: float, rows: int = 100) -> Dict[str, dict]:
+    from benchmarks.bench_list_serialization import (
+        fast_path,
+        pydantic_path,
+        user_rows,
+        webhook_rows,
+    )
+    from routers.users import USER_LIST_FIELDS, UserListResponse, UserResponse
+    from routers.webhooks import (
+        WEBHOOK_LIST_FIELDS,
+        WebhookListResponse,
+        WebhookResponse,
+    )
+
+    cases = {
+        "users": (
+            UserListResponse,
+            UserResponse,
+            USER_LIST_FIELDS,
+            user_rows(rows),
+            {"total": rows, "page": 1, "size": rows},
+        ),
+        "webhooks": (
+            WebhookListResponse,
+            WebhookResponse,
+            WEBHOOK_LIST_FIELDS,
+            webhook_rows(rows),
+            {"total": rows},
+        ),
+    }
+    results = {}
+    for name, (list_model, item_model, fields, data, extra) in cases.items():
+        prefix = f"micro.list_serialization.{name}_{rows}_rows"
+        results[f"{prefix}.pydantic"] = micro(
+            partial(pydantic_path, list_model, item_model, fields, data, extra),
+            iterations(200, scale),
+        )
+        results[f"{prefix}.column_tuples"] = micro(
+            partial(fast_path, fields, data, extra), iterations(200, scale)
+        )
+    return results
+
+
+def run_micro(workdir: str, seeded: dict, webhooks: int, scale: float) -> dict:
+    """
+    All micro-benchmarks. Without a seeded database (`seeded` is None) the
+    ones that need it are reported as skipped.
+    """
+    results = {}
+    results.update(bench_transform_image(workdir, scale))
+    results.update(bench_pdf_to_image(workdir, scale))
+    results.update(bench_get_current_user(scale))
+    if seeded is None:
+        results[f"micro.trigger_webhooks.{webhooks}_hooks"] = skipped("no database")
+    else:
+        results.update(bench_trigger_webhooks(seeded, webhooks, scale))
+    results.update(bench_list_serialization(scale))
+    return results
@@ -0,0 +1,117 @@
+# benchmarks/run.py
+"""
+Benchmark suite: micro-benchmarks of hot functions (transform_image,
+pdf_to_image, get_current_user, trigger_webhooks, list serialization) and
+load scenarios (login storm, thumbnail CDN-miss storm, bulk ingest, search
+paging) reporting throughput and p50/p95/p99 latency.
+
+Everything runs in this process against local stand-ins (see
+benchmarks/standins.py): a disposable local MySQL database given by the
+BENCH_MYSQL_* variables (default root@127.0.0.1:3306, database dam_bench),
+an in-memory Elasticsearch, LocalStorage in a temporary directory and a
+localhost webhook receiver. Results are written as JSON with sorted keys, one
+file per run, so runs on two commits diff cleanly; --compare exits non-zero
+when a result regressed by more than --tolerance.
+
+    python -m benchmarks.run --output benchmarks/results/base.json
+    python -m benchmarks.run --compare benchmarks/results/base.json
+    python -m benchmarks.run --suite micro --no-db
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+from benchmarks import standins
+from benchmarks.harness import compare, git_revision, print_result, write_results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API benchmark suite")
+    parser.add_argument(
+        "--suite", choices=["all", "micro", "load"], default="all", help="What to run"
+    )
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Multiplier for iterations/requests"
+    )
+    parser.add_argument("--concurrency", type=int, default=16, help="Load threads")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--assets", type=int, default=200)
+    parser.add_argument("--webhooks", type=int, default=5)
+    parser.add_argument(
+        "--no-db",
+        action="store_true",
+        help="Skip everything that needs MySQL (micro-benchmarks only)",
+    )
+    parser.add_argument(
+        "--output", help="Result file (default: benchmarks/results/<commit>.json)"
+    )
+    parser.add_argument("--compare", help="Baseline result file to check against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Allowed relative regression for --compare (0.1 = 10%%)",
+    )
+    parser.add_argument(
+        "--keep-workdir", action="store_true", help="Keep generated files"
+    )
+    args = parser.parse_args()
+    if args.no_db and args.suite == "load":
+        parser.error("load scenarios need the database")
+
+    workdir = tempfile.mkdtemp(prefix="dam-bench-")
+    # Before anything imports config.py
+    standins.configure(workdir)
+    standins.install_fake_es()
+
+    from benchmarks.load import run_load
+    from benchmarks.micro import run_micro
+
+    results = {}
+    try:
+        with standins.WebhookSink() as sink:
+            seeded = None
+            source = standins.write_image(
+                os.path.join(workdir, "seed.jpg"), 1600, 1200
+            )
+            if not args.no_db:
+                standins.prepare_database()
+                seeded = standins.seed(
+                    f"bench-{uuid.uuid4().hex[:8]}",
+                    args.users,
+                    args.assets,
+                    args.webhooks,
+                    sink.url,
+                    source,
+                )
+            if args.suite in ("all", "micro"):
+                results.update(run_micro(workdir, seeded, args.webhooks, args.scale))
+            if args.suite in ("all", "load") and not args.no_db:
+                with open(source, "rb") as f:
+                    content = f.read()
+                results.update(run_load(seeded, args.scale, args.concurrency, content))
+    finally:
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    for name in sorted(results):
+        print_result(name, results[name])
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"{(git_revision()['commit'] or 'local')[:7]}.json"
+    )
+    write_results(output, results, vars(args))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        with open(output) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
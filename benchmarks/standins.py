@@ -0,0 +1,435 @@
+# benchmarks/standins.py
+"""
+Local stand-ins for the services the API talks to, used by the benchmark
+suite (see benchmarks/run.py):
+- MySQL: a local, disposable database named by the BENCH_MYSQL_* variables
+- Elasticsearch: FakeElasticsearch, an in-memory index
+- Object storage: LocalStorage in the run's working directory
+- Webhook receivers: WebhookSink, an HTTP server on localhost
+configure() must run before anything imports config.py.
+"""
+import json
+import os
+import threading
+import uuid
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PASSWORD = "bench-password"
+WEBHOOK_EVENT = "asset.updated"
+SEARCH_TERM = "photo"  # every seeded asset title contains it
+TAGS = ["beach", "city", "forest", "studio"]
+
+
+def configure(workdir: str):
+    """
+    Point the settings at the stand-ins. Connection settings are always
+    overridden, so a configured .env can never aim the suite at a real
+    database or search cluster.
+    """
+    os.environ.update(
+        {
+            "MYSQL_HOST": os.environ.get("BENCH_MYSQL_HOST", "127.0.0.1"),
+            "MYSQL_PORT": os.environ.get("BENCH_MYSQL_PORT", "3306"),
+            "MYSQL_USER": os.environ.get("BENCH_MYSQL_USER", "root"),
+            "MYSQL_PASSWORD": os.environ.get("BENCH_MYSQL_PASSWORD", ""),
+            "MYSQL_DB": os.environ.get("BENCH_MYSQL_DB", "dam_bench"),
+            "DB_SHARDS": "{}",
+            "SECRET_KEY": "bench-secret-key",
+            "ES_HOST": "http://fake-elasticsearch.invalid:9200",
+            "STORAGE_TYPE": "local",
+            "ASSET_LOCAL_DIR": os.path.join(workdir, "assets"),
+            "ASSET_ARCHIVE_DIR": "",
+            "S3_BUCKET": "bench",
+            "S3_ACCESS_KEY": "bench",
+            "S3_SECRET_KEY": "bench",
+            "S3_REGION": "us-east-1",
+            # Measure the handlers, not the limiters
+            "RATE_LIMIT_ENABLED": "false",
+            "RATE_LIMIT_REDIS_URL": "",
+            "ROW_CACHE_REDIS_URL": "",
+            "TENANT_QUOTAS": "{}",
+            "TENANT_STORAGE_QUOTA_BYTES": "0",
+            "TENANT_BANDWIDTH_QUOTA_BYTES": "0",
+        }
+    )
+
+
+class FakeResponse(dict):
+    """
+    A response dict that also offers the `.body` of elasticsearch 8 client
+    responses, which the bulk helper reads.
+    """
+
+    @property
+    def body(self):
+        return self
+
+
+def _leaves(value) -> list:
+    if isinstance(value, dict):
+        return [leaf for v in value.values() for leaf in _leaves(v)]
+    if isinstance(value, list):
+        return [leaf for v in value for leaf in _leaves(v)]
+    return [value]
+
+
+def _field(doc: dict, path: str) -> list:
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return []
+        value = value[part]
+    return [v for v in _leaves(value) if v is not None]
+
+
+def _clauses(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def matches(doc: dict, clause: dict) -> bool:
+    """
+    Evaluate the subset of the query DSL that utils/es_indexing.py builds.
+    simple_query_string matches when every word occurs in some string value.
+    """
+    ((kind, spec),) = clause.items()
+    if kind == "match_all":
+        return True
+    if kind == "term":
+        ((field, value),) = spec.items()
+        if isinstance(value, dict):
+            value = value["value"]
+        return value in _field(doc, field)
+    if kind == "terms":
+        ((field, values),) = spec.items()
+        return bool(set(_field(doc, field)) & set(values))
+    if kind == "exists":
+        return bool(_field(doc, spec["field"]))
+    if kind == "range":
+        ((field, bounds),) = spec.items()
+        return any(
+            isinstance(v, (int, float))
+            and v >= bounds.get("gte", v)
+            and v <= bounds.get("lte", v)
+            for v in _field(doc, field)
+        )
+    if kind == "bool":
+        required = _clauses(spec.get("must")) + _clauses(spec.get("filter"))
+        if not all(matches(doc, c) for c in required):
+            return False
+        if any(matches(doc, c) for c in _clauses(spec.get("must_not"))):
+            return False
+        should = _clauses(spec.get("should"))
+        if not should:
+            return True
+        minimum = spec.get("minimum_should_match", 0 if required else 1)
+        return sum(matches(doc, c) for c in should) >= int(minimum)
+    if kind == "simple_query_string":
+        text = " ".join(str(v) for v in _leaves(doc) if isinstance(v, str)).lower()
+        return all(word in text for word in spec["query"].lower().split())
+    raise ValueError(f"FakeElasticsearch does not support {kind!r} queries")
+
+
+class _FakeIndices:
+    def __init__(self):
+        self.mappings = {}
+
+    def exists(self, index, **kwargs) -> bool:
+        return index in self.mappings
+
+    def create(self, index, **kwargs):
+        self.mappings.setdefault(index, kwargs.get("mappings") or {})
+        return FakeResponse(acknowledged=True, index=index)
+
+    def put_mapping(self, index, body=None, **kwargs):
+        self.mappings.setdefault(index, {}).update(body or kwargs)
+        return FakeResponse(acknowledged=True)
+
+
+class FakeElasticsearch:
+    """
+    In-memory stand-in for the Elasticsearch client: documents are kept in a
+    dict per index and queries are evaluated by matches(). It implements the
+    calls made by utils/es_indexing.py and by the scan and bulk helpers, so
+    search and indexing cost next to nothing and the suite measures the API.
+    Updates of missing documents create them.
+    """
+
+    def __init__(self):
+        self.docs = defaultdict(dict)  # index -> id -> source
+        self.scrolls = {}  # scroll id -> (remaining hits, page size)
+        self.indices = _FakeIndices()
+        self._lock = threading.Lock()
+
+    def options(self, **kwargs):
+        return self
+
+    def ping(self, **kwargs) -> bool:
+        return True
+
+    def info(self, **kwargs):
+        return FakeResponse(version={"number": "8.0.0-fake"})
+
+    def index(self, index, id, document=None, body=None, **kwargs):
+        with self._lock:
+            self.docs[index][str(id)] = dict(document or body or {})
+        return FakeResponse(_index=index, _id=str(id), result="created")
+
+    def update(self, index, id, doc=None, body=None, **kwargs):
+        doc = doc if doc is not None else (body or {}).get("doc", {})
+        with self._lock:
+            self.docs[index].setdefault(str(id), {}).update(doc)
+        return FakeResponse(_index=index, _id=str(id), result="updated")
+
+    def delete(self, index, id, **kwargs):
+        with self._lock:
+            found = self.docs[index].pop(str(id), None) is not None
+        return FakeResponse(_index=index, _id=str(id), found=found)
+
+    def _page(self, hits: list, total: int, scroll_id: str = None):
+        response = FakeResponse(
+            took=0,
+            timed_out=False,
+            _shards={"total": 1, "successful": 1, "skipped": 0, "failed": 0},
+            hits={"total": {"value": total, "relation": "eq"}, "hits": hits},
+        )
+        if scroll_id is not None:
+            response["_scroll_id"] = scroll_id
+        return response
+
+    def search(
+        self, index=None, body=None, query=None, scroll=None, size=10, **kwargs
+    ):
+        if query is None:
+            query = (body or {}).get("query", {"match_all": {}})
+        with self._lock:
+            docs = sorted(self.docs[index].items())
+        source = kwargs.get("_source", True) is not False
+        hits = [
+            {"_index": index, "_id": doc_id, **({"_source": doc} if source else {})}
+            for doc_id, doc in docs
+            if matches(doc, query)
+        ]
+        start = kwargs.get("from_", 0)
+        page = hits[start : start + size]
+        if not scroll:
+            return self._page(page, len(hits))
+        scroll_id = uuid.uuid4().hex
+        with self._lock:
+            self.scrolls[scroll_id] = (hits[start + size :], size)
+        return self._page(page, len(hits), scroll_id)
+
+    def scroll(self, scroll_id=None, body=None, **kwargs):
+        scroll_id = scroll_id or (body or {}).get("scroll_id")
+        with self._lock:
+            remaining, size = self.scrolls.get(scroll_id, ([], 0))
+            self.scrolls[scroll_id] = (remaining[size:], size)
+        return self._page(remaining[:size], len(remaining), scroll_id)
+
+    def clear_scroll(self, scroll_id=None, body=None, **kwargs):
+        scroll_id = scroll_id or (body or {}).get("scroll_id")
+        with self._lock:
+            self.scrolls.pop(scroll_id, None)
+        return FakeResponse(succeeded=True)
+
+    def bulk(self, operations=None, body=None, index=None, **kwargs):
+        lines = operations if operations is not None else body
+        if isinstance(lines, (str, bytes)):
+            lines = lines.splitlines()
+        lines = [json.loads(l) if isinstance(l, (str, bytes)) else l for l in lines]
+        items, i = [], 0
+        with self._lock:
+            while i < len(lines):
+                ((op, meta),) = lines[i].items()
+                target = self.docs[meta.get("_index", index)]
+                doc_id = str(meta.get("_id") or uuid.uuid4().hex)
+                status = 200
+                if op in ("index", "create"):
+                    target[doc_id] = dict(lines[i + 1])
+                    i += 2
+                elif op == "update":
+                    target.setdefault(doc_id, {}).update(lines[i + 1].get("doc", {}))
+                    i += 2
+                else:
+                    status = 200 if target.pop(doc_id, None) is not None else 404
+                    i += 1
+                items.append({op: {"_id": doc_id, "status": status}})
+        return FakeResponse(took=0, errors=False, items=items)
+
+
+def install_fake_es() -> FakeElasticsearch:
+    import utils.es
+
+    utils.es._es = FakeElasticsearch()
+    return utils.es._es
+
+
+class _SinkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WebhookSink:
+    """
+    Webhook receiver on an ephemeral localhost port that answers every
+    delivery with 204, so trigger_webhooks pays for real HTTP round trips.
+    """
+
+    def __init__(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _SinkHandler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def write_image(path: str, width: int, height: int, format: str = "JPEG") -> str:
+    """
+    A synthetic test image. Gradients plus noise compress roughly like a
+    photo, unlike a flat fill that would make decoding unrealistically cheap.
+    """
+    from PIL import Image, ImageOps
+
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 24)
+    image = Image.merge("RGB", (gradient, noise, ImageOps.mirror(gradient)))
+    image.save(path, format, quality=90)
+    return path
+
+
+def write_pdf(path: str, pages: int = 3) -> str:
+    """
+    A multi-page PDF of synthetic A4 images at 100 dpi.
+    """
+    from PIL import Image
+
+    first, *rest = [
+        Image.open(write_image(f"{path}.{n}.jpg", 827, 1169)) for n in range(pages)
+    ]
+    first.save(path, "PDF", resolution=100, save_all=True, append_images=rest)
+    return path
+
+
+def prepare_database():
+    """
+    Create the schema in the benchmark database the way a deploy does.
+    """
+    from migrate import migrate
+
+    migrate(months_ahead=1, dry_run=False, online=True)
+
+
+def seed(
+    tenant_id: str,
+    users: int,
+    assets: int,
+    webhooks: int,
+    webhook_url: str,
+    image_path: str,
+) -> dict:
+    """
+    A fresh tenant with users (all with PASSWORD), image assets stored in
+    LocalStorage and indexed in the fake Elasticsearch, and webhooks for
+    WEBHOOK_EVENT pointing at `webhook_url`.
+    :return: {"tenant_id", "users": [(id, email)], "assets": [id]}
+    """
+    from PIL import Image
+
+    from db import tenant_session
+    from models import Asset, User, Webhook, generate_uuid
+    from storage.factory import asset_key, get_storage
+    from utils.es_indexing import index_asset
+    from utils.passwords import get_password_hash
+    from utils.user_directory import register_users
+
+    # One hash for everyone: bcrypt is the point of the login storm, not of
+    # seeding it
+    password_hash = get_password_hash(PASSWORD)
+    storage = get_storage()
+    size = os.path.getsize(image_path)
+    with Image.open(image_path) as image:
+        width, height = image.size
+
+    user_rows, asset_rows, documents = [], [], []
+    for i in range(users):
+        user_rows.append(
+            User(
+                id=generate_uuid(),
+                tenant_id=tenant_id,
+                email=f"user{i}@{tenant_id}.example.com",
+                full_name=f"Bench User {i}",
+                password_hash=password_hash,
+                roles=["editor"],
+            )
+        )
+    for i in range(assets):
+        asset_id = generate_uuid()
+        key = asset_key(asset_id)
+        with open(image_path, "rb") as f:
+            storage.save(f, key)
+        metainfo = {
+            "title": f"Bench {SEARCH_TERM} {i}",
+            "description": f"Synthetic {width}x{height} image",
+            "tags": [TAGS[i % len(TAGS)]],
+            "technical": {"width": width, "height": height, "format": "JPEG"},
+        }
+        asset = Asset(
+            id=asset_id,
+            tenant_id=tenant_id,
+            filename=f"photo-{i:05d}.jpg",
+            url=f"http://localhost{storage.get_url(key)}",
+            mimetype="image/jpeg",
+            size=size,
+            metainfo=metainfo,
+        )
+        asset_rows.append(asset)
+        documents.append(
+            {
+                "id": asset_id,
+                "tenant_id": tenant_id,
+                "filename": asset.filename,
+                "mimetype": asset.mimetype,
+                "metainfo": metainfo,
+            }
+        )
+    webhook_rows = [
+        Webhook(
+            tenant_id=tenant_id,
+            url=webhook_url,
+            events=[WEBHOOK_EVENT],
+            secret="bench-secret",
+            headers={"X-Bench-Hook": str(i)},
+        )
+        for i in range(webhooks)
+    ]
+
+    seeded_users = [(u.id, u.email) for u in user_rows]
+    db = tenant_session(tenant_id)
+    try:
+        db.add_all(user_rows + asset_rows + webhook_rows)
+        db.commit()
+    finally:
+        db.close()
+    register_users(user_rows)
+    for document in documents:
+        index_asset(document)
+    return {
+        "tenant_id": tenant_id,
+        "users": seeded_users,
+        "assets": [a["id"] for a in documents],
+    }
@@ -0,0 +1,20 @@
+# compact_usage.py
+import argparse
+
+from db import SessionLocal
+from utils.usage import compact_all
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact usage rollup tables")
+    parser.add_argument(
+        "--hourly-days", type=int, default=7, help="Keep hourly rows this many days"
+    )
+    parser.add_argument(
+        "--daily-days", type=int, default=400, help="Keep daily rows this many days"
+    )
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        print(compact_all(db, args.hourly_days, args.daily_days))
+    finally:
+        db.close()
@@ -1,5 +1,7 @@
 # config.py
-from pydantic import BaseSettings
+from typing import Dict, List, Tuple
+
+from pydantic import BaseSettings, validator
 
 class Settings(BaseSettings):
     MYSQL_USER: str
@@ -7,6 +9,14 @@ class Settings(BaseSettings):
     MYSQL_HOST: str
     MYSQL_PORT: int
     MYSQL_DB: str
+    DB_ECHO: bool = False  # log every SQL statement
+    DB_POOL_SIZE: int = 5  # connections kept open per engine and process
+    DB_MAX_OVERFLOW: int = 10  # extra connections opened under load
+
+    # Tenant sharding: shard name -> SQLAlchemy URL. The MYSQL_* database is the
+    # "default" shard and holds the tenant directory.
+    DB_SHARDS: Dict[str, str] = {}
+    SHARD_DIRECTORY_TTL: float = 30.0  # seconds a tenant's shard is cached
 
     SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
@@ -18,11 +28,124 @@ class Settings(BaseSettings):
 
     STORAGE_TYPE: str = "local"  # or "s3"
     ASSET_LOCAL_DIR: str = "./uploaded_assets"
+    ASSET_ARCHIVE_DIR: str = ""  # local archive tier; empty keeps files in place
     
     S3_BUCKET: str
     S3_ACCESS_KEY: str
     S3_SECRET_KEY: str
     S3_REGION: str
+    S3_ARCHIVE_STORAGE_CLASS: str = "GLACIER_IR"  # instant retrieval, reads still work
+
+    # Transform guardrails
+    IMAGE_MAX_PIXELS: int = 50_000_000  # max decoded pixels per image
+    IMAGE_MAX_SOURCE_PIXELS: int = 400_000_000  # max header pixels before draft
+    TRANSFORM_MEMORY_BUDGET_MB: int = 1024  # per-process decode budget
+    TRANSFORM_ADMISSION_TIMEOUT: float = 10.0  # seconds to wait for budget
+
+    # Transform scheduler (per process)
+    TRANSFORM_WORKERS: int = 4  # worker threads running transforms
+    TRANSFORM_QUANTUM_MB: float = 64.0  # DRR credit per tenant visit
+    TRANSFORM_TENANT_WEIGHTS: Dict[str, float] = {}  # tenant -> share, default 1
+    TRANSFORM_MAX_QUEUED_PER_TENANT: int = 1000  # per priority class
+    TRANSFORM_WAIT_TENANT_SERIES: int = 20  # busiest tenants with own wait metric
+
+    # Tag autocomplete cache (per process)
+    TAG_AUTOCOMPLETE_MAX_TAGS: int = 2_000_000  # across all cached tenants
+    TAG_AUTOCOMPLETE_MAX_TENANTS: int = 1000
+    TAG_AUTOCOMPLETE_TTL: float = 300.0  # seconds before a tenant is reloaded
+    TAG_AUTOCOMPLETE_MAX_SCAN: int = 5000  # matches ranked in memory; more use SQL
+
+    # Audit log writer
+    AUDIT_BATCH_SIZE: int = 500  # rows per multi-row INSERT
+    AUDIT_FLUSH_INTERVAL: float = 2.0  # seconds between background flushes
+    AUDIT_MAX_PENDING: int = 50_000  # queued rows kept; the oldest are dropped beyond
+    AUDIT_RETENTION_MONTHS: int = 24
+
+    # Usage counters
+    USAGE_FLUSH_INTERVAL: float = 30.0  # seconds between rollup upserts
+
+    # Ops endpoints: /metrics takes this bearer token (for scrapers), or a user
+    # token with the "ops:read" permission. Empty = user tokens only.
+    OPS_METRICS_TOKEN: str = ""
+
+    # Health checks
+    HEALTH_CACHE_SECONDS: float = 2.0  # reuse probe results for this long
+    HEALTH_PROBE_TIMEOUT: float = 2.0  # per-check deadline for all probes
+
+    # Asset lifecycle
+    ASSET_PURGE_AFTER_DAYS: int = 30  # soft-deleted assets are purged after this
+    PURGE_BATCH_SIZE: int = 200
+    PURGE_DUTY_CYCLE: float = 0.2  # fraction of wall time the purger may be busy
+    ASSET_VERSIONS_KEEP: int = 10  # newest versions kept by prune_versions.py
+
+    # Asset ACL cache (per process)
+    ACL_CACHE_MAX_ASSETS: int = 200_000
+    # Seconds; a revoked grant can still be used through another worker's cache
+    # for up to this long (the worker that made the change drops it at once)
+    ACL_CACHE_TTL: float = 15.0
+    ACL_REINDEX_RETRY_INTERVAL: float = 5.0  # first retry of a failed ES update
+
+    # Role-based authorization
+    AUTHZ_POLICY_FILE: str = ""  # JSON policy; empty uses the built-in policy
+    AUTHZ_RELOAD_INTERVAL: float = 5.0  # seconds between policy file checks
+    AUTHZ_DECISION_CACHE_SIZE: int = 100_000
+
+    # Per-tenant rate limits: route class -> (requests per second, burst)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+        "transform": (5.0, 20),
+        "search": (10.0, 40),
+        "write": (20.0, 100),
+        "read": (50.0, 200),
+    }
+    RATE_LIMIT_REDIS_URL: str = ""  # shared buckets across workers; empty = local
+
+    # Per-tenant quotas in bytes (0 = unlimited); bandwidth is per calendar month
+    TENANT_STORAGE_QUOTA_BYTES: int = 0
+    TENANT_BANDWIDTH_QUOTA_BYTES: int = 0
+    TENANT_QUOTAS: Dict[str, Dict[str, int]] = {}  # tenant -> {storage, bandwidth}
+    # Seconds between usage reloads. Each worker only counts its own uploads in
+    # between, so with N workers a tenant can overshoot a quota by up to N
+    # times the headroom it had at the last reload, for up to this long.
+    QUOTA_CACHE_TTL: float = 60.0
+
+    # Read-through cache of Asset/User rows by primary key
+    ROW_CACHE_ENABLED: bool = True
+    ROW_CACHE_MAX_ENTRIES: int = 50_000  # per model, per process
+    ROW_CACHE_TTL: float = 5.0  # seconds; bounds staleness across workers
+    ROW_CACHE_REDIS_URL: str = ""  # optional shared tier; empty = local only
+    ROW_CACHE_SHARED_TTL: float = 300.0
+
+    # Schema migrations (migrate.py)
+    MIGRATION_BATCH_SIZE: int = 1000  # rows per backfill UPDATE
+    MIGRATION_BATCH_PAUSE: float = 0.1  # seconds between backfill batches
+    MIGRATION_LOCK_WAIT_TIMEOUT: int = 5  # seconds DDL may wait for a metadata lock
+    MIGRATION_SCAN_MB_PER_SEC: float = 50.0  # assumed rebuild rate for estimates
+
+    # Router groups served by this process: core, assets, transform, audit,
+    # webhooks, reports. Routers of other groups are never imported.
+    ROUTER_GROUPS: List[str] = [
+        "core",
+        "assets",
+        "transform",
+        "audit",
+        "webhooks",
+        "reports",
+    ]
+
+    @validator("TRANSFORM_QUANTUM_MB")
+    def _positive_quantum(cls, value):
+        # The scheduler divides by quantum * weight to find the next round
+        if value <= 0:
+            raise ValueError("must be positive")
+        return value
+
+    @validator("TRANSFORM_TENANT_WEIGHTS")
+    def _positive_weights(cls, value):
+        bad = sorted(tenant for tenant, weight in value.items() if weight <= 0)
+        if bad:
+            raise ValueError(f"weights must be positive, got <= 0 for {bad}")
+        return value
 
     class Config:
         env_file = ".env"
@@ -1,24 +1,21 @@
 # create_first_user.py
-from db import SessionLocal
+from db import tenant_session
 from models import User
-from passlib.context import CryptContext
+from utils.passwords import get_password_hash
+from utils.user_directory import claim_email
 from uuid import uuid4
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
 
 def create_first_user():
     """
     Create the first user with admin privileges.
     This function should be run only once to set up the initial admin user.
     """
-    db = SessionLocal()
+    user_id = str(uuid4())
+    claim_email("admin@example.com", "ten1", user_id)
+    db = tenant_session("ten1")
     user = User(
-        id=str(uuid4()),
+        id=user_id,
         tenant_id="ten1",
         email="admin@example.com",
         full_name="Admin User",
@@ -1,26 +1,167 @@
 # db.py
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 from config import settings
+from utils.metrics import instrument_engine
 
 DATABASE_URL = (
     f"mysql+mysqlconnector://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}"
     f"@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
 )
-engine = create_engine(DATABASE_URL, echo=True, future=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# The MYSQL_* database is the "default" shard and also holds the tenant
+# directory and the tables below, which are not split by tenant. Every other
+# table exists on every shard and holds the rows of the tenants mapped to it.
+DEFAULT_SHARD = "default"
+GLOBAL_TABLES = {
+    "tenant_shards",
+    "user_emails",
+    "audit_logs",
+    "asset_usage_rollups",
+    "api_usage_rollups",
+}
+
+TENANT_ACTIVE = "active"
+TENANT_READONLY = "readonly"  # set while a tenant is moved between shards
+
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def make_engine(url: str):
+    engine = create_engine(
+        url,
+        echo=settings.DB_ECHO,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        future=True,
+    )
+    instrument_engine(engine)
+    return engine
+
+
+engine = make_engine(DATABASE_URL)
 Base = declarative_base()
 
 
-def get_db():
+class ShardRouter:
+    """
+    Maps tenants to shards through the tenant_shards directory table.
+    Lookups are cached per process for `ttl` seconds, so routing costs one
+    dict lookup per request; tenants without a directory row live on the
+    default shard. Engines for the other shards are created on first use.
+    With no DB_SHARDS configured the directory is never queried.
+    """
+
+    def __init__(self, urls: Dict[str, str], ttl: float):
+        self.urls = {DEFAULT_SHARD: DATABASE_URL, **urls}
+        self.engines = {DEFAULT_SHARD: engine}
+        self.ttl = ttl
+        # tenant -> (shard, state, loaded at)
+        self.directory: Dict[str, Tuple[str, str, float]] = {}
+
+    def shard_names(self) -> List[str]:
+        return list(self.urls)
+
+    def engine_for_shard(self, shard: str):
+        shard_engine = self.engines.get(shard)
+        if shard_engine is None:
+            if shard not in self.urls:
+                raise KeyError(f"Unknown shard: {shard}")
+            shard_engine = self.engines.setdefault(shard, make_engine(self.urls[shard]))
+        return shard_engine
+
+    def lookup(self, tenant_id: str) -> Tuple[str, str]:
+        """
+        :return: (shard, state) of a tenant.
+        """
+        if len(self.urls) == 1:
+            return DEFAULT_SHARD, TENANT_ACTIVE
+        now = time.monotonic()
+        entry = self.directory.get(tenant_id)
+        if entry is not None and now - entry[2] < self.ttl:
+            return entry[0], entry[1]
+        from models import TenantShard
+
+        with Session(bind=engine) as db:
+            row = db.get(TenantShard, tenant_id)
+        shard, state = (row.shard, row.state) if row else (DEFAULT_SHARD, TENANT_ACTIVE)
+        self.directory[tenant_id] = (shard, state, now)
+        return shard, state
+
+    def invalidate(self, tenant_id: str):
+        self.directory.pop(tenant_id, None)
+
+
+shard_router = ShardRouter(settings.DB_SHARDS, ttl=settings.SHARD_DIRECTORY_TTL)
+
+
+class ShardedSession(Session):
+    """
+    Session that sends each statement to the shard of the tenant in
+    info["tenant_id"] (or to the shard named in info["shard"], for maintenance
+    jobs). Global tables always go to the default database. A transaction
+    touching both a shard and a global table uses two connections and is not
+    atomic across them.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        table = getattr(mapper, "local_table", None)
+        if table is not None and table.name in GLOBAL_TABLES:
+            return engine
+        shard = self.info.get("shard")
+        if shard is None:
+            tenant_id = self.info.get("tenant_id")
+            shard = shard_router.lookup(tenant_id)[0] if tenant_id else DEFAULT_SHARD
+        return shard_router.engine_for_shard(shard)
+
+    def bulk_update_mappings(self, mapper, mappings, **kw):
+        # The legacy bulk API bypasses do_orm_execute, so the row cache would
+        # never hear of these rows. The ORM bulk UPDATE by primary key does
+        # the same work and is seen like any other statement.
+        mappings = list(mappings)
+        if mappings:
+            self.execute(update(mapper), mappings)
+
+
+SessionLocal = sessionmaker(class_=ShardedSession, autocommit=False, autoflush=False)
+
+
+def tenant_session(tenant_id: str) -> Session:
+    """
+    Session bound to a tenant's shard, for work outside a request.
+    """
+    return SessionLocal(info={"tenant_id": tenant_id})
+
+
+def shard_session(shard: str) -> Session:
+    """
+    Session bound to one shard regardless of tenant, for maintenance jobs.
+    """
+    return SessionLocal(info={"shard": shard})
+
+
+def get_db(request: Request):
     """
     Dependency that provides a database session.
     This function can be used with FastAPI's dependency injection system.
-    It yields a database session and ensures it is closed after use.
+    It yields a database session bound to the shard of the request's tenant
+    (set by get_current_user) and ensures it is closed after use. Writes are
+    refused with 503 while the tenant is being moved between shards.
     """
-    db = SessionLocal()
+    tenant_id: Optional[str] = getattr(request.state, "tenant_id", None)
+    if tenant_id and request.method in MUTATING_METHODS:
+        if shard_router.lookup(tenant_id)[1] == TENANT_READONLY:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Tenant is being migrated; retry shortly",
+                headers={"Retry-After": str(int(settings.SHARD_DIRECTORY_TTL))},
+            )
+    db = SessionLocal(info={"tenant_id": tenant_id})
     try:
         yield db
     finally:
         db.close()
-
@@ -0,0 +1,46 @@
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, Path, Request
+from sqlalchemy.orm import Session
+
+from db import get_db
+from dependencies.auth import get_current_user, TokenPayload
+from utils.acl import PermissionSet, LEVELS
+
+
+def get_permissions(
+    request: Request, current_user: TokenPayload = Depends(get_current_user)
+) -> PermissionSet:
+    """
+    The current user's permission set, built once per request and shared by
+    every check made while handling it.
+    """
+    permissions = getattr(request.state, "permissions", None)
+    if permissions is None:
+        permissions = PermissionSet(
+            current_user.tenant_id, current_user.sub, current_user.roles
+        )
+        request.state.permissions = permissions
+    return permissions
+
+
+def require_asset_level(level: str):
+    """
+    Route dependency requiring `level` (read, write or admin) on the asset in
+    the `id` path parameter. Assets the user cannot see at all are reported as
+    missing rather than forbidden.
+    """
+    need = LEVELS[level]
+
+    def check_asset_level(
+        id: UUID = Path(..., description="Asset ID"),
+        db: Session = Depends(get_db),
+        permissions: PermissionSet = Depends(get_permissions),
+    ):
+        rank = permissions.levels(db, [id])[str(id)]
+        if rank == 0:
+            raise HTTPException(404, "Asset not found")
+        if rank < need:
+            raise HTTPException(403, f"Requires {level} permission on this asset")
+
+    return check_asset_level
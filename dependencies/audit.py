@@ -0,0 +1,36 @@
+from fastapi import Depends, Request
+
+from dependencies.auth import get_current_user, TokenPayload
+from utils.audit import record_audit
+
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def audit_request(
+    request: Request, current_user: TokenPayload = Depends(get_current_user)
+):
+    """
+    Records an audit entry for every successful mutating request.
+    The entry is queued after the endpoint returns; failed requests (raised
+    exceptions) are not recorded. The action is the endpoint's function name.
+    """
+    yield
+    if request.method not in MUTATING_METHODS:
+        return
+    route = request.scope.get("route")
+    path_params = dict(request.path_params)
+    asset_id = None
+    if "/assets/" in request.url.path and "id" in path_params:
+        asset_id = str(path_params["id"])
+    record_audit(
+        current_user.tenant_id,
+        getattr(route, "name", None) or f"{request.method} {request.url.path}",
+        user_id=current_user.sub,
+        asset_id=asset_id,
+        details={
+            "method": request.method,
+            "path": getattr(route, "path", request.url.path),
+            "params": {k: str(v) for k, v in path_params.items()},
+        },
+        ip_address=request.client.host if request.client else None,
+    )
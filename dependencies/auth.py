@@ -30,9 +30,12 @@ def get_current_user(request: Request) -> TokenPayload:
     token = auth_header.split(" ")[1]
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return TokenPayload(**payload)
+        user = TokenPayload(**payload)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
         )
+    # Lets middleware (metrics, usage counters) attribute the request to a tenant
+    request.state.tenant_id = user.tenant_id
+    return user
 
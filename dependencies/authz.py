@@ -0,0 +1,37 @@
+import hmac
+
+from fastapi import Depends, HTTPException, Request, status
+
+from config import settings
+from dependencies.auth import get_current_user, TokenPayload
+from utils.policy import policy_store
+
+
+def require_permission(permission: str):
+    """
+    Route dependency requiring a permission such as "users:write".
+    Evaluated from the token's tenant and roles against the in-memory policy,
+    so it adds no database or network round-trip.
+    """
+
+    def check_permission(current_user: TokenPayload = Depends(get_current_user)):
+        roles = tuple(current_user.roles or ())
+        if not policy_store.allows(current_user.tenant_id, roles, permission):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Missing permission: {permission}",
+            )
+
+    return check_permission
+
+
+def require_ops_access(request: Request):
+    """
+    Route dependency for operational endpoints such as /metrics: either the
+    OPS_METRICS_TOKEN bearer token or a user token with "ops:read".
+    """
+    supplied = request.headers.get("Authorization") or ""
+    token = settings.OPS_METRICS_TOKEN
+    if token and hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+        return
+    require_permission("ops:read")(get_current_user(request))
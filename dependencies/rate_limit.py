@@ -0,0 +1,56 @@
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from config import settings
+from dependencies.auth import get_current_user, TokenPayload
+from utils.quotas import QuotaExceeded, TenantQuotas
+from utils.rate_limit import rate_limiter, route_class
+
+
+def add_limit_headers(request: Request, headers: dict):
+    """
+    Queue headers for RateLimitHeadersMiddleware to add to the response.
+    """
+    pending = getattr(request.state, "limit_headers", None) or {}
+    pending.update(headers)
+    request.state.limit_headers = pending
+
+
+def rate_limit(
+    request: Request, current_user: TokenPayload = Depends(get_current_user)
+):
+    """
+    Charges the request to its tenant's token bucket for the route class and
+    rejects it with 429 when the bucket is empty.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    result = rate_limiter.check(
+        current_user.tenant_id, route_class(request.method, request.url.path)
+    )
+    if result is None:
+        return
+    allowed, headers = result
+    add_limit_headers(request, headers)
+    if not allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers=headers,
+        )
+
+
+def enforce_quota(
+    request: Request, db: Session, quota: TenantQuotas, tenant_id: str, extra: int = 0
+):
+    """
+    Rejects the request if the tenant's quota cannot cover `extra` more bytes:
+    403 for storage, 429 for the monthly bandwidth allowance.
+    """
+    try:
+        headers = quota.check(db, tenant_id, extra)
+    except QuotaExceeded as e:
+        code = 403 if e.kind == "storage" else status.HTTP_429_TOO_MANY_REQUESTS
+        raise HTTPException(code, str(e))
+    if headers:
+        add_limit_headers(request, headers)
@@ -0,0 +1,32 @@
+# extract_metadata.py
+import argparse
+
+from db import shard_router, shard_session, tenant_session
+from utils.metadata_extract import run_extraction
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract technical metadata for assets")
+    parser.add_argument("--tenant", help="Only process this tenant")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument(
+        "--all", action="store_true", help="Re-extract assets that already have it"
+    )
+    args = parser.parse_args()
+    if args.tenant:
+        sessions = [tenant_session(args.tenant)]
+    else:
+        sessions = [shard_session(s) for s in shard_router.shard_names()]
+    total = 0
+    for db in sessions:
+        try:
+            total += run_extraction(
+                db,
+                tenant_id=args.tenant,
+                batch_size=args.batch_size,
+                workers=args.workers,
+                only_missing=not args.all,
+            )
+        finally:
+            db.close()
+    print(f"Extracted metadata for {total} assets.")
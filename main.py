@@ -1,98 +1,73 @@
+import importlib
+
 from fastapi import FastAPI, Depends
+from config import settings
 from dependencies.auth import get_current_user
-from db import engine, Base
-from routers import (
-    auth,
-    users,
-    assets,
-    metadata,
-    tags,
-    search,
-    permissions,
-    audit,
-    lifecycle,
-    webhooks,
-    reports,
-    misc,
-    transform,
-)
-
-import models
+from dependencies.audit import audit_request
+from dependencies.authz import require_permission
+from dependencies.rate_limit import rate_limit
+from utils.audit import audit_writer
+from utils.usage import usage_counters
+from utils.metrics import MetricsMiddleware
+from utils.policy import policy_store
+from utils.rate_limit import RateLimitHeadersMiddleware
+from utils.transform_scheduler import transform_scheduler
 
 app = FastAPI(title="Headless DAM API")
+app.add_middleware(RateLimitHeadersMiddleware)
+app.add_middleware(MetricsMiddleware, usage_counters=usage_counters)
+
+# Authenticated, rate-limited per tenant, and every successful mutating call
+# is audited
+protected = [Depends(get_current_user), Depends(rate_limit), Depends(audit_request)]
+
+# (group, module in routers/, prefix, tag, required permissions or None if public)
+# Only the routers of the groups in ROUTER_GROUPS are imported, so e.g. a
+# transform-only worker never loads the metadata or reporting code.
+ROUTERS = [
+    ("core", "auth", "/auth", "Authentication", None),
+    ("core", "ops", "", "Ops", None),
+    ("core", "users", "/users", "Users", []),
+    ("assets", "assets", "/assets", "Assets", []),
+    ("assets", "metadata", "/metadata", "Metadata", []),
+    ("assets", "tags", "/tags", "Tags", []),
+    ("transform", "transform", "/transform", "Transform", []),
+    ("core", "permissions", "/permissions", "Permissions", []),
+    ("audit", "audit", "/audit", "Audit", ["audit:read"]),
+    ("assets", "lifecycle", "/assets", "Lifecycle", []),
+    ("webhooks", "webhooks", "/webhooks", "Webhooks", ["webhooks:manage"]),
+    ("reports", "reports", "/reports", "Reports", ["reports:read"]),
+    ("core", "misc", "", "Misc", []),
+]
+
+
+def include_routers(app: FastAPI, groups):
+    for group, module, prefix, tag, permissions in ROUTERS:
+        if group not in groups:
+            continue
+        router = importlib.import_module(f"routers.{module}").router
+        if permissions is None:
+            app.include_router(router, prefix=prefix, tags=[tag])
+            continue
+        dependencies = protected + [Depends(require_permission(p)) for p in permissions]
+        app.include_router(router, prefix=prefix, tags=[tag], dependencies=dependencies)
 
 
 @app.on_event("startup")
 def on_startup():
-    # This will create all tables if they do not exist
-    Base.metadata.create_all(bind=engine)
+    # Tables and partitions are created by `python migrate.py`, not here, so
+    # starting a worker never touches the database.
+    audit_writer.start()
+    usage_counters.start()
+    policy_store.start()
+    if "transform" in settings.ROUTER_GROUPS:
+        transform_scheduler.start()
 
 
-app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
+@app.on_event("shutdown")
+def on_shutdown():
+    audit_writer.flush()
+    usage_counters.flush()
 
-# Protected routers (with auth)
-app.include_router(
-    users.router,
-    prefix="/users",
-    tags=["Users"],
-    dependencies=[Depends(get_current_user)],
-)
-app.include_router(
-    assets.router,
-    prefix="/assets",
-    tags=["Assets"],
-    dependencies=[Depends(get_current_user)],
-)
-app.include_router(
-    metadata.router,
-    prefix="/metadata",
-    tags=["Metadata"],
-    dependencies=[Depends(get_current_user)],
-)
-app.include_router(
-    tags.router, prefix="/tags", tags=["Tags"], dependencies=[Depends(get_current_user)]
-)
-app.include_router(
-    transform.router,
-    prefix="/transform",
-    tags=["Transform"],
-    dependencies=[Depends(get_current_user)],
-)
-app.include_router(
-    search.router,
-    prefix="/search",
-    tags=["Search"],
-    dependencies=[Depends(get_current_user)],
-)
-app.include_router(
-    permissions.router,
-    prefix="/permissions",
-    tags=["Permissions"],
-    dependencies=[Depends(get_current_user)],
-)
-app.include_router(
-    audit.router,
-    prefix="/audit",
-    tags=["Audit"],
-    dependencies=[Depends(get_current_user)],
-)
-app.include_router(
-    lifecycle.router,
-    prefix="/assets",
-    tags=["Lifecycle"],
-    dependencies=[Depends(get_current_user)],
-)
-app.include_router(
-    webhooks.router,
-    prefix="/webhooks",
-    tags=["Webhooks"],
-    dependencies=[Depends(get_current_user)],
-)
-app.include_router(
-    reports.router,
-    prefix="/reports",
-    tags=["Reports"],
-    dependencies=[Depends(get_current_user)],
-)
-app.include_router(misc.router, tags=["Misc"], dependencies=[Depends(get_current_user)])
 
+include_routers(app, settings.ROUTER_GROUPS)
@@ -0,0 +1,37 @@
+# manage_audit_partitions.py
+import argparse
+from datetime import date
+
+from config import settings
+from db import SessionLocal
+from utils.audit import drop_partitions_before, ensure_partitions, month_start
+
+
+def manage_audit_partitions(months_ahead: int, retention_months: int, dry_run: bool):
+    """
+    Create upcoming monthly audit_logs partitions and drop expired ones.
+    Meant to run daily from cron.
+    """
+    db = SessionLocal()
+    try:
+        cutoff = month_start(date.today(), -retention_months)
+        if dry_run:
+            print(f"Would keep {months_ahead} months ahead, drop before {cutoff}")
+            return
+        created = ensure_partitions(db, months_ahead)
+        dropped = drop_partitions_before(db, cutoff)
+        print(f"Created partitions: {created or 'none'}")
+        print(f"Dropped partitions: {dropped or 'none'}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain audit log partitions")
+    parser.add_argument("--months-ahead", type=int, default=3)
+    parser.add_argument(
+        "--retention-months", type=int, default=settings.AUDIT_RETENTION_MONTHS
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    manage_audit_partitions(args.months_ahead, args.retention_months, args.dry_run)
@@ -0,0 +1,110 @@
+# migrate.py
+import argparse
+
+from db import (
+    DEFAULT_SHARD,
+    GLOBAL_TABLES,
+    Base,
+    SessionLocal,
+    shard_router,
+)
+from utils.audit import ensure_partitions
+from utils.user_directory import backfill_user_directory
+from utils.migrations import (
+    apply_migration,
+    estimate_migration,
+    pending_migrations,
+    schema_drift,
+)
+
+
+def shard_tables(shard: str):
+    """
+    Tables kept on a shard: everything on the default shard, only the
+    per-tenant tables elsewhere.
+    """
+    tables = Base.metadata.sorted_tables
+    if shard == DEFAULT_SHARD:
+        return tables
+    return [t for t in tables if t.name not in GLOBAL_TABLES]
+
+
+def print_estimate(shard_engine, migration):
+    with shard_engine.connect() as conn:
+        estimates = estimate_migration(conn, migration)
+    print(f"{migration.id}: {migration.description}")
+    if not estimates:
+        print("  nothing to do (schema already matches)")
+    for e in estimates:
+        seconds = "unknown" if e["seconds"] is None else f"~{e['seconds']:.0f}s"
+        print(f"  {e['operation']}")
+        print(f"    {e['method']} on ~{e['rows']} rows, {seconds}. {e['note']}")
+        for statement in e["sql"]:
+            print(f"    {statement}")
+
+
+def migrate_shard(shard: str, dry_run: bool, online: bool):
+    shard_engine = shard_router.engine_for_shard(shard)
+    tables = shard_tables(shard)
+    if not dry_run:
+        # New tables are built complete from models.py; existing tables are
+        # only changed by migrations
+        Base.metadata.create_all(bind=shard_engine, tables=tables)
+    with shard_engine.connect() as conn:
+        pending = pending_migrations(conn)
+    for migration in pending:
+        if dry_run:
+            print_estimate(shard_engine, migration)
+            continue
+        print(f"Applying {migration.id}: {migration.description}")
+        with shard_engine.connect() as conn:
+            apply_migration(conn, migration, online=online)
+    if dry_run:
+        return
+    with shard_engine.connect() as conn:
+        drift = schema_drift(conn, tables)
+    if drift:
+        print("Declared in models.py but missing from the database (add a migration):")
+        for item in drift:
+            print(f"  {item}")
+
+
+def migrate(months_ahead: int, dry_run: bool, online: bool):
+    """
+    Create missing tables and apply pending migrations from
+    utils/migrations.py on every shard, then create upcoming audit log
+    partitions. Run once per deploy, before starting the API workers.
+    """
+    import models  # noqa: F401  registers all tables on Base.metadata
+
+    for shard in shard_router.shard_names():
+        print(f"== shard {shard}")
+        migrate_shard(shard, dry_run, online)
+    if dry_run:
+        return
+
+    print(f"Login directory: checked {backfill_user_directory()} users")
+    db = SessionLocal()
+    try:
+        created = ensure_partitions(db, months_ahead)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Schema up to date. Created partitions: {created or 'none'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or migrate the schema")
+    parser.add_argument("--months-ahead", type=int, default=3)
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print pending operations, their SQL and estimated cost",
+    )
+    parser.add_argument(
+        "--allow-locking",
+        action="store_true",
+        help="Let MySQL use locking DDL (maintenance windows only)",
+    )
+    args = parser.parse_args()
+    migrate(args.months_ahead, args.dry_run, online=not args.allow_locking)
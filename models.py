@@ -1,14 +1,20 @@
 # models.py
 from sqlalchemy import (
     Column,
+    Computed,
     String,
     Integer,
     Boolean,
     DateTime,
     JSON,
     Text,
+    Index,
+    UniqueConstraint,
+    DDL,
+    event,
 )
-from sqlalchemy.dialects.mysql import CHAR
+from sqlalchemy.dialects.mysql import CHAR, BIGINT, SMALLINT
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from uuid import uuid4
 from db import Base
@@ -38,10 +44,149 @@ class Asset(Base):
     url = Column(Text, nullable=False)
     mimetype = Column(String(128), nullable=False)
     size = Column(Integer, nullable=False)
-    metainfo = Column(JSON, default={})
+    # Deferred: loaded on first access, or with undefer(Asset.metainfo) where
+    # a query needs it. Listings read the generated columns below instead.
+    metainfo = deferred(Column(JSON, default={}))
     version = Column(Integer, default=1)
+    # Lifecycle: active, archived, deleted (soft-deleted, purged later) or
+    # purging (claimed by the purger)
+    state = Column(
+        String(16), nullable=False, default="active", server_default="active"
+    )
+    archived_at = Column(DateTime)
+    deleted_at = Column(DateTime)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    # Virtual generated columns over frequently filtered metainfo keys (see
+    # METAINFO_COLUMNS). MySQL computes them on read and stores only their
+    # index entries; values that are missing or of the wrong type are NULL.
+    meta_title = deferred(
+        Column(
+            String(512),
+            Computed(
+                "json_value(metainfo, '$.title' returning char(512))",
+                persisted=False,
+            ),
+        ),
+        group="meta",
+    )
+    meta_schema = deferred(
+        Column(
+            String(64),
+            Computed(
+                "json_value(metainfo, '$.schema' returning char(64))",
+                persisted=False,
+            ),
+        ),
+        group="meta",
+    )
+    meta_width = deferred(
+        Column(
+            Integer,
+            Computed(
+                "json_value(metainfo, '$.technical.width' returning unsigned)",
+                persisted=False,
+            ),
+        ),
+        group="meta",
+    )
+    meta_height = deferred(
+        Column(
+            Integer,
+            Computed(
+                "json_value(metainfo, '$.technical.height' returning unsigned)",
+                persisted=False,
+            ),
+        ),
+        group="meta",
+    )
+
+    # MySQL has no partial indexes; leading with state keeps active-asset scans
+    # off archived/deleted rows, and (state, deleted_at) drives the purger.
+    __table_args__ = (
+        Index("ix_assets_tenant_state_created", "tenant_id", "state", "created_at"),
+        Index("ix_assets_state_deleted", "state", "deleted_at"),
+        Index("ix_assets_tenant_schema", "tenant_id", "meta_schema"),
+        Index("ix_assets_tenant_title", "tenant_id", "meta_title"),
+        Index("ix_assets_tenant_dimensions", "tenant_id", "meta_width", "meta_height"),
+    )
+
+
+# metainfo paths backed by a generated column on Asset
+METAINFO_COLUMNS = {
+    "title": "meta_title",
+    "schema": "meta_schema",
+    "technical.width": "meta_width",
+    "technical.height": "meta_height",
+}
+
+
+ASSET_ACTIVE = "active"
+ASSET_ARCHIVED = "archived"
+ASSET_DELETED = "deleted"
+# Claimed by the purger; no longer restorable and treated like deleted
+ASSET_PURGING = "purging"
+ASSET_GONE = (ASSET_DELETED, ASSET_PURGING)
+
+
+class AssetVersion(Base):
+    __tablename__ = "asset_versions"
+    id = Column(CHAR(36), primary_key=True, default=generate_uuid)
+    asset_id = Column(CHAR(36), nullable=False)
+    tenant_id = Column(String(64), nullable=False)
+    version = Column(Integer, nullable=False)
+    blob_key = Column(String(255), nullable=False)  # immutable per version
+    filename = Column(String(255), nullable=False)
+    mimetype = Column(String(128), nullable=False)
+    size = Column(Integer, nullable=False)
+    content_hash = Column(CHAR(64))  # sha256 hex
+    created_by = Column(CHAR(36))
+    created_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("asset_id", "version", name="uq_asset_versions_asset_version"),
+        # Finds earlier uploads of identical content within a tenant
+        Index("ix_asset_versions_tenant_hash", "tenant_id", "content_hash"),
+    )
+
+
+class AssetPermission(Base):
+    """
+    One ACL entry: a user or group (a role carried in the token) granted a level
+    on an asset. Assets without entries are open to their whole tenant.
+    """
+
+    __tablename__ = "asset_permissions"
+    asset_id = Column(CHAR(36), primary_key=True)
+    subject_type = Column(String(8), primary_key=True)  # user or group
+    subject = Column(String(128), primary_key=True)
+    tenant_id = Column(String(64), nullable=False)
+    level = Column(String(8), nullable=False)  # read, write or admin
+
+    __table_args__ = (
+        Index("ix_asset_permissions_subject", "tenant_id", "subject_type", "subject"),
+    )
+
+
+class AssetFingerprint(Base):
+    __tablename__ = "asset_fingerprints"
+    asset_id = Column(CHAR(36), primary_key=True)
+    tenant_id = Column(String(64), nullable=False)
+    phash = Column(BIGINT(unsigned=True), nullable=False)
+    dhash = Column(BIGINT(unsigned=True), nullable=False)
+    # 16-bit bands of phash for multi-index near-duplicate lookup
+    band0 = Column(SMALLINT(unsigned=True), nullable=False)
+    band1 = Column(SMALLINT(unsigned=True), nullable=False)
+    band2 = Column(SMALLINT(unsigned=True), nullable=False)
+    band3 = Column(SMALLINT(unsigned=True), nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_asset_fingerprints_band0", "tenant_id", "band0"),
+        Index("ix_asset_fingerprints_band1", "tenant_id", "band1"),
+        Index("ix_asset_fingerprints_band2", "tenant_id", "band2"),
+        Index("ix_asset_fingerprints_band3", "tenant_id", "band3"),
+    )
 
 
 class Tag(Base):
@@ -50,6 +195,116 @@ class Tag(Base):
     tenant_id = Column(String(64), index=True, nullable=False)
     name = Column(String(64), nullable=False)
     description = Column(String(255))
+    # Materialized number of assets carrying this tag, kept in step by utils/tags.py
+    usage_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # Also serves prefix lookups: name LIKE 'abc%' within a tenant
+        UniqueConstraint("tenant_id", "name", name="uq_tags_tenant_name"),
+        Index("ix_tags_tenant_usage", "tenant_id", "usage_count"),
+    )
+
+
+class AssetTag(Base):
+    __tablename__ = "asset_tags"
+    asset_id = Column(CHAR(36), primary_key=True)
+    tag_id = Column(CHAR(36), primary_key=True)
+    tenant_id = Column(String(64), nullable=False)
+
+    __table_args__ = (
+        Index("ix_asset_tags_tag_asset", "tag_id", "asset_id"),
+        Index("ix_asset_tags_tenant_tag", "tenant_id", "tag_id"),
+    )
+
+
+class MetadataSchema(Base):
+    __tablename__ = "metadata_schemas"
+    id = Column(CHAR(36), primary_key=True, default=generate_uuid)
+    tenant_id = Column(String(64), nullable=False)
+    name = Column(String(64), nullable=False)
+    description = Column(String(255))
+    fields = Column(JSON, default={})
+    allow_extra = Column(Boolean, default=True)
+    version = Column(Integer, default=1, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "name", name="uq_metadata_schemas_tenant_name"),
+    )
+
+
+class BulkJob(Base):
+    __tablename__ = "bulk_jobs"
+    id = Column(CHAR(36), primary_key=True, default=generate_uuid)
+    tenant_id = Column(String(64), index=True, nullable=False)
+    kind = Column(String(32), nullable=False)
+    status = Column(String(16), nullable=False, default="pending")
+    total = Column(Integer, default=0)
+    processed = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    error = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class AuditLog(Base):
+    __tablename__ = "audit_logs"
+    # The partition key must be part of every unique key, hence (id, created_at).
+    id = Column(CHAR(36), primary_key=True, default=generate_uuid)
+    created_at = Column(DateTime, primary_key=True, nullable=False)
+    tenant_id = Column(String(64), nullable=False)
+    user_id = Column(CHAR(36))
+    asset_id = Column(CHAR(36))
+    action = Column(String(64), nullable=False)
+    details = Column(JSON)
+    ip_address = Column(String(45))
+
+    __table_args__ = (
+        Index("ix_audit_logs_tenant_created", "tenant_id", "created_at"),
+        Index("ix_audit_logs_tenant_user", "tenant_id", "user_id", "created_at"),
+        Index("ix_audit_logs_tenant_asset", "tenant_id", "asset_id", "created_at"),
+        Index("ix_audit_logs_tenant_action", "tenant_id", "action", "created_at"),
+    )
+
+
+# Monthly RANGE partitions are added ahead of time by utils/audit.py; this
+# catch-all partition only holds rows until the first maintenance run.
+event.listen(
+    AuditLog.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE audit_logs PARTITION BY RANGE (TO_DAYS(created_at)) "
+        "(PARTITION p_future VALUES LESS THAN MAXVALUE)"
+    ).execute_if(dialect="mysql"),
+)
+
+
+class AssetUsageRollup(Base):
+    __tablename__ = "asset_usage_rollups"
+    tenant_id = Column(String(64), primary_key=True)
+    granularity = Column(String(8), primary_key=True)  # hour, day or month
+    bucket = Column(DateTime, primary_key=True)  # start of the period (UTC)
+    asset_id = Column(CHAR(36), primary_key=True)
+    downloads = Column(Integer, nullable=False, default=0)
+    views = Column(Integer, nullable=False, default=0)
+    bandwidth = Column(BIGINT, nullable=False, default=0)
+    last_accessed = Column(DateTime)
+
+    __table_args__ = (
+        Index(
+            "ix_asset_usage_rollups_asset", "tenant_id", "asset_id", "bucket"
+        ),
+    )
+
+
+class ApiUsageRollup(Base):
+    __tablename__ = "api_usage_rollups"
+    tenant_id = Column(String(64), primary_key=True)
+    granularity = Column(String(8), primary_key=True)  # hour, day or month
+    bucket = Column(DateTime, primary_key=True)  # start of the period (UTC)
+    endpoint = Column(String(255), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    last_accessed = Column(DateTime)
 
 
 class Webhook(Base):
@@ -61,5 +316,45 @@ class Webhook(Base):
     secret = Column(String(128))
     is_active = Column(Boolean, default=True)
     description = Column(String(255))
-    headers = Column(JSON, default={})
+    # Only needed when a delivery is sent; see trigger_webhooks
+    headers = deferred(Column(JSON, default={}))
+
+
+
+class SchemaMigration(Base):
+    """
+    Migrations from utils/migrations.py that have been applied to this database.
+    """
+
+    __tablename__ = "schema_migrations"
+    id = Column(String(64), primary_key=True)
+    applied_at = Column(DateTime, nullable=False)
+
+
+class TenantShard(Base):
+    """
+    Tenant directory: the shard holding a tenant's rows (see db.py). Tenants
+    without a row live on the default shard.
+    """
+
+    __tablename__ = "tenant_shards"
+    tenant_id = Column(String(64), primary_key=True)
+    shard = Column(String(64), nullable=False)
+    state = Column(
+        String(16), nullable=False, default="active", server_default="active"
+    )
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class UserEmail(Base):
+    """
+    Login directory: the tenant and user an email address belongs to. Kept
+    on the default database next to tenant_shards, so login is one primary
+    key lookup and emails stay unique across shards (see
+    utils/user_directory.py).
+    """
 
+    __tablename__ = "user_emails"
+    email = Column(String(255), primary_key=True)
+    tenant_id = Column(String(64), nullable=False)
+    user_id = Column(CHAR(36), nullable=False)
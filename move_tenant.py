@@ -0,0 +1,24 @@
+# move_tenant.py
+import argparse
+
+from utils.tenant_move import move_tenant
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move a tenant to another shard")
+    parser.add_argument("tenant", help="Tenant ID")
+    parser.add_argument("shard", help="Target shard name (see DB_SHARDS)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--pause", type=float, default=0.05, help="Seconds between copy batches"
+    )
+    parser.add_argument(
+        "--keep-source", action="store_true", help="Leave the rows on the old shard"
+    )
+    args = parser.parse_args()
+    move_tenant(
+        args.tenant,
+        args.shard,
+        batch_size=args.batch_size,
+        pause=args.pause,
+        keep_source=args.keep_source,
+    )
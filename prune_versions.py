@@ -0,0 +1,25 @@
+# prune_versions.py
+import argparse
+
+from config import settings
+from db import shard_router, shard_session
+from utils.versions import prune_versions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prune old asset versions")
+    parser.add_argument(
+        "--keep",
+        type=int,
+        default=settings.ASSET_VERSIONS_KEEP,
+        help="Newest versions to keep per asset",
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    pruned = 0
+    for shard in shard_router.shard_names():
+        db = shard_session(shard)
+        try:
+            pruned += prune_versions(db, keep=args.keep, batch_size=args.batch_size)
+        finally:
+            db.close()
+    print(f"Pruned {pruned} versions.")
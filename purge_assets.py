@@ -0,0 +1,37 @@
+# purge_assets.py
+import argparse
+
+from config import settings
+from db import shard_router, shard_session
+from utils.lifecycle import purge_expired_assets
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Hard-delete expired soft-deleted assets"
+    )
+    parser.add_argument(
+        "--older-than-days", type=int, default=settings.ASSET_PURGE_AFTER_DAYS
+    )
+    parser.add_argument("--batch-size", type=int, default=settings.PURGE_BATCH_SIZE)
+    parser.add_argument(
+        "--duty-cycle",
+        type=float,
+        default=settings.PURGE_DUTY_CYCLE,
+        help="Fraction of time spent working (0-1]",
+    )
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+    purged = 0
+    for shard in shard_router.shard_names():
+        db = shard_session(shard)
+        try:
+            purged += purge_expired_assets(
+                db,
+                older_than_days=args.older_than_days,
+                batch_size=args.batch_size,
+                duty_cycle=args.duty_cycle,
+                max_batches=args.max_batches,
+            )
+        finally:
+            db.close()
+    print(f"Purged {purged} assets.")
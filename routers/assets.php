@@ -1,200 +0,0 @@
-# router/assets.py
-from fastapi import (
-    APIRouter,
-    File,
-    UploadFile,
-    Form,
-    Query,
-    Path,
-    status,
-)
-from pydantic import BaseModel, constr, HttpUrl
-from typing import List, Optional, Dict, Any
-from uuid import UUID
-
-router = APIRouter()
-
-# --- Request/Response Models ---
-
-
-class AssetMetadata(BaseModel):
-    title: constr(min_length=1, max_length=256)
-    description: Optional[constr(max_length=1024)] = None
-    tags: Optional[List[str]] = []
-    custom: Optional[Dict[str, Any]] = None
-
-
-class AssetResponse(BaseModel):
-    id: UUID
-    filename: str
-    url: HttpUrl
-    metadata: AssetMetadata
-    created_at: str
-    updated_at: str
-    size: int
-    mimetype: str
-    version: int
-
-
-class AssetListResponse(BaseModel):
-    items: List[AssetResponse]
-    total: int
-    page: int
-    size: int
-
-
-class VersionResponse(BaseModel):
-    version: int
-    created_at: str
-    url: HttpUrl
-
-
-class VersionListResponse(BaseModel):
-    versions: List[VersionResponse]
-
-
-# --- Endpoints ---
-
-
-@router.post("/", response_model=AssetResponse, status_code=status.HTTP_201_CREATED)
-async def upload_asset(
-    file: UploadFile = File(..., description="Asset file to upload"),
-    title: str = Form(..., min_length=1, max_length=256),
-    description: Optional[str] = Form(None, max_length=1024),
-    tags: Optional[str] = Form(None, description="Comma-separated tags"),
-    custom: Optional[str] = Form(None, description="Custom metadata as JSON string"),
-):
-    """
-    Upload a new asset (file + metadata).
-    """
-    # TODO: Parse tags and custom, save file, store metadata, return AssetResponse
-    pass
-
-
-@router.post(
-    "/bulk", response_model=List[AssetResponse], status_code=status.HTTP_201_CREATED
-)
-async def bulk_upload(
-    files: List[UploadFile] = File(..., description="Multiple asset files"),
-    titles: List[str] = Form(..., description="Titles for each file"),
-    descriptions: Optional[List[str]] = Form(
-        None, description="Descriptions for each file"
-    ),
-    tags: Optional[List[str]] = Form(
-        None, description="Comma-separated tags for each file"
-    ),
-    customs: Optional[List[str]] = Form(
-        None, description="Custom metadata as JSON string for each file"
-    ),
-):
-    """
-    Bulk upload multiple assets.
-    """
-    # TODO: Validate lists, parse tags/customs, save files, return list of AssetResponse
-    pass
-
-
-@router.post(
-    "/{id}/versions",
-    response_model=VersionResponse,
-    status_code=status.HTTP_201_CREATED,
-)
-async def upload_asset_version(
-    id: UUID = Path(..., description="Asset ID"),
-    file: UploadFile = File(..., description="New version file"),
-):
-    """
-    Upload a new version of an asset.
-    """
-    # TODO: Save new version, update metadata, return VersionResponse
-    pass
-
-
-@router.get("/", response_model=AssetListResponse)
-async def list_assets(
-    q: Optional[str] = Query(None, description="Search query"),
-    tags: Optional[List[str]] = Query(None, description="Filter by tags"),
-    mimetype: Optional[str] = Query(None, description="Filter by MIME type"),
-    page: int = Query(1, ge=1, description="Page number"),
-    size: int = Query(20, ge=1, le=100, description="Page size"),
-):
-    """
-    List/search assets with filters and pagination.
-    """
-    # TODO: Implement search, filtering, pagination, return AssetListResponse
-    pass
-
-
-@router.get("/{id}", response_model=AssetResponse)
-async def get_asset(id: UUID = Path(..., description="Asset ID")):
-    """
-    Get asset details and metadata.
-    """
-    # TODO: Fetch asset by ID, return AssetResponse
-    pass
-
-
-@router.get("/{id}/download")
-async def download_asset(id: UUID = Path(..., description="Asset ID")):
-    """
-    Download the original asset file.
-    """
-    # TODO: Return file response
-    pass
-
-
-@router.get("/{id}/preview")
-async def preview_asset(
-    id: UUID = Path(..., description="Asset ID"),
-    width: Optional[int] = Query(None, gt=0, description="Preview width"),
-    height: Optional[int] = Query(None, gt=0, description="Preview height"),
-):
-    """
-    Get a preview or thumbnail of the asset.
-    """
-    # TODO: Generate/return preview image
-    pass
-
-
-@router.get("/{id}/versions", response_model=VersionListResponse)
-async def list_versions(id: UUID = Path(..., description="Asset ID")):
-    """
-    List all versions of an asset.
-    """
-    # TODO: Return list of versions
-    pass
-
-
-@router.get("/{id}/versions/{versionId}")
-async def download_version(
-    id: UUID = Path(..., description="Asset ID"),
-    versionId: int = Path(..., ge=1, description="Version number"),
-):
-    """
-    Download a specific version of the asset.
-    """
-    # TODO: Return file response for specific version
-    pass
-
-
-@router.get("/{id}/transform")
-async def transform_asset(
-    id: UUID = Path(..., description="Asset ID"),
-    width: Optional[int] = Query(None, gt=0, le=4096, description="Resize width (px)"),
-    height: Optional[int] = Query(
-        None, gt=0, le=4096, description="Resize height (px)"
-    ),
-    crop: Optional[bool] = Query(False, description="Crop to fit dimensions"),
-    format: Optional[str] = Query(
-        None, regex="^(jpg|jpeg|png|webp|gif|tiff|bmp)$", description="Output format"
-    ),
-    quality: Optional[int] = Query(
-        80, ge=1, le=100, description="Output quality (1-100)"
-    ),
-):
-    """
-    Retrieve a transformed version (resize, crop, format conversion) of the asset.
-    """
-    # TODO: Validate parameters, perform transformation, return file/URL
-    pass
-
@@ -0,0 +1,552 @@
+# routers/assets.py
+import os
+
+from fastapi import (
+    APIRouter,
+    File,
+    UploadFile,
+    Form,
+    Query,
+    Path,
+    status,
+    Depends,
+    HTTPException,
+    Request,
+)
+from fastapi.responses import RedirectResponse, Response
+from pydantic import BaseModel, constr, HttpUrl
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from typing import List, Optional, Dict, Any
+from uuid import UUID
+
+from db import get_db
+from models import (
+    Asset,
+    AssetFingerprint,
+    AssetTag,
+    AssetVersion,
+    Tag,
+    ASSET_ACTIVE,
+    ASSET_ARCHIVED,
+    ASSET_GONE,
+)
+from dependencies.auth import get_current_user, TokenPayload
+from dependencies.acl import get_permissions, require_asset_level
+from dependencies.rate_limit import enforce_quota
+from storage.factory import get_storage, asset_key
+from utils.phash_index import find_near_duplicates, MAX_DISTANCE
+from utils.projection import columns, metainfo_json, metainfo_value
+from utils.acl import PermissionSet
+from utils.es_indexing import search_asset_page
+from utils.metadata_extract import enqueue_extraction
+from utils.quotas import bandwidth_quota, storage_quota
+from utils.row_cache import asset_cache, get_cached
+from utils.serialization import FastJSONResponse
+from utils.usage import usage_counters
+from utils.versions import create_version, version_etag, VersionConflict
+
+router = APIRouter()
+
+# --- Request/Response Models ---
+
+
+class AssetMetadata(BaseModel):
+    title: constr(min_length=1, max_length=256)
+    description: Optional[constr(max_length=1024)] = None
+    tags: Optional[List[str]] = []
+    custom: Optional[Dict[str, Any]] = None
+
+
+class AssetResponse(BaseModel):
+    id: UUID
+    filename: str
+    url: HttpUrl
+    metadata: AssetMetadata
+    created_at: str
+    updated_at: str
+    size: int
+    mimetype: str
+    version: int
+
+
+class AssetListResponse(BaseModel):
+    items: List[AssetResponse]
+    total: int
+    page: int
+    size: int
+
+
+# Plain columns of AssetResponse, in the order list_assets selects them
+# States list_assets leaves out, as a filter for the search index
+UNLISTED_STATES = [ASSET_ARCHIVED, *ASSET_GONE]
+
+ASSET_LIST_FIELDS = (
+    "id",
+    "filename",
+    "url",
+    "mimetype",
+    "size",
+    "version",
+    "created_at",
+    "updated_at",
+)
+
+
+class VersionResponse(BaseModel):
+    version: int
+    created_at: str
+    url: str
+    size: Optional[int] = None
+    filename: Optional[str] = None
+    content_hash: Optional[str] = None
+
+
+class VersionListResponse(BaseModel):
+    versions: List[VersionResponse]
+
+
+class DuplicateItem(BaseModel):
+    asset_id: UUID
+    filename: str
+    distance: int
+
+
+class DuplicateListResponse(BaseModel):
+    items: List[DuplicateItem]
+    total: int
+
+
+def get_tenant_asset(
+    db: Session, id: UUID, tenant_id: str, cached: bool = False
+) -> Asset:
+    """
+    A tenant's live asset; 404 if missing or deleted.
+    :param cached: Return a read-only copy from the row cache (see
+                   utils/row_cache.py) instead of a session-bound row.
+    """
+    if cached:
+        asset = get_cached(asset_cache, db, id, tenant_id)
+        if asset is not None and asset.state in ASSET_GONE:
+            asset = None
+    else:
+        asset = (
+            db.query(Asset)
+            .filter(
+                Asset.id == str(id),
+                Asset.tenant_id == tenant_id,
+                Asset.state.notin_(ASSET_GONE),
+            )
+            .first()
+        )
+    if not asset:
+        raise HTTPException(404, "Asset not found")
+    return asset
+
+
+def version_response(version: AssetVersion) -> VersionResponse:
+    return VersionResponse(
+        version=version.version,
+        created_at=version.created_at.isoformat() if version.created_at else "",
+        url=get_storage().get_url(version.blob_key),
+        size=version.size,
+        filename=version.filename,
+        content_hash=version.content_hash,
+    )
+
+
+# --- Endpoints ---
+
+
+@router.post("/", response_model=AssetResponse, status_code=status.HTTP_201_CREATED)
+async def upload_asset(
+    file: UploadFile = File(..., description="Asset file to upload"),
+    title: str = Form(..., min_length=1, max_length=256),
+    description: Optional[str] = Form(None, max_length=1024),
+    tags: Optional[str] = Form(None, description="Comma-separated tags"),
+    custom: Optional[str] = Form(None, description="Custom metadata as JSON string"),
+):
+    """
+    Upload a new asset (file + metadata).
+    """
+    # TODO: Parse tags and custom, save file, store metadata, return AssetResponse
+    pass
+
+
+@router.post(
+    "/bulk", response_model=List[AssetResponse], status_code=status.HTTP_201_CREATED
+)
+async def bulk_upload(
+    files: List[UploadFile] = File(..., description="Multiple asset files"),
+    titles: List[str] = Form(..., description="Titles for each file"),
+    descriptions: Optional[List[str]] = Form(
+        None, description="Descriptions for each file"
+    ),
+    tags: Optional[List[str]] = Form(
+        None, description="Comma-separated tags for each file"
+    ),
+    customs: Optional[List[str]] = Form(
+        None, description="Custom metadata as JSON string for each file"
+    ),
+):
+    """
+    Bulk upload multiple assets.
+    """
+    # TODO: Validate lists, parse tags/customs, save files, return list of AssetResponse
+    pass
+
+
+@router.post(
+    "/{id}/versions",
+    response_model=VersionResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(require_asset_level("write"))],
+)
+def upload_asset_version(
+    request: Request,
+    id: UUID = Path(..., description="Asset ID"),
+    file: UploadFile = File(..., description="New version file"),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
+):
+    """
+    Upload a new version of an asset.
+    The new content gets its own immutable blob key; the asset's version pointer
+    is flipped atomically, so readers never see a half-written blob.
+    """
+    asset = get_tenant_asset(db, id, current_user.tenant_id)
+    if asset.state != ASSET_ACTIVE:
+        raise HTTPException(409, f"Asset is {asset.state}")
+    size = file.file.seek(0, os.SEEK_END)
+    file.file.seek(0)
+    # Soft limit: checked against this worker's cached usage (see QUOTA_CACHE_TTL)
+    enforce_quota(request, db, storage_quota, current_user.tenant_id, extra=size)
+    try:
+        version = create_version(
+            db,
+            asset,
+            file.file,
+            file.filename or asset.filename,
+            file.content_type or asset.mimetype,
+            user_id=current_user.sub,
+        )
+    except VersionConflict as e:
+        raise HTTPException(409, str(e))
+    storage_quota.add(current_user.tenant_id, version.size)
+    enqueue_extraction(current_user.tenant_id, str(id), version.version)
+    return version_response(version)
+
+
+def _search_clauses(
+    tags: Optional[List[str]],
+    schema: Optional[str],
+    min_width: Optional[int],
+    min_height: Optional[int],
+) -> list:
+    """
+    Elasticsearch counterparts of list_assets' SQL filters. Documents without
+    a state field predate soft deletion and count as active.
+    """
+    clauses = [{"bool": {"must_not": {"terms": {"state": UNLISTED_STATES}}}}]
+    if tags:
+        clauses.append({"terms": {"tags": tags}})
+    if schema:
+        clauses.append({"term": {"metainfo.schema": schema}})
+    if min_width:
+        clauses.append({"range": {"metainfo.technical.width": {"gte": min_width}}})
+    if min_height:
+        clauses.append({"range": {"metainfo.technical.height": {"gte": min_height}}})
+    return clauses
+
+
+@router.get("/", response_model=AssetListResponse)
+def list_assets(
+    q: Optional[str] = Query(None, description="Search query"),
+    tags: Optional[List[str]] = Query(None, description="Filter by tags"),
+    mimetype: Optional[str] = Query(None, description="Filter by MIME type"),
+    schema: Optional[str] = Query(None, description="Filter by metadata schema"),
+    min_width: Optional[int] = Query(None, ge=1, description="Minimum width (px)"),
+    min_height: Optional[int] = Query(None, ge=1, description="Minimum height (px)"),
+    page: int = Query(1, ge=1, description="Page number"),
+    size: int = Query(20, ge=1, le=100, description="Page size"),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
+    permissions: PermissionSet = Depends(get_permissions),
+):
+    """
+    List/search active assets the user may read, newest first.
+    Metadata filters and the listed title use the indexed generated columns
+    (see METAINFO_COLUMNS), and only the listed parts of metainfo are
+    extracted, so rows are never read in full. With `q`, Elasticsearch pages
+    and ranks the matches (all filters are applied there too) and only that
+    page's rows are loaded, in relevance order; the total is ES's hit count.
+    """
+    tenant_id = current_user.tenant_id
+    query = db.query(Asset).filter(
+        Asset.tenant_id == tenant_id, Asset.state == ASSET_ACTIVE
+    )
+    ids = None
+    if q:
+        try:
+            ids, total = search_asset_page(
+                tenant_id,
+                q,
+                (page - 1) * size,
+                size,
+                filters={"mimetype": mimetype} if mimetype else None,
+                acl_filter=permissions.search_filter("read"),
+                clauses=_search_clauses(tags, schema, min_width, min_height),
+            )
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        if not ids:
+            return FastJSONResponse(
+                {"items": [], "total": total, "page": page, "size": size}
+            )
+        # The SQL filters below still apply, dropping documents that lag
+        # behind the database (e.g. an asset deleted a moment ago)
+        query = query.filter(Asset.id.in_(ids))
+    if tags:
+        tagged = (
+            select(AssetTag.asset_id)
+            .join(Tag, Tag.id == AssetTag.tag_id)
+            .where(Tag.tenant_id == tenant_id, Tag.name.in_(tags))
+        )
+        query = query.filter(Asset.id.in_(tagged))
+    if mimetype:
+        query = query.filter(Asset.mimetype == mimetype)
+    if schema:
+        query = query.filter(metainfo_value("schema") == schema)
+    if min_width:
+        query = query.filter(metainfo_value("technical.width") >= min_width)
+    if min_height:
+        query = query.filter(metainfo_value("technical.height") >= min_height)
+    acl_filter = permissions.sql_filter("read")
+    if acl_filter is not None:
+        query = query.filter(acl_filter)
+
+    query = query.with_entities(
+        *columns(Asset, ASSET_LIST_FIELDS),
+        metainfo_value("title"),
+        metainfo_value("description"),
+        metainfo_json("tags"),
+        metainfo_json("custom"),
+    )
+    if ids is not None:
+        rank = {asset_id: i for i, asset_id in enumerate(ids)}
+        rows = sorted(query.all(), key=lambda row: rank[row[0]])
+    else:
+        total = query.with_entities(func.count(Asset.id)).scalar()
+        rows = (
+            query.order_by(Asset.created_at.desc(), Asset.id.desc())
+            .offset((page - 1) * size)
+            .limit(size)
+            .all()
+        )
+    items = []
+    for row in rows:
+        item = dict(zip(ASSET_LIST_FIELDS, row))
+        title, description, tag_names, custom = row[len(ASSET_LIST_FIELDS) :]
+        for key in ("created_at", "updated_at"):
+            item[key] = item[key].isoformat() if item[key] else ""
+        item["version"] = item["version"] or 1
+        item["metadata"] = {
+            # Titles are optional in stored metainfo but required in responses
+            "title": title or item["filename"],
+            "description": description,
+            "tags": tag_names or [],
+            "custom": custom,
+        }
+        items.append(item)
+    return FastJSONResponse(
+        {"items": items, "total": total, "page": page, "size": size}
+    )
+
+
+@router.get("/{id}", response_model=AssetResponse)
+async def get_asset(id: UUID = Path(..., description="Asset ID")):
+    """
+    Get asset details and metadata.
+    """
+    # TODO: Fetch asset by ID, return AssetResponse
+    pass
+
+
+@router.get("/{id}/download")
+async def download_asset(id: UUID = Path(..., description="Asset ID")):
+    """
+    Download the original asset file.
+    """
+    # TODO: Return file response
+    pass
+
+
+@router.get("/{id}/preview")
+async def preview_asset(
+    id: UUID = Path(..., description="Asset ID"),
+    width: Optional[int] = Query(None, gt=0, description="Preview width"),
+    height: Optional[int] = Query(None, gt=0, description="Preview height"),
+):
+    """
+    Get a preview or thumbnail of the asset.
+    """
+    # TODO: Generate/return preview image
+    pass
+
+
+@router.get(
+    "/{id}/versions",
+    response_model=VersionListResponse,
+    dependencies=[Depends(require_asset_level("read"))],
+)
+def list_versions(
+    id: UUID = Path(..., description="Asset ID"),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
+):
+    """
+    List all versions of an asset, newest first.
+    """
+    asset = get_tenant_asset(db, id, current_user.tenant_id, cached=True)
+    versions = (
+        db.query(AssetVersion)
+        .filter(AssetVersion.asset_id == asset.id)
+        .order_by(AssetVersion.version.desc())
+        .all()
+    )
+    if not versions:
+        # Never replaced: the original blob is the only version
+        versions = [
+            AssetVersion(
+                version=asset.version or 1,
+                blob_key=asset_key(asset.id, asset.version),
+                filename=asset.filename,
+                size=asset.size,
+                created_at=asset.created_at,
+            )
+        ]
+    return VersionListResponse(versions=[version_response(v) for v in versions])
+
+
+@router.get(
+    "/{id}/versions/{versionId}",
+    dependencies=[Depends(require_asset_level("read"))],
+)
+def download_version(
+    request: Request,
+    id: UUID = Path(..., description="Asset ID"),
+    versionId: int = Path(..., ge=1, description="Version number"),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
+):
+    """
+    Download a specific version of the asset.
+    Version blobs never change, so responses are cacheable forever.
+    """
+    asset = get_tenant_asset(db, id, current_user.tenant_id, cached=True)
+    if versionId > (asset.version or 1):
+        raise HTTPException(404, "Version not found")
+    row = (
+        db.query(AssetVersion.blob_key, AssetVersion.size)
+        .filter(AssetVersion.asset_id == asset.id, AssetVersion.version == versionId)
+        .first()
+    )
+    if row is not None:
+        blob_key, size = row
+    else:
+        if versionId != (asset.version or 1):
+            raise HTTPException(404, "Version not found")
+        # Assets created before versioning have no history row for their blob
+        blob_key, size = asset_key(asset.id, versionId), asset.size
+    headers = {
+        "ETag": version_etag(asset.id, versionId),
+        "Cache-Control": "private, max-age=31536000, immutable",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    enforce_quota(request, db, bandwidth_quota, current_user.tenant_id)
+    url = get_storage().get_url(blob_key)
+    # Counted when the redirect is served: the blob itself is sent by storage
+    usage_counters.record_asset(current_user.tenant_id, str(id), "download", size or 0)
+    bandwidth_quota.add(current_user.tenant_id, size or 0)
+    return RedirectResponse(url, headers=headers)
+
+
+@router.get("/{id}/transform")
+async def transform_asset(
+    id: UUID = Path(..., description="Asset ID"),
+    width: Optional[int] = Query(None, gt=0, le=4096, description="Resize width (px)"),
+    height: Optional[int] = Query(
+        None, gt=0, le=4096, description="Resize height (px)"
+    ),
+    crop: Optional[bool] = Query(False, description="Crop to fit dimensions"),
+    format: Optional[str] = Query(
+        None, regex="^(jpg|jpeg|png|webp|gif|tiff|bmp)$", description="Output format"
+    ),
+    quality: Optional[int] = Query(
+        80, ge=1, le=100, description="Output quality (1-100)"
+    ),
+):
+    """
+    Retrieve a transformed version (resize, crop, format conversion) of the asset.
+    """
+    # TODO: Validate parameters, perform transformation, return file/URL
+    pass
+
+
+@router.get(
+    "/{id}/duplicates",
+    response_model=DuplicateListResponse,
+    dependencies=[Depends(require_asset_level("read"))],
+)
+def list_duplicates(
+    id: UUID = Path(..., description="Asset ID"),
+    max_distance: int = Query(
+        6, ge=0, le=MAX_DISTANCE, description="Max Hamming distance of pHash"
+    ),
+    limit: int = Query(50, ge=1, le=200, description="Max results"),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
+    permissions: PermissionSet = Depends(get_permissions),
+):
+    """
+    Find near-duplicates of an asset within the current tenant by perceptual hash.
+    Only matches the user may read are returned.
+    """
+    fingerprint = (
+        db.query(AssetFingerprint)
+        .filter(
+            AssetFingerprint.asset_id == str(id),
+            AssetFingerprint.tenant_id == current_user.tenant_id,
+        )
+        .first()
+    )
+    if not fingerprint:
+        raise HTTPException(404, "Asset has no fingerprint")
+    matches = find_near_duplicates(
+        db,
+        current_user.tenant_id,
+        fingerprint.phash,
+        max_distance=max_distance,
+        exclude_id=str(id),
+        limit=None,
+    )
+    # Limited after the ACL filter, so unreadable matches do not use up the page
+    readable = set(permissions.allowed(db, [m[0] for m in matches], "read"))
+    matches = [m for m in matches if m[0] in readable][:limit]
+    filenames = {}
+    if matches:
+        filenames = dict(
+            db.query(Asset.id, Asset.filename)
+            .filter(
+                Asset.id.in_([m[0] for m in matches]),
+                Asset.state.notin_(ASSET_GONE),
+            )
+            .all()
+        )
+    items = [
+        DuplicateItem(asset_id=asset_id, filename=filenames[asset_id], distance=d)
+        for asset_id, d in matches
+        if asset_id in filenames
+    ]
+    return DuplicateListResponse(items=items, total=len(items))
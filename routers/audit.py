@@ -1,8 +1,16 @@
-from fastapi import APIRouter, Query
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Query, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 
+from db import get_db
+from models import AuditLog
+from dependencies.auth import get_current_user, TokenPayload
+from utils.audit_export import decode_cursor, stream_audit_export
+
 router = APIRouter()
 
 # --- Response Models ---
@@ -25,11 +33,64 @@ class AuditLogListResponse(BaseModel):
     size: int
 
 
+# --- Helper Functions ---
+
+
+def parse_date(value: Optional[str], name: str) -> Optional[datetime]:
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(422, f"{name} must be YYYY-MM-DD")
+
+
+def filter_audit_logs(
+    query,
+    tenant_id: str,
+    user_id: Optional[UUID] = None,
+    asset_id: Optional[UUID] = None,
+    action: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+):
+    """
+    Apply the tenant and endpoint filters to an audit log query.
+    Date bounds are on created_at, so MySQL prunes partitions outside the range.
+    """
+    query = query.filter(AuditLog.tenant_id == tenant_id)
+    if user_id:
+        query = query.filter(AuditLog.user_id == str(user_id))
+    if asset_id:
+        query = query.filter(AuditLog.asset_id == str(asset_id))
+    if action:
+        query = query.filter(AuditLog.action == action)
+    start = parse_date(from_date, "from_date")
+    end = parse_date(to_date, "to_date")
+    if start:
+        query = query.filter(AuditLog.created_at >= start)
+    if end:
+        query = query.filter(AuditLog.created_at < end + timedelta(days=1))
+    return query
+
+
+def audit_entry(log: AuditLog) -> AuditLogEntry:
+    return AuditLogEntry(
+        id=log.id,
+        timestamp=log.created_at.isoformat(),
+        user_id=log.user_id,
+        action=log.action,
+        asset_id=log.asset_id,
+        details=log.details,
+        ip_address=log.ip_address,
+    )
+
+
 # --- Endpoints ---
 
 
 @router.get("/logs", response_model=AuditLogListResponse)
-async def get_audit_logs(
+def get_audit_logs(
     user_id: Optional[UUID] = Query(None, description="Filter by user ID"),
     asset_id: Optional[UUID] = Query(None, description="Filter by asset ID"),
     action: Optional[str] = Query(None, description="Filter by action type"),
@@ -37,6 +98,8 @@ async def get_audit_logs(
     to_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(20, ge=1, le=100, description="Page size"),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
 ):
     """
     Retrieve audit logs for asset actions, with optional filters and pagination.
@@ -48,6 +111,67 @@ async def get_audit_logs(
     - `page`: Page number for pagination.
     - `size`: Number of logs per page (max 100).
     """
-    # TODO: Query and return audit logs with filters and pagination
-    pass
+    query = filter_audit_logs(
+        db.query(AuditLog),
+        current_user.tenant_id,
+        user_id,
+        asset_id,
+        action,
+        from_date,
+        to_date,
+    )
+    total = query.count()
+    logs = (
+        query.order_by(AuditLog.created_at.desc())
+        .offset((page - 1) * size)
+        .limit(size)
+        .all()
+    )
+    return AuditLogListResponse(
+        items=[audit_entry(log) for log in logs], total=total, page=page, size=size
+    )
+
+
+@router.get("/export")
+def export_audit_logs(
+    format: str = Query("ndjson", regex="^(ndjson|csv)$", description="Output format"),
+    compress: bool = Query(False, description="Gzip the output"),
+    cursor: Optional[str] = Query(None, description="Resume after this cursor"),
+    user_id: Optional[UUID] = Query(None, description="Filter by user ID"),
+    asset_id: Optional[UUID] = Query(None, description="Filter by asset ID"),
+    action: Optional[str] = Query(None, description="Filter by action type"),
+    from_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    to_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    current_user: TokenPayload = Depends(get_current_user),
+):
+    """
+    Export all matching audit logs of the current tenant in one streamed response.
+    - `format`: `ndjson` (one entry per line) or `csv` (with header row).
+    - `compress`: Gzip the stream on the fly.
+    - `cursor`: Resume an interrupted export after the row whose `cursor`
+      field this is; pass the one of the last complete row received. Resumed
+      CSV exports omit the header row.
+    Entries are ordered by timestamp, then id.
+    """
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(422, "Invalid cursor")
+    # Validate dates before the response starts streaming.
+    parse_date(from_date, "from_date")
+    parse_date(to_date, "to_date")
+    tenant_id = current_user.tenant_id
+
+    def build_query(db):
+        return filter_audit_logs(
+            db.query(AuditLog), tenant_id, user_id, asset_id, action, from_date, to_date
+        )
 
+    filename = f"audit-{tenant_id}.{format}" + (".gz" if compress else "")
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    return StreamingResponse(
+        stream_audit_export(build_query, format, compress, cursor),
+        media_type="application/gzip" if compress else media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -11,6 +11,7 @@ from . import (
     webhooks,
     reports,
     misc,
+    ops,
     transform,
 )
 
@@ -1,7 +1,18 @@
-from fastapi import APIRouter, Path, status
+from datetime import datetime
+from fastapi import APIRouter, Path, status, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
 from uuid import UUID
 
+from config import settings
+from db import get_db
+from models import Asset, ASSET_ACTIVE, ASSET_ARCHIVED, ASSET_DELETED, ASSET_GONE
+from dependencies.auth import get_current_user, TokenPayload
+from dependencies.acl import require_asset_level
+from storage.factory import get_storage
+from utils.es_indexing import update_asset_index
+from utils.versions import blob_key
+
 router = APIRouter()
 
 # --- Response Models ---
@@ -9,45 +20,119 @@ router = APIRouter()
 class MessageResponse(BaseModel):
     message: str
 
+# --- Helper Functions ---
+
+def _get_asset(db: Session, tenant_id: str, asset_id: UUID) -> Asset:
+    asset = (
+        db.query(Asset)
+        .filter(Asset.id == str(asset_id), Asset.tenant_id == tenant_id)
+        .first()
+    )
+    if not asset:
+        raise HTTPException(404, "Asset not found")
+    return asset
+
+def _set_state(db: Session, asset: Asset, state: str, **timestamps):
+    asset.state = state
+    for field, value in timestamps.items():
+        setattr(asset, field, value)
+    db.commit()
+    update_asset_index(asset.id, {"state": state})
+
 # --- Endpoints ---
 
-@router.delete("/{id}", response_model=MessageResponse)
-async def delete_asset(
-    id: UUID = Path(..., description="Asset ID")
+@router.delete(
+    "/{id}",
+    response_model=MessageResponse,
+    dependencies=[Depends(require_asset_level("admin"))],
+)
+def delete_asset(
+    id: UUID = Path(..., description="Asset ID"),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
 ):
     """
-    Delete (soft or hard) an asset.
+    Soft-delete an asset. It can be restored until the background purger
+    hard-deletes it after ASSET_PURGE_AFTER_DAYS.
     """
-    # TODO: Implement soft/hard delete logic, return confirmation message
-    pass
+    asset = _get_asset(db, current_user.tenant_id, id)
+    if asset.state in ASSET_GONE:
+        raise HTTPException(409, "Asset is already deleted")
+    _set_state(db, asset, ASSET_DELETED, deleted_at=datetime.utcnow())
+    return MessageResponse(
+        message=f"Asset deleted; it will be purged in "
+        f"{settings.ASSET_PURGE_AFTER_DAYS} days"
+    )
 
-@router.post("/{id}/restore", response_model=MessageResponse)
-async def restore_asset(
-    id: UUID = Path(..., description="Asset ID")
+@router.post(
+    "/{id}/restore",
+    response_model=MessageResponse,
+    dependencies=[Depends(require_asset_level("admin"))],
+)
+def restore_asset(
+    id: UUID = Path(..., description="Asset ID"),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
 ):
     """
-    Restore a deleted asset.
+    Restore a deleted asset to the state it had before (active or archived).
     """
-    # TODO: Restore asset, return confirmation message
-    pass
+    asset = _get_asset(db, current_user.tenant_id, id)
+    if asset.state != ASSET_DELETED:
+        raise HTTPException(409, "Asset is not deleted")
+    previous = ASSET_ARCHIVED if asset.archived_at else ASSET_ACTIVE
+    # Conditional on the state, so a restore cannot undo the purger's claim
+    restored = (
+        db.query(Asset)
+        .filter(Asset.id == asset.id, Asset.state == ASSET_DELETED)
+        .execution_options(row_cache_keys=[asset.id])
+        .update(
+            {Asset.state: previous, Asset.deleted_at: None},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    if restored != 1:
+        raise HTTPException(409, "Asset is being purged")
+    update_asset_index(asset.id, {"state": previous})
+    return MessageResponse(message="Asset restored successfully")
 
-@router.post("/{id}/archive", response_model=MessageResponse)
-async def archive_asset(
-    id: UUID = Path(..., description="Asset ID")
+@router.post(
+    "/{id}/archive",
+    response_model=MessageResponse,
+    dependencies=[Depends(require_asset_level("write"))],
+)
+def archive_asset(
+    id: UUID = Path(..., description="Asset ID"),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
 ):
     """
-    Archive an asset.
+    Archive an asset and move its blob to the archive storage tier.
     """
-    # TODO: Archive asset, return confirmation message
-    pass
+    asset = _get_asset(db, current_user.tenant_id, id)
+    if asset.state != ASSET_ACTIVE:
+        raise HTTPException(409, f"Asset is {asset.state}")
+    get_storage().set_tier(blob_key(db, asset.id, asset.version), "archive")
+    _set_state(db, asset, ASSET_ARCHIVED, archived_at=datetime.utcnow())
+    return MessageResponse(message="Asset archived successfully")
 
-@router.post("/{id}/unarchive", response_model=MessageResponse)
-async def unarchive_asset(
-    id: UUID = Path(..., description="Asset ID")
+@router.post(
+    "/{id}/unarchive",
+    response_model=MessageResponse,
+    dependencies=[Depends(require_asset_level("write"))],
+)
+def unarchive_asset(
+    id: UUID = Path(..., description="Asset ID"),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
 ):
     """
-    Unarchive an asset.
+    Unarchive an asset and move its blob back to the standard storage tier.
     """
-    # TODO: Unarchive asset, return confirmation message
-    pass
-
+    asset = _get_asset(db, current_user.tenant_id, id)
+    if asset.state != ASSET_ARCHIVED:
+        raise HTTPException(409, f"Asset is {asset.state}")
+    get_storage().set_tier(blob_key(db, asset.id, asset.version), "standard")
+    _set_state(db, asset, ASSET_ACTIVE, archived_at=None)
+    return MessageResponse(message="Asset unarchived successfully")
@@ -1,172 +1,445 @@
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Any
 from uuid import UUID
-from fastapi import APIRouter, Path, status, Body, Query, HTTPException, Depends
-from pydantic import BaseModel, HttpUrl, constr, Field
+import json
+from fastapi import (
+    APIRouter,
+    Path,
+    status,
+    Body,
+    HTTPException,
+    Depends,
+    BackgroundTasks,
+)
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, constr, Field, root_validator
 from sqlalchemy.orm import Session
 
-from db import get_db
-from models import Webhook
+from db import get_db, tenant_session
+from models import Asset, MetadataSchema, BulkJob, ASSET_GONE
 from dependencies.auth import get_current_user, TokenPayload
+from dependencies.acl import get_permissions, require_asset_level
+from dependencies.authz import require_permission
+from utils.acl import PermissionSet
+from utils.bulk_update import apply_bulk_patch, create_bulk_job, run_bulk_job
+from utils.es_indexing import update_asset_index, search_asset_ids
+from utils.metadata_schema import (
+    FIELD_TYPES,
+    SchemaDefinitionError,
+    compile_schema,
+    get_compiled_schema,
+    invalidate_schema,
+    validate_many,
+)
+from utils.projection import with_metainfo
 
 router = APIRouter()
 
 # --- Pydantic Models ---
 
 
-class WebhookBase(BaseModel):
-    url: HttpUrl
-    events: List[constr(min_length=1)]
-    secret: Optional[constr(min_length=8, max_length=128)] = None
-    is_active: bool = True
+class FieldSpec(BaseModel):
+    type: constr(regex="^(" + "|".join(FIELD_TYPES) + ")$") = "string"
+    required: bool = False
+    max_length: Optional[int] = Field(None, ge=0)
+    min: Optional[float] = None
+    max: Optional[float] = None
+    pattern: Optional[str] = None
+    choices: Optional[List[Any]] = None
+
+
+class SchemaBase(BaseModel):
     description: Optional[str] = None
-    headers: Optional[Dict[str, str]] = Field(
-        default_factory=dict, description="Custom HTTP headers"
+    fields: Dict[constr(min_length=1, max_length=64), FieldSpec] = Field(
+        default_factory=dict, description="Field name to field definition"
     )
+    allow_extra: bool = Field(True, description="Allow fields not in the schema")
 
 
-class WebhookCreate(WebhookBase):
-    pass
+class SchemaCreate(SchemaBase):
+    name: constr(min_length=1, max_length=64, regex="^[A-Za-z0-9_.-]+$")
 
 
-class WebhookUpdate(BaseModel):
-    url: Optional[HttpUrl] = None
-    events: Optional[List[constr(min_length=1)]] = None
-    secret: Optional[constr(min_length=8, max_length=128)] = None
-    is_active: Optional[bool] = None
+class SchemaUpdate(BaseModel):
     description: Optional[str] = None
-    headers: Optional[Dict[str, str]] = None
+    fields: Optional[Dict[constr(min_length=1, max_length=64), FieldSpec]] = None
+    allow_extra: Optional[bool] = None
 
 
-class WebhookResponse(WebhookBase):
+class SchemaResponse(SchemaCreate):
     id: UUID
+    version: int
+
+
+class SchemaListResponse(BaseModel):
+    items: List[SchemaResponse]
+    total: int
+
+
+class AssetMetadataUpdate(BaseModel):
+    schema_name: constr(min_length=1, max_length=64) = Field(..., alias="schema")
+    values: Dict[str, Any]
+    replace: bool = Field(False, description="Replace instead of merging values")
+
+
+class BulkValidateRequest(BaseModel):
+    schema_name: constr(min_length=1, max_length=64) = Field(..., alias="schema")
+    items: List[Dict[str, Any]] = Field(..., description="Metadata documents")
+    partial: bool = Field(False, description="Validate as patches")
+
+
+class ValidationFailure(BaseModel):
+    index: int
+    errors: Dict[str, str]
 
 
-class WebhookListResponse(BaseModel):
-    items: List[WebhookResponse]
+class BulkValidateResponse(BaseModel):
+    valid: int
+    invalid: int
+    failures: List[ValidationFailure]
+
+
+class BulkPatch(BaseModel):
+    set: Dict[str, Any] = Field(default_factory=dict, description="Fields to set")
+    unset: List[str] = Field(default_factory=list, description="Fields to remove")
+    tags_set: Optional[List[constr(min_length=1, max_length=64)]] = None
+    tags_add: List[constr(min_length=1, max_length=64)] = Field(default_factory=list)
+    tags_remove: List[constr(min_length=1, max_length=64)] = Field(
+        default_factory=list
+    )
+    schema_name: Optional[constr(min_length=1, max_length=64)] = Field(
+        None, alias="schema", description="Validate custom metadata against this"
+    )
+
+
+class BulkUpdateRequest(BaseModel):
+    asset_ids: Optional[List[UUID]] = Field(None, description="Explicit selection")
+    query: Optional[str] = Field(None, description="Search query selection")
+    patch: BulkPatch
+
+    @root_validator(skip_on_failure=True)
+    def check_selection(cls, values):
+        if (values.get("asset_ids") is None) == (values.get("query") is None):
+            raise ValueError("Provide exactly one of asset_ids or query")
+        return values
+
+
+class BulkJobResponse(BaseModel):
+    id: UUID
+    status: str
     total: int
+    processed: int
+    failed: int
+    error: Optional[str] = None
 
 
 class MessageResponse(BaseModel):
     message: str
 
 
+# Selections up to this size are applied inline with streamed progress.
+BULK_SYNC_LIMIT = 5000
+
+
+# --- Helper Functions ---
+
+
+def _schema_response(schema: MetadataSchema) -> SchemaResponse:
+    return SchemaResponse(
+        id=schema.id,
+        name=schema.name,
+        description=schema.description,
+        fields=schema.fields or {},
+        allow_extra=schema.allow_extra,
+        version=schema.version,
+    )
+
+
+def _get_schema(db: Session, tenant_id: str, name: str) -> MetadataSchema:
+    schema = (
+        db.query(MetadataSchema)
+        .filter(MetadataSchema.tenant_id == tenant_id, MetadataSchema.name == name)
+        .first()
+    )
+    if not schema:
+        raise HTTPException(404, "Metadata schema not found")
+    return schema
+
+
+def _dump_fields(fields: Dict[str, FieldSpec]) -> dict:
+    return {name: spec.dict(exclude_none=True) for name, spec in fields.items()}
+
+
 # --- Endpoints ---
 
 
-@router.get("/", response_model=WebhookListResponse)
-def list_webhooks(
-    is_active: Optional[bool] = Query(None, description="Filter by active status"),
-    event: Optional[str] = Query(None, description="Filter by event type"),
+@router.get("/schemas", response_model=SchemaListResponse)
+def list_schemas(
     db: Session = Depends(get_db),
     current_user: TokenPayload = Depends(get_current_user),
 ):
     """
-    List all webhooks for the current tenant.
-    Supports filtering by active status and event type.
-    """
-    query = db.query(Webhook).filter(Webhook.tenant_id == current_user.tenant_id)
-    if is_active is not None:
-        query = query.filter(Webhook.is_active == is_active)
-    if event:
-        query = query.filter(Webhook.events.contains([event]))
-    items = query.all()
-    return WebhookListResponse(
-        items=[
-            WebhookResponse(
-                id=w.id,
-                url=w.url,
-                events=w.events,
-                secret=w.secret,
-                is_active=w.is_active,
-                description=w.description,
-                headers=w.headers,
-            )
-            for w in items
-        ],
-        total=len(items),
+    List all metadata schemas for the current tenant.
+    """
+    items = (
+        db.query(MetadataSchema)
+        .filter(MetadataSchema.tenant_id == current_user.tenant_id)
+        .order_by(MetadataSchema.name)
+        .all()
     )
+    return SchemaListResponse(
+        items=[_schema_response(s) for s in items], total=len(items)
+    )
+
+
+@router.get("/schemas/{name}", response_model=SchemaResponse)
+def get_schema(
+    name: str = Path(..., description="Schema name"),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
+):
+    """
+    Get a metadata schema by name.
+    """
+    return _schema_response(_get_schema(db, current_user.tenant_id, name))
 
 
-@router.post("/", response_model=WebhookResponse, status_code=status.HTTP_201_CREATED)
-def create_webhook(
-    webhook: WebhookCreate,
+@router.post(
+    "/schemas",
+    response_model=SchemaResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(require_permission("schemas:write"))],
+)
+def create_schema(
+    schema: SchemaCreate,
     db: Session = Depends(get_db),
     current_user: TokenPayload = Depends(get_current_user),
 ):
     """
-    Create a new webhook for the current tenant.
-    - `webhook`: Webhook details to create.
+    Create a metadata schema for the current tenant.
+    - `schema`: Schema name, field definitions and whether extra fields are allowed.
     """
-    db_webhook = Webhook(
-        url=webhook.url,
-        events=webhook.events,
-        secret=webhook.secret,
-        is_active=webhook.is_active,
-        description=webhook.description,
-        headers=webhook.headers,
+    existing = (
+        db.query(MetadataSchema.id)
+        .filter(
+            MetadataSchema.tenant_id == current_user.tenant_id,
+            MetadataSchema.name == schema.name,
+        )
+        .first()
+    )
+    if existing:
+        raise HTTPException(400, "Metadata schema already exists.")
+    db_schema = MetadataSchema(
         tenant_id=current_user.tenant_id,
+        name=schema.name,
+        description=schema.description,
+        fields=_dump_fields(schema.fields),
+        allow_extra=schema.allow_extra,
+        version=1,
     )
-    db.add(db_webhook)
+    try:
+        compile_schema(db_schema)
+    except (SchemaDefinitionError, ValueError) as e:
+        raise HTTPException(422, str(e))
+    db.add(db_schema)
     db.commit()
-    db.refresh(db_webhook)
-    return WebhookResponse(
-        id=db_webhook.id,
-        url=db_webhook.url,
-        events=db_webhook.events,
-        secret=db_webhook.secret,
-        is_active=db_webhook.is_active,
-        description=db_webhook.description,
-        headers=db_webhook.headers,
-    )
+    db.refresh(db_schema)
+    return _schema_response(db_schema)
+
+
+@router.patch(
+    "/schemas/{name}",
+    response_model=SchemaResponse,
+    dependencies=[Depends(require_permission("schemas:write"))],
+)
+def update_schema(
+    name: str = Path(..., description="Schema name"),
+    schema: SchemaUpdate = Body(...),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
+):
+    """
+    Update a metadata schema. Bumps its version, which invalidates compiled
+    validators in every worker.
+    """
+    db_schema = _get_schema(db, current_user.tenant_id, name)
+    if schema.description is not None:
+        db_schema.description = schema.description
+    if schema.fields is not None:
+        db_schema.fields = _dump_fields(schema.fields)
+    if schema.allow_extra is not None:
+        db_schema.allow_extra = schema.allow_extra
+    try:
+        compile_schema(db_schema)
+    except (SchemaDefinitionError, ValueError) as e:
+        db.rollback()
+        raise HTTPException(422, str(e))
+    db_schema.version = MetadataSchema.version + 1
+    db.commit()
+    db.refresh(db_schema)
+    invalidate_schema(current_user.tenant_id, name)
+    return _schema_response(db_schema)
 
 
-@router.patch("/{id}", response_model=WebhookResponse)
-def update_webhook(
-    id: UUID = Path(..., description="Webhook ID"),
-    webhook: WebhookUpdate = Body(...),
+@router.delete(
+    "/schemas/{name}",
+    response_model=MessageResponse,
+    dependencies=[Depends(require_permission("schemas:write"))],
+)
+def delete_schema(
+    name: str = Path(..., description="Schema name"),
     db: Session = Depends(get_db),
     current_user: TokenPayload = Depends(get_current_user),
 ):
-    db_webhook = (
-        db.query(Webhook)
-        .filter(Webhook.id == str(id), Webhook.tenant_id == current_user.tenant_id)
+    """
+    Delete a metadata schema by name.
+    """
+    db_schema = _get_schema(db, current_user.tenant_id, name)
+    db.delete(db_schema)
+    db.commit()
+    invalidate_schema(current_user.tenant_id, name)
+    return MessageResponse(message="Metadata schema deleted successfully")
+
+
+@router.patch(
+    "/assets/{id}",
+    response_model=Dict[str, Any],
+    dependencies=[Depends(require_asset_level("write"))],
+)
+def update_asset_metadata(
+    id: UUID = Path(..., description="Asset ID"),
+    update: AssetMetadataUpdate = Body(...),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
+):
+    """
+    Validate metadata against a schema and write it to the asset.
+    Values are stored under `metainfo.custom` and merged with existing values
+    unless `replace` is set.
+    """
+    compiled = get_compiled_schema(db, current_user.tenant_id, update.schema_name)
+    if compiled is None:
+        raise HTTPException(404, "Metadata schema not found")
+    asset = (
+        db.query(Asset)
+        .options(with_metainfo())
+        .filter(
+            Asset.id == str(id),
+            Asset.tenant_id == current_user.tenant_id,
+            Asset.state.notin_(ASSET_GONE),
+        )
         .first()
     )
-    if not db_webhook:
-        raise HTTPException(404, "Webhook not found")
-    for field, value in webhook.dict(exclude_unset=True).items():
-        setattr(db_webhook, field, value)
+    if not asset:
+        raise HTTPException(404, "Asset not found")
+    metainfo = dict(asset.metainfo or {})
+    custom = {} if update.replace else dict(metainfo.get("custom") or {})
+    custom.update(update.values)
+    errors = compiled.validate(custom)
+    if errors:
+        raise HTTPException(422, {"errors": errors})
+    metainfo["custom"] = custom
+    metainfo["schema"] = compiled.name
+    asset.metainfo = metainfo
     db.commit()
-    db.refresh(db_webhook)
-    return WebhookResponse(
-        id=db_webhook.id,
-        url=db_webhook.url,
-        events=db_webhook.events,
-        secret=db_webhook.secret,
-        is_active=db_webhook.is_active,
-        description=db_webhook.description,
-        headers=db_webhook.headers,
+    update_asset_index(str(id), {"metainfo": metainfo})
+    return metainfo
+
+
+@router.post("/validate", response_model=BulkValidateResponse)
+def bulk_validate(
+    request: BulkValidateRequest = Body(...),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
+):
+    """
+    Validate many metadata documents against one schema without writing them.
+    The schema is compiled once (and cached) for the whole batch.
+    """
+    compiled = get_compiled_schema(db, current_user.tenant_id, request.schema_name)
+    if compiled is None:
+        raise HTTPException(404, "Metadata schema not found")
+    failures = validate_many(compiled, request.items, partial=request.partial)
+    return BulkValidateResponse(
+        valid=len(request.items) - len(failures),
+        invalid=len(failures),
+        failures=[ValidationFailure(index=i, errors=e) for i, e in failures],
     )
 
 
-@router.delete("/{id}", response_model=MessageResponse)
-def delete_webhook(
-    id: UUID = Path(..., description="Webhook ID"),
+@router.post("/bulk")
+def bulk_update(
+    background_tasks: BackgroundTasks,
+    request: BulkUpdateRequest = Body(...),
     db: Session = Depends(get_db),
     current_user: TokenPayload = Depends(get_current_user),
+    permissions: PermissionSet = Depends(get_permissions),
 ):
     """
-    Delete a webhook by ID for the current tenant.
-    - `id`: Webhook ID to delete.
+    Apply a metadata/tag patch to a selection of assets (ID list or search query).
+    Small selections are applied inline and stream NDJSON progress lines, one
+    per chunk. Larger selections return 202 with a job ID to poll.
+    Assets the user may not write are left out of the selection.
     """
-    db_webhook = (
-        db.query(Webhook)
-        .filter(Webhook.id == str(id), Webhook.tenant_id == current_user.tenant_id)
+    tenant_id = current_user.tenant_id
+    # Checked up front: once the inline stream has started, the status is sent
+    schema_name = request.patch.schema_name
+    if schema_name and get_compiled_schema(db, tenant_id, schema_name) is None:
+        raise HTTPException(404, "Metadata schema not found")
+    if request.asset_ids is not None:
+        asset_ids = list(dict.fromkeys(str(i) for i in request.asset_ids))
+        asset_ids = permissions.allowed(db, asset_ids, "write")
+    else:
+        asset_ids = list(
+            search_asset_ids(
+                tenant_id, request.query, acl_filter=permissions.search_filter("write")
+            )
+        )
+    patch = request.patch.dict(by_alias=False)
+    patch["schema"] = patch.pop("schema_name")
+
+    if len(asset_ids) > BULK_SYNC_LIMIT:
+        job = create_bulk_job(db, tenant_id, "metadata_patch", len(asset_ids))
+        background_tasks.add_task(run_bulk_job, job.id, tenant_id, asset_ids, patch)
+        return Response(
+            content=json.dumps({"job_id": job.id, "total": len(asset_ids)}),
+            status_code=status.HTTP_202_ACCEPTED,
+            media_type="application/json",
+        )
+
+    def progress():
+        session = tenant_session(tenant_id)
+        try:
+            for step in apply_bulk_patch(session, tenant_id, asset_ids, patch):
+                yield json.dumps(step) + "\n"
+        except ValueError as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            session.close()
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
+
+
+@router.get("/bulk/{job_id}", response_model=BulkJobResponse)
+def get_bulk_job(
+    job_id: UUID = Path(..., description="Bulk job ID"),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
+):
+    """
+    Get the status and progress of a bulk update job.
+    """
+    job = (
+        db.query(BulkJob)
+        .filter(BulkJob.id == str(job_id), BulkJob.tenant_id == current_user.tenant_id)
         .first()
     )
-    if not db_webhook:
-        raise HTTPException(404, "Webhook not found")
-    db.delete(db_webhook)
-    db.commit()
-    return MessageResponse(message="Webhook deleted successfully")
-
+    if not job:
+        raise HTTPException(404, "Bulk job not found")
+    return BulkJobResponse(
+        id=job.id,
+        status=job.status,
+        total=job.total,
+        processed=job.processed,
+        failed=job.failed,
+        error=job.error,
+    )
@@ -2,6 +2,8 @@ from fastapi import APIRouter
 from pydantic import BaseModel, Field
 from typing import Dict, Any
 
+from utils.health import health_checker
+
 router = APIRouter()
 
 # --- Response Models ---
@@ -18,17 +20,13 @@ class ConfigResponse(BaseModel):
 # --- Endpoints ---
 
 @router.get("/health", response_model=HealthResponse)
-async def health_check():
+def health_check():
     """
     Health check endpoint.
+    Per-dependency status, latency and database pool usage (cached briefly).
     """
-    # Example health checks for services (DB, storage, etc.)
-    # In real code, replace with actual checks.
-    details = {
-        "database": "ok",
-        "storage": "ok"
-    }
-    return HealthResponse(status="ok", details=details)
+    result = health_checker.check()
+    return HealthResponse(status=result["status"], details=result["details"])
 
 @router.get("/config", response_model=ConfigResponse)
 async def get_config():
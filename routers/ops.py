@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse, JSONResponse
+
+from dependencies.authz import require_ops_access
+from utils.audit import audit_writer
+from utils.health import health_checker
+from utils.metrics import registry
+from utils.row_cache import row_caches
+from utils.transform_admission import transform_admission
+from utils.transform_scheduler import transform_scheduler
+
+router = APIRouter()
+
+registry.register_gauge(
+    "dam_transform_memory_bytes",
+    "Transform admission budget and bytes in use.",
+    lambda: {
+        "budget": transform_admission.budget_bytes,
+        "in_use": transform_admission.in_use,
+        "active_jobs": transform_admission.active,
+    },
+)
+registry.register_gauge(
+    "dam_transform_queue_depth",
+    "Transform jobs queued per priority class, and running.",
+    transform_scheduler.depths,
+)
+registry.register_gauge(
+    "dam_row_cache_events",
+    "Row cache lookups by table and outcome (hits, misses, stale snapshots"
+    " rejected by version/updated_at, invalidations).",
+    lambda: {
+        f"{cache.table}:{stat}": n
+        for cache in row_caches.values()
+        for stat, n in cache.stats.items()
+    },
+)
+registry.register_gauge(
+    "dam_row_cache_hit_ratio",
+    "Share of row cache lookups served without a database query.",
+    lambda: {cache.table: cache.hit_ratio() for cache in row_caches.values()},
+)
+registry.register_gauge(
+    "dam_audit_pending_entries",
+    "Audit entries waiting to be flushed.",
+    lambda: {"pending": len(audit_writer.pending)},
+)
+registry.register_gauge(
+    "dam_audit_dropped_entries",
+    "Audit entries dropped because the buffer was full, since process start.",
+    lambda: {"dropped": audit_writer.dropped},
+)
+
+# --- Endpoints ---
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_ops_access)],
+)
+async def metrics():
+    """
+    Request metrics for this worker in Prometheus text format.
+    Needs OPS_METRICS_TOKEN or the "ops:read" permission.
+    """
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@router.get("/health/live")
+async def liveness():
+    """
+    Liveness probe: the process is up and serving requests.
+    Does not touch any dependency, so a slow database never restarts workers.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/health/ready")
+def readiness():
+    """
+    Readiness probe: every MySQL shard (pool checkout + SELECT 1),
+    Elasticsearch and the storage backend all respond. Returns 503 when any
+    of them is down so the load balancer stops routing here. Results are
+    cached for a short interval.
+    """
+    result = health_checker.check()
+    return JSONResponse(result, status_code=200 if result["status"] == "ok" else 503)
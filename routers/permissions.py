@@ -1,7 +1,14 @@
 from typing import List
 from uuid import UUID
-from fastapi import APIRouter, Path, Body
+from fastapi import APIRouter, Path, Body, Depends, HTTPException
 from pydantic import BaseModel, constr, Field
+from sqlalchemy.orm import Session
+
+from db import get_db
+from models import Asset
+from dependencies.auth import get_current_user, TokenPayload
+from dependencies.acl import require_asset_level
+from utils.acl import get_asset_acl, set_asset_acl
 
 router = APIRouter()
 
@@ -40,14 +47,49 @@ async def list_permissions():
     pass
 
 
-@router.patch("/assets/{id}/permissions", response_model=MessageResponse)
-async def update_asset_permissions(
+@router.get(
+    "/assets/{id}/permissions",
+    response_model=PermissionsResponse,
+    dependencies=[Depends(require_asset_level("read"))],
+)
+def get_asset_permissions(
+    id: UUID = Path(..., description="Asset ID"),
+    db: Session = Depends(get_db),
+):
+    """
+    List the ACL entries of an asset. An empty list means the asset is open to
+    everyone in the tenant.
+    """
+    return PermissionsResponse(
+        permissions=[
+            Permission(subject=p.subject, level=p.level, type=p.subject_type)
+            for p in get_asset_acl(db, str(id))
+        ]
+    )
+
+
+@router.patch(
+    "/assets/{id}/permissions",
+    response_model=MessageResponse,
+    dependencies=[Depends(require_asset_level("admin"))],
+)
+def update_asset_permissions(
     id: UUID = Path(..., description="Asset ID"),
     update: AssetPermissionsUpdate = Body(...),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
 ):
     """
     Set or update asset-level permissions.
+    Replaces the asset's ACL; groups match the roles in users' tokens.
     """
-    # TODO: Update asset permissions, return confirmation message
-    pass
+    asset = (
+        db.query(Asset)
+        .filter(Asset.id == str(id), Asset.tenant_id == current_user.tenant_id)
+        .first()
+    )
+    if not asset:
+        raise HTTPException(404, "Asset not found")
+    set_asset_acl(db, asset, [p.dict() for p in update.permissions])
+    return MessageResponse(message="Asset permissions updated successfully")
 
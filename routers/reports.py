@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Query
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Query, Depends, HTTPException
 from pydantic import BaseModel, Field
+from sqlalchemy import func
+from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 from uuid import UUID
 
+from db import get_db
+from models import Asset, AssetUsageRollup, ApiUsageRollup, ASSET_GONE
+from dependencies.auth import get_current_user, TokenPayload
+
 router = APIRouter()
 
 # --- Response Models ---
@@ -36,30 +43,129 @@ class APIReportResponse(BaseModel):
     stats: List[APIUsageStat]
 
 
+# --- Helper Functions ---
+
+
+def _date_range(query, column, from_date: Optional[str], to_date: Optional[str]):
+    """
+    Restrict a rollup query to buckets within [from_date, to_date] (inclusive days).
+    Older data is compacted into daily/monthly rows, so for those periods the
+    range is effectively rounded to the day/month.
+    """
+    try:
+        if from_date:
+            query = query.filter(column >= datetime.strptime(from_date, "%Y-%m-%d"))
+        if to_date:
+            end = datetime.strptime(to_date, "%Y-%m-%d") + timedelta(days=1)
+            query = query.filter(column < end)
+    except ValueError:
+        raise HTTPException(422, "Dates must be YYYY-MM-DD")
+    return query
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
 # --- Endpoints ---
 
 
 @router.get("/usage", response_model=UsageReportResponse)
-async def get_usage_report(
+def get_usage_report(
     from_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     to_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     asset_id: Optional[UUID] = Query(None, description="Filter by asset ID"),
+    page: int = Query(1, ge=1, description="Page number"),
+    size: int = Query(50, ge=1, le=500, description="Assets per page"),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
 ):
     """
-    Get asset usage statistics.
+    Get asset usage statistics, most accessed assets first, one page at a time.
+    Aggregated from hourly/daily/monthly rollup rows, not raw events. Totals
+    cover every asset in the range, not just the page.
     """
-    # TODO: Aggregate and return usage stats for assets
-    pass
+    R = AssetUsageRollup
+
+    def in_range(query):
+        query = query.filter(R.tenant_id == current_user.tenant_id)
+        if asset_id:
+            query = query.filter(R.asset_id == str(asset_id))
+        return _date_range(query, R.bucket, from_date, to_date)
+
+    downloads, views, bandwidth = (
+        func.sum(R.downloads),
+        func.sum(R.views),
+        func.sum(R.bandwidth),
+    )
+    rows = (
+        in_range(
+            db.query(R.asset_id, downloads, views, bandwidth, func.max(R.last_accessed))
+        )
+        .group_by(R.asset_id)
+        .order_by((downloads + views).desc(), bandwidth.desc(), R.asset_id)
+        .offset((page - 1) * size)
+        .limit(size)
+        .all()
+    )
+    totals = in_range(db.query(downloads, views, bandwidth)).one()
+    filenames = {}
+    if rows:
+        filenames = dict(
+            db.query(Asset.id, Asset.filename)
+            .filter(
+                Asset.tenant_id == current_user.tenant_id,
+                Asset.id.in_([r[0] for r in rows]),
+            )
+            .all()
+        )
+    stats = [
+        AssetUsageStat(
+            asset_id=a,
+            filename=filenames.get(a, ""),
+            downloads=int(d or 0),
+            views=int(v or 0),
+            bandwidth=int(b or 0),
+            last_accessed=_iso(last),
+        )
+        for a, d, v, b, last in rows
+    ]
+    total_assets = (
+        db.query(func.count(Asset.id))
+        .filter(
+            Asset.tenant_id == current_user.tenant_id,
+            Asset.state.notin_(ASSET_GONE),
+        )
+        .scalar()
+    )
+    return UsageReportResponse(
+        total_assets=total_assets or 0,
+        total_downloads=int(totals[0] or 0),
+        total_views=int(totals[1] or 0),
+        total_bandwidth=int(totals[2] or 0),
+        stats=stats,
+    )
 
 
 @router.get("/api", response_model=APIReportResponse)
-async def get_api_report(
+def get_api_report(
     from_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     to_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
 ):
     """
     Get API usage metrics.
+    Aggregated from hourly/daily/monthly rollup rows, not raw events.
     """
-    # TODO: Aggregate and return API usage stats
-    pass
-
+    R = ApiUsageRollup
+    query = db.query(R.endpoint, func.sum(R.count), func.max(R.last_accessed)).filter(
+        R.tenant_id == current_user.tenant_id
+    )
+    query = _date_range(query, R.bucket, from_date, to_date)
+    rows = query.group_by(R.endpoint).order_by(func.sum(R.count).desc()).all()
+    stats = [
+        APIUsageStat(endpoint=e, count=int(c or 0), last_accessed=_iso(last))
+        for e, c, last in rows
+    ]
+    return APIReportResponse(total_requests=sum(s.count for s in stats), stats=stats)
@@ -1,8 +1,18 @@
-from fastapi import APIRouter, Path, status, Body, Query
+from fastapi import APIRouter, Path, status, Body, Query, Depends, HTTPException
 from pydantic import BaseModel, constr, Field
+from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 
+from db import get_db
+from models import Asset, Tag, ASSET_GONE
+from dependencies.auth import get_current_user, TokenPayload
+from dependencies.acl import require_asset_level
+from utils.es_indexing import update_asset_index
+from utils.projection import with_metainfo
+from utils.tag_autocomplete import tag_autocomplete
+from utils.tags import search_tags, sync_asset_tags, top_tags
+
 router = APIRouter()
 
 # --- Request/Response Models ---
@@ -13,6 +23,7 @@ class TagCreate(BaseModel):
 
 class TagResponse(TagCreate):
     id: UUID
+    usage_count: int = 0
 
 class TagListResponse(BaseModel):
     items: List[TagResponse]
@@ -24,38 +35,122 @@ class AssetTagsUpdate(BaseModel):
 class MessageResponse(BaseModel):
     message: str
 
+# --- Helper Functions ---
+
+def _tag_response(tag: Tag) -> TagResponse:
+    return TagResponse(
+        id=tag.id,
+        name=tag.name,
+        description=tag.description,
+        usage_count=tag.usage_count or 0,
+    )
+
 # --- Endpoints ---
 
 @router.get("/", response_model=TagListResponse)
-async def list_tags(
-    q: Optional[str] = Query(None, description="Search tags by name"),
+def list_tags(
+    q: Optional[str] = Query(None, description="Search tags by name prefix"),
     page: int = Query(1, ge=1, description="Page number"),
-    size: int = Query(20, ge=1, le=100, description="Page size")
+    size: int = Query(20, ge=1, le=100, description="Page size"),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
+):
+    """
+    List all tags, with optional prefix search and pagination.
+    Most used tags come first. Served from the in-process autocomplete index;
+    the database is only queried to load a tenant, when it is too large to
+    cache, or when the prefix matches too many tags to rank in memory.
+    """
+    cached = tag_autocomplete.complete(
+        current_user.tenant_id, q or "", (page - 1) * size, size
+    )
+    if cached is not None:
+        rows, total = cached
+        return TagListResponse(
+            items=[
+                TagResponse(id=i, name=n, description=d, usage_count=c)
+                for i, n, d, c in rows
+            ],
+            total=total,
+        )
+    query = search_tags(db, current_user.tenant_id, q)
+    total = query.count()
+    items = query.offset((page - 1) * size).limit(size).all()
+    return TagListResponse(items=[_tag_response(t) for t in items], total=total)
+
+@router.get("/top", response_model=TagListResponse)
+def list_top_tags(
+    limit: int = Query(20, ge=1, le=100, description="Number of tags"),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
 ):
     """
-    List all tags, with optional search and pagination.
+    Most used tags of the current tenant (for facets).
     """
-    # TODO: Return tags, optionally filtered by search query
-    pass
+    items = top_tags(db, current_user.tenant_id, limit)
+    return TagListResponse(items=[_tag_response(t) for t in items], total=len(items))
 
 @router.post("/", response_model=TagResponse, status_code=status.HTTP_201_CREATED)
-async def create_tag(
-    tag: TagCreate
+def create_tag(
+    tag: TagCreate,
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
 ):
     """
     Create a new tag.
     """
-    # TODO: Validate and create tag, return TagResponse
-    pass
+    existing = (
+        db.query(Tag.id)
+        .filter(Tag.tenant_id == current_user.tenant_id, Tag.name == tag.name)
+        .first()
+    )
+    if existing:
+        raise HTTPException(400, "Tag already exists.")
+    db_tag = Tag(
+        tenant_id=current_user.tenant_id,
+        name=tag.name,
+        description=tag.description,
+        usage_count=0,
+    )
+    db.add(db_tag)
+    db.commit()
+    db.refresh(db_tag)
+    tag_autocomplete.tag_created(
+        current_user.tenant_id, db_tag.id, db_tag.name, db_tag.description
+    )
+    return _tag_response(db_tag)
 
-@router.patch("/assets/{id}/tags", response_model=MessageResponse)
-async def update_asset_tags(
+@router.patch(
+    "/assets/{id}/tags",
+    response_model=MessageResponse,
+    dependencies=[Depends(require_asset_level("write"))],
+)
+def update_asset_tags(
     id: UUID = Path(..., description="Asset ID"),
-    update: AssetTagsUpdate = Body(...)
+    update: AssetTagsUpdate = Body(...),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
 ):
     """
     Add or remove tags for an asset (replace with provided list).
     """
-    # TODO: Update asset's tags, return confirmation message
-    pass
-
+    asset = (
+        db.query(Asset)
+        .options(with_metainfo())
+        .filter(
+            Asset.id == str(id),
+            Asset.tenant_id == current_user.tenant_id,
+            Asset.state.notin_(ASSET_GONE),
+        )
+        .first()
+    )
+    if not asset:
+        raise HTTPException(404, "Asset not found")
+    names = list(dict.fromkeys(update.tags))
+    deltas = sync_asset_tags(db, current_user.tenant_id, {asset.id: names})
+    # Denormalized copy for the asset document and search index
+    asset.metainfo = {**(asset.metainfo or {}), "tags": names}
+    db.commit()
+    tag_autocomplete.usage_changed(current_user.tenant_id, deltas)
+    update_asset_index(asset.id, {"tags": names})
+    return MessageResponse(message="Asset tags updated successfully")
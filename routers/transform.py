@@ -0,0 +1,285 @@
+# routers/transform.py
+from uuid import UUID
+import tempfile
+import os
+from fastapi import APIRouter, Path, Query, HTTPException, Response, Depends, Request
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from db import get_db
+from models import ASSET_GONE
+from dependencies.auth import get_current_user, TokenPayload
+from dependencies.acl import require_asset_level
+from dependencies.rate_limit import enforce_quota
+from storage.factory import get_storage
+from utils.image_transform import (
+    transform_image,
+    probe_image,
+    estimate_decode_bytes,
+    ImageTooLargeError,
+)
+from utils.quotas import bandwidth_quota
+from utils.row_cache import asset_cache, get_cached
+from utils.pdf_transform import pdf_to_image, estimate_render_bytes
+from utils.transform_admission import transform_admission, AdmissionRejected
+from utils.transform_scheduler import transform_scheduler, QueueFull, PRIORITIES
+from utils.usage import usage_counters
+from utils.metrics import registry, timed
+from utils.versions import blob_key, version_etag
+from utils.video_transform import video_to_thumbnail
+
+router = APIRouter()
+
+PRIORITY_REGEX = "^(" + "|".join(PRIORITIES) + ")$"
+# Scheduler cost of a video thumbnail (ffmpeg runs out of process)
+VIDEO_COST_MB = 64
+
+
+def get_asset_version(db: Session, asset_id: UUID, tenant_id: str) -> int:
+    """
+    Current version of a tenant's asset; 404 if it does not exist.
+    """
+    asset = get_cached(asset_cache, db, asset_id, tenant_id)
+    if asset is None or asset.state in ASSET_GONE:
+        raise HTTPException(404, "Asset not found")
+    return asset.version or 1
+
+
+def cache_headers(etag: str, version: int, pinned: int) -> dict:
+    """
+    Transform outputs are keyed on the asset version, so a URL pinned to the
+    current version (?v=) can be cached forever; unpinned URLs revalidate.
+    """
+    if pinned == version:
+        return {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable"}
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+async def run_transform(
+    tenant_id: str, priority: str, fn, memory_bytes: int = 0, cost_mb: float = None
+):
+    """
+    Run a transform on the scheduler's worker pool, within the memory budget,
+    and record how long it waited for a worker.
+    :param cost_mb: Fair-share cost; defaults to the memory estimate in MB.
+    """
+
+    def job():
+        with transform_admission.admit(memory_bytes), timed("transform"):
+            return fn()
+
+    if cost_mb is None:
+        cost_mb = memory_bytes / (1024 * 1024)
+    result, waited = await transform_scheduler.run(tenant_id, job, priority, cost_mb)
+    registry.observe_queue_wait(tenant_id, priority, waited)
+    return result
+
+
+def download_asset(db: Session, asset_id: UUID, version: int, dest_path: str) -> None:
+    key = blob_key(db, asset_id, version)
+    try:
+        get_storage().download(key, dest_path)
+    except Exception:
+        raise HTTPException(404, "Asset not found in storage")
+
+
+# The endpoints below are async only to await the scheduler; everything that
+# blocks (DB, quota checks, storage, file probes and reads) runs in the
+# threadpool so it never stalls the event loop.
+
+
+def read_output(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@router.get("/image/{id}", dependencies=[Depends(require_asset_level("read"))])
+async def transform_image_endpoint(
+    request: Request,
+    id: UUID = Path(..., description="Asset ID"),
+    width: int = Query(None, gt=0, le=4096),
+    height: int = Query(None, gt=0, le=4096),
+    crop: bool = Query(False),
+    format: str = Query(None, regex="^(jpg|jpeg|png|webp|gif|tiff|bmp)$"),
+    quality: int = Query(80, ge=1, le=100),
+    v: int = Query(None, ge=1, description="Asset version the URL is pinned to"),
+    priority: str = Query(
+        "interactive", regex=PRIORITY_REGEX, description="Scheduling class"
+    ),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
+):
+    """
+    Transform an image asset by resizing, cropping, and changing format.
+    """
+    version = await run_in_threadpool(
+        get_asset_version, db, id, current_user.tenant_id
+    )
+    etag = version_etag(str(id), version, "image", width, height, crop, format, quality)
+    headers = cache_headers(etag, version, v)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    await run_in_threadpool(
+        enforce_quota, request, db, bandwidth_quota, current_user.tenant_id
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        input_path = os.path.join(tmpdir, "input")
+        output_path = os.path.join(tmpdir, "output")
+        await run_in_threadpool(download_asset, db, id, version, input_path)
+        try:
+            # Crops are in source coordinates, so only plan a draft for resizes.
+            info = await run_in_threadpool(
+                probe_image,
+                input_path,
+                None if crop else width,
+                None if crop else height,
+            )
+        except ImageTooLargeError as e:
+            raise HTTPException(413, str(e))
+        except Exception as e:
+            raise HTTPException(415, f"Unreadable image: {e}")
+        # Decoded source plus the resized output held alongside it.
+        cost = info["decode_bytes"] + estimate_decode_bytes(
+            width or info["decode_width"], height or info["decode_height"], info["mode"]
+        )
+        try:
+            await run_transform(
+                current_user.tenant_id,
+                priority,
+                lambda: transform_image(
+                    input_path, output_path, width, height, crop, format, quality
+                ),
+                memory_bytes=cost,
+            )
+            content = await run_in_threadpool(read_output, output_path)
+            usage_counters.record_asset(
+                current_user.tenant_id, str(id), "view", len(content)
+            )
+            bandwidth_quota.add(current_user.tenant_id, len(content))
+            return Response(
+                content=content,
+                media_type=f"image/" + (format or "jpeg"),
+                headers=headers,
+            )
+        except AdmissionRejected as e:
+            raise HTTPException(503, str(e), headers={"Retry-After": "1"})
+        except QueueFull as e:
+            raise HTTPException(429, str(e), headers={"Retry-After": "1"})
+        except ImageTooLargeError as e:
+            raise HTTPException(413, str(e))
+        except Exception as e:
+            raise HTTPException(500, f"Image transformation failed: {e}")
+
+
+@router.get("/pdf/{id}", dependencies=[Depends(require_asset_level("read"))])
+async def transform_pdf_endpoint(
+    request: Request,
+    id: UUID = Path(..., description="Asset ID"),
+    page: int = Query(1, ge=1, description="PDF page number to render"),
+    dpi: int = Query(200, ge=72, le=600, description="DPI for rendering"),
+    v: int = Query(None, ge=1, description="Asset version the URL is pinned to"),
+    priority: str = Query(
+        "interactive", regex=PRIORITY_REGEX, description="Scheduling class"
+    ),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
+):
+    """
+    Transform a PDF asset by rendering a specific page as an image.
+    """
+    version = await run_in_threadpool(
+        get_asset_version, db, id, current_user.tenant_id
+    )
+    etag = version_etag(str(id), version, "pdf", page, dpi)
+    headers = cache_headers(etag, version, v)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    await run_in_threadpool(
+        enforce_quota, request, db, bandwidth_quota, current_user.tenant_id
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        input_path = os.path.join(tmpdir, "input.pdf")
+        output_path = os.path.join(tmpdir, "output.jpg")
+        await run_in_threadpool(download_asset, db, id, version, input_path)
+        try:
+            cost = await run_in_threadpool(
+                estimate_render_bytes, input_path, page=page, dpi=dpi
+            )
+            await run_transform(
+                current_user.tenant_id,
+                priority,
+                lambda: pdf_to_image(input_path, output_path, page=page, dpi=dpi),
+                memory_bytes=cost,
+            )
+            content = await run_in_threadpool(read_output, output_path)
+            usage_counters.record_asset(
+                current_user.tenant_id, str(id), "view", len(content)
+            )
+            bandwidth_quota.add(current_user.tenant_id, len(content))
+            return Response(content=content, media_type="image/jpeg", headers=headers)
+        except AdmissionRejected as e:
+            raise HTTPException(503, str(e), headers={"Retry-After": "1"})
+        except QueueFull as e:
+            raise HTTPException(429, str(e), headers={"Retry-After": "1"})
+        except Exception as e:
+            raise HTTPException(500, f"PDF transformation failed: {e}")
+
+
+@router.get("/video/{id}", dependencies=[Depends(require_asset_level("read"))])
+async def transform_video_endpoint(
+    request: Request,
+    id: UUID = Path(..., description="Asset ID"),
+    time: float = Query(1.0, ge=0, description="Timestamp (in seconds) for thumbnail"),
+    v: int = Query(None, ge=1, description="Asset version the URL is pinned to"),
+    priority: str = Query(
+        "interactive", regex=PRIORITY_REGEX, description="Scheduling class"
+    ),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(get_current_user),
+):
+    """
+    Transform a video asset by extracting a thumbnail at a specific time.
+    """
+    version = await run_in_threadpool(
+        get_asset_version, db, id, current_user.tenant_id
+    )
+    etag = version_etag(str(id), version, "video", time)
+    headers = cache_headers(etag, version, v)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    await run_in_threadpool(
+        enforce_quota, request, db, bandwidth_quota, current_user.tenant_id
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        input_path = os.path.join(tmpdir, "input.mp4")
+        output_path = os.path.join(tmpdir, "output.jpg")
+        await run_in_threadpool(download_asset, db, id, version, input_path)
+        try:
+            await run_transform(
+                current_user.tenant_id,
+                priority,
+                lambda: video_to_thumbnail(input_path, output_path, time=time),
+                cost_mb=VIDEO_COST_MB,
+            )
+            content = await run_in_threadpool(read_output, output_path)
+            usage_counters.record_asset(
+                current_user.tenant_id, str(id), "view", len(content)
+            )
+            bandwidth_quota.add(current_user.tenant_id, len(content))
+            return Response(content=content, media_type="image/jpeg", headers=headers)
+        except QueueFull as e:
+            raise HTTPException(429, str(e), headers={"Retry-After": "1"})
+        except Exception as e:
+            raise HTTPException(500, f"Video transformation failed: {e}")
+
+
+@router.get("/default/{id}")
+async def transform_default_endpoint(
+    id: UUID = Path(..., description="Asset ID"),
+):
+    """
+    Fallback endpoint for unsupported file types.
+    """
+    # Optionally, return a generic icon, error, or the original file.
+    raise HTTPException(415, "Transformation not supported for this file type.")
+
@@ -3,16 +3,19 @@ from uuid import UUID
 from fastapi import APIRouter, Path, Query, status, HTTPException, Depends, Body
 from pydantic import BaseModel, EmailStr, constr, Field
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 
 from db import get_db
-from models import User
+from models import User, generate_uuid
 from dependencies.auth import get_current_user, TokenPayload
+from dependencies.authz import require_permission
+from utils.passwords import get_password_hash
+from utils.projection import project
+from utils.row_cache import get_cached, user_cache
+from utils.serialization import FastJSONResponse, rows_to_dicts
+from utils.user_directory import EmailTaken, claim_email, release_email
 
 router = APIRouter()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # --- Pydantic Models ---
 
 
@@ -49,15 +52,8 @@ class MessageResponse(BaseModel):
     message: str
 
 
-# --- Helper Functions ---
-
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# Columns of UserResponse, in the order list_users selects them
+USER_LIST_FIELDS = ("id", "email", "full_name", "is_active", "roles")
 
 
 # --- Endpoints ---
@@ -81,7 +77,9 @@ def list_users(
     - `is_active`: Filter by active status (True/False).
     - `role`: Filter by user role.
     """
-    query = db.query(User).filter(User.tenant_id == current_user.tenant_id)
+    query = project(db, User, USER_LIST_FIELDS).filter(
+        User.tenant_id == current_user.tenant_id
+    )
     if q:
         query = query.filter(
             (User.email.like(f"%{q}%")) | (User.full_name.like(f"%{q}%"))
@@ -91,21 +89,16 @@ def list_users(
     if role:
         query = query.filter(User.roles.contains([role]))
     total = query.count()
-    users = query.offset((page - 1) * size).limit(size).all()
-    return UserListResponse(
-        items=[
-            UserResponse(
-                id=u.id,
-                email=u.email,
-                full_name=u.full_name,
-                is_active=u.is_active,
-                roles=u.roles,
-            )
-            for u in users
-        ],
-        total=total,
-        page=page,
-        size=size,
+    rows = query.offset((page - 1) * size).limit(size).all()
+    # Rows come straight from validated columns, so the response is encoded
+    # directly instead of going through UserResponse and response_model
+    return FastJSONResponse(
+        {
+            "items": rows_to_dicts(rows, USER_LIST_FIELDS),
+            "total": total,
+            "page": page,
+            "size": size,
+        }
     )
 
 
@@ -119,11 +112,7 @@ def get_user(
     Get user details by ID in the current tenant.
     - `id`: User ID to retrieve.
     """
-    user = (
-        db.query(User)
-        .filter(User.id == str(id), User.tenant_id == current_user.tenant_id)
-        .first()
-    )
+    user = get_cached(user_cache, db, id, current_user.tenant_id)
     if not user:
         raise HTTPException(404, "User not found")
     return UserResponse(
@@ -135,7 +124,12 @@ def get_user(
     )
 
 
-@router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(require_permission("users:write"))],
+)
 def create_user(
     user: UserCreate,
     db: Session = Depends(get_db),
@@ -145,15 +139,15 @@ def create_user(
     Create a new user in the current tenant.
     - `user`: User details to create.
     """
-    # Check for existing email in this tenant
-    existing = (
-        db.query(User)
-        .filter(User.email == user.email, User.tenant_id == current_user.tenant_id)
-        .first()
-    )
-    if existing:
+    # Emails are unique across tenants; the directory on the default
+    # database is the only place that sees every shard.
+    user_id = generate_uuid()
+    try:
+        claim_email(user.email, current_user.tenant_id, user_id)
+    except EmailTaken:
         raise HTTPException(400, "Email already registered.")
     db_user = User(
+        id=user_id,
         email=user.email,
         full_name=user.full_name,
         is_active=user.is_active,
@@ -162,7 +156,12 @@ def create_user(
         tenant_id=current_user.tenant_id,
     )
     db.add(db_user)
-    db.commit()
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        release_email(user.email, user_id)
+        raise
     db.refresh(db_user)
     return UserResponse(
         id=db_user.id,
@@ -173,7 +172,11 @@ def create_user(
     )
 
 
-@router.patch("/{id}", response_model=UserResponse)
+@router.patch(
+    "/{id}",
+    response_model=UserResponse,
+    dependencies=[Depends(require_permission("users:write"))],
+)
 def update_user(
     id: UUID = Path(..., description="User ID"),
     user: UserUpdate = Body(...),
@@ -211,7 +214,11 @@ def update_user(
     )
 
 
-@router.delete("/{id}", response_model=MessageResponse)
+@router.delete(
+    "/{id}",
+    response_model=MessageResponse,
+    dependencies=[Depends(require_permission("users:write"))],
+)
 def delete_user(
     id: UUID = Path(..., description="User ID"),
     db: Session = Depends(get_db),
@@ -230,5 +237,6 @@ def delete_user(
         raise HTTPException(404, "User not found.")
     db.delete(db_user)
     db.commit()
+    release_email(db_user.email, db_user.id)
     return MessageResponse(message="User deleted successfully.")
 
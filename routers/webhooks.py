@@ -7,6 +7,8 @@ from sqlalchemy.orm import Session
 from db import get_db
 from models import Webhook
 from dependencies.auth import get_current_user, TokenPayload
+from utils.projection import project
+from utils.serialization import FastJSONResponse, rows_to_dicts
 
 router = APIRouter()
 
@@ -50,6 +52,18 @@ class MessageResponse(BaseModel):
     message: str
 
 
+# Columns of WebhookResponse, in the order list_webhooks selects them
+WEBHOOK_LIST_FIELDS = (
+    "id",
+    "url",
+    "events",
+    "secret",
+    "is_active",
+    "description",
+    "headers",
+)
+
+
 # --- Endpoints ---
 
 
@@ -64,26 +78,16 @@ def list_webhooks(
     List all webhooks for the current tenant.
     Supports filtering by active status and event type.
     """
-    query = db.query(Webhook).filter(Webhook.tenant_id == current_user.tenant_id)
+    query = project(db, Webhook, WEBHOOK_LIST_FIELDS).filter(
+        Webhook.tenant_id == current_user.tenant_id
+    )
     if is_active is not None:
         query = query.filter(Webhook.is_active == is_active)
     if event:
         query = query.filter(Webhook.events.contains([event]))
-    items = query.all()
-    return WebhookListResponse(
-        items=[
-            WebhookResponse(
-                id=w.id,
-                url=w.url,
-                events=w.events,
-                secret=w.secret,
-                is_active=w.is_active,
-                description=w.description,
-                headers=w.headers,
-            )
-            for w in items
-        ],
-        total=len(items),
+    rows = query.all()
+    return FastJSONResponse(
+        {"items": rows_to_dicts(rows, WEBHOOK_LIST_FIELDS), "total": len(rows)}
     )
 
 
@@ -40,3 +40,36 @@ class Storage(ABC):
         """
         pass
 
+    @abstractmethod
+    def delete(self, filename: str) -> None:
+        """
+        Abstract method to delete a file from storage.
+        Deleting a file that does not exist is not an error.
+        :param filename: The name of the file to delete.
+        """
+        pass
+
+    def delete_many(self, filenames: list) -> None:
+        """
+        Delete several files. Backends with a batch API override this.
+        :param filenames: The names of the files to delete.
+        """
+        for filename in filenames:
+            self.delete(filename)
+
+    def set_tier(self, filename: str, tier: str) -> None:
+        """
+        Move a file to a storage tier: 'standard' or 'archive'.
+        Backends without tiers keep the file where it is.
+        :param filename: The name of the file to move.
+        :param tier: The target tier.
+        """
+        pass
+
+    def health_check(self) -> None:
+        """
+        Verify that the storage backend is reachable and usable.
+        Backends override this; the default performs no check.
+        :raises Exception: If the backend is not usable.
+        """
+        pass
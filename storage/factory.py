@@ -0,0 +1,77 @@
+# storage/factory.py
+from storage.base import Storage
+from config import settings
+from utils.metrics import timed
+
+_storage = None
+
+
+class TimedStorage(Storage):
+    """
+    Wraps a storage backend and attributes its I/O time to the 'storage'
+    phase of the current request.
+    """
+
+    def __init__(self, backend: Storage):
+        self.backend = backend
+
+    def save(self, fileobj, filename: str) -> str:
+        with timed("storage"):
+            return self.backend.save(fileobj, filename)
+
+    def download(self, filename: str, dest_path: str) -> None:
+        with timed("storage"):
+            self.backend.download(filename, dest_path)
+
+    def get_url(self, filename: str) -> str:
+        with timed("storage"):
+            return self.backend.get_url(filename)
+
+    def delete(self, filename: str) -> None:
+        with timed("storage"):
+            self.backend.delete(filename)
+
+    def delete_many(self, filenames: list) -> None:
+        with timed("storage"):
+            self.backend.delete_many(filenames)
+
+    def set_tier(self, filename: str, tier: str) -> None:
+        with timed("storage"):
+            self.backend.set_tier(filename, tier)
+
+    def health_check(self) -> None:
+        self.backend.health_check()
+
+
+def get_storage() -> Storage:
+    """
+    Return the process-wide storage backend selected by STORAGE_TYPE.
+    The backend is created on first use and reused afterwards.
+    """
+    global _storage
+    if _storage is None:
+        if settings.STORAGE_TYPE == "s3":
+            from storage.s3 import S3Storage
+
+            _storage = TimedStorage(S3Storage())
+        else:
+            from storage.local import LocalStorage
+
+            _storage = TimedStorage(LocalStorage())
+    return _storage
+
+
+def asset_key(asset_id, version: int = None) -> str:
+    """
+    Get the storage key for one version of an asset's blob.
+    Keys are immutable: a new version is written under a new key and never
+    overwrites an older one. Version 1 keeps the original un-suffixed key.
+    Uploaded versions append a unique suffix (see utils.versions.create_version)
+    and are looked up through AssetVersion.blob_key (utils.versions.blob_key).
+    :param asset_id: The asset ID.
+    :param version: The asset version (None or 1 for the first version).
+    :return: The key under which the blob is stored.
+    """
+    if version is None or version <= 1:
+        return f"assets/{asset_id}"
+    return f"assets/{asset_id}.v{version}"
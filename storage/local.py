@@ -12,10 +12,22 @@ class LocalStorage(Storage):
     and retrieve URLs for files stored locally.
     """
 
-    def __init__(self, base_dir=None):
+    def __init__(self, base_dir=None, archive_dir=None):
         self.base_dir = base_dir or settings.ASSET_LOCAL_DIR
+        self.archive_dir = archive_dir or settings.ASSET_ARCHIVE_DIR
         os.makedirs(self.base_dir, exist_ok=True)
 
+    def _path(self, filename: str) -> str:
+        """
+        Resolve a file in the standard directory, falling back to the archive.
+        """
+        path = os.path.join(self.base_dir, filename)
+        if self.archive_dir and not os.path.exists(path):
+            archived = os.path.join(self.archive_dir, filename)
+            if os.path.exists(archived):
+                return archived
+        return path
+
     def save(self, fileobj, filename: str) -> str:
         """
         Save a file-like object to local storage.
@@ -24,6 +36,7 @@ class LocalStorage(Storage):
         :return: The filename or path where the file was saved.
         """
         dest_path = os.path.join(self.base_dir, filename)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
         with open(dest_path, "wb") as f:
             shutil.copyfileobj(fileobj, f)
         return filename
@@ -36,7 +49,7 @@ class LocalStorage(Storage):
         """
         if not os.path.exists(self.base_dir):
             raise FileNotFoundError(f"Base directory {self.base_dir} does not exist.")
-        src = os.path.join(self.base_dir, filename)
+        src = self._path(filename)
         shutil.copy(src, dest_path)
 
     def get_url(self, filename: str) -> str:
@@ -48,3 +61,35 @@ class LocalStorage(Storage):
         # For local, this could return a relative/static URL
         return f"/assets/files/{filename}"
 
+    def delete(self, filename: str) -> None:
+        """
+        Delete a file from local storage (standard or archive directory).
+        :param filename: The name of the file to delete.
+        """
+        try:
+            os.remove(self._path(filename))
+        except FileNotFoundError:
+            pass
+
+    def set_tier(self, filename: str, tier: str) -> None:
+        """
+        Move a file between the base directory and ASSET_ARCHIVE_DIR.
+        No-op when no archive directory is configured.
+        :param filename: The name of the file to move.
+        :param tier: 'standard' or 'archive'.
+        """
+        if not self.archive_dir:
+            return
+        src = self._path(filename)
+        root = self.archive_dir if tier == "archive" else self.base_dir
+        dest = os.path.join(root, filename)
+        if src != dest and os.path.exists(src):
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            shutil.move(src, dest)
+
+    def health_check(self) -> None:
+        """
+        Check that the base directory exists and is writable.
+        """
+        if not os.path.isdir(self.base_dir) or not os.access(self.base_dir, os.W_OK):
+            raise OSError(f"Base directory {self.base_dir} is not writable.")
@@ -1,5 +1,4 @@
 # storage/s3.py
-import boto3
 from storage.base import Storage
 from config import settings
 
@@ -13,6 +12,8 @@ class S3Storage(Storage):
     """
 
     def __init__(self):
+        import boto3
+
         self.client = boto3.client(
             "s3",
             aws_access_key_id=settings.S3_ACCESS_KEY,
@@ -36,3 +37,33 @@ class S3Storage(Storage):
             ExpiresIn=3600,
         )
 
+    def delete(self, filename: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=filename)
+
+    def delete_many(self, filenames: list) -> None:
+        # DeleteObjects takes up to 1000 keys per call
+        for i in range(0, len(filenames), 1000):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={
+                    "Objects": [{"Key": k} for k in filenames[i : i + 1000]],
+                    "Quiet": True,
+                },
+            )
+
+    def set_tier(self, filename: str, tier: str) -> None:
+        # In-place copy to change the storage class
+        storage_class = (
+            settings.S3_ARCHIVE_STORAGE_CLASS if tier == "archive" else "STANDARD"
+        )
+        self.client.copy_object(
+            Bucket=self.bucket,
+            Key=filename,
+            CopySource={"Bucket": self.bucket, "Key": filename},
+            StorageClass=storage_class,
+            MetadataDirective="COPY",
+        )
+
+    def health_check(self) -> None:
+        # HEAD on the bucket checks reachability, credentials and bucket access
+        self.client.head_bucket(Bucket=self.bucket)
@@ -0,0 +1,348 @@
+# utils/acl.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from sqlalchemy import exists, inspect, or_, tuple_
+from sqlalchemy.orm import Session
+
+from config import settings
+from db import tenant_session
+from models import Asset, AssetPermission
+from utils.es_indexing import ensure_asset_mapping, update_asset_index
+
+LEVELS = {"read": 1, "write": 2, "admin": 3}
+# Members of this role (tenant admins) bypass asset ACLs
+ADMIN_ROLE = "admin"
+# Effective level on assets that have no ACL entries
+OPEN_LEVEL = LEVELS["write"]
+# Marks open assets in the denormalized ES fields
+ANYONE = "*"
+
+# Cached ACL of one asset: (tenant_id, ((principal, level rank), ...))
+AclEntry = Tuple[str, Tuple[Tuple[str, int], ...]]
+
+
+def principal(subject_type: str, subject: str) -> str:
+    return f"{subject_type}:{subject}"
+
+
+def user_principals(user_id: str, roles: Iterable[str]) -> FrozenSet[str]:
+    """
+    Principals a user acts as: the user itself plus one group per role.
+    Roles come from the token, so no membership lookup is needed.
+    """
+    return frozenset(
+        [principal("user", user_id)] + [principal("group", r) for r in roles or []]
+    )
+
+
+class AclCache:
+    """
+    Process-wide LRU of asset ACLs.
+    Misses for a whole batch of assets are loaded with one query. Entries older
+    than `ttl` are reloaded so ACL changes made by other workers show up;
+    changes made in this process invalidate immediately. Invalidation leaves
+    a marker (entry None) so a load that started before it is not stored.
+    """
+
+    def __init__(self, max_assets: int, ttl: float):
+        self.max_assets = max_assets
+        self.ttl = ttl
+        # asset -> (loaded or invalidated at, ACL or None for a marker)
+        self.entries: "OrderedDict[str, Tuple[float, Optional[AclEntry]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get_many(self, db: Session, asset_ids: Iterable[str]) -> Dict[str, AclEntry]:
+        """
+        ACLs for the given assets. Unknown assets are left out of the result.
+        """
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for asset_id in asset_ids:
+                cached = self.entries.get(asset_id)
+                if (
+                    cached is not None
+                    and cached[1] is not None
+                    and now - cached[0] < self.ttl
+                ):
+                    self.entries.move_to_end(asset_id)
+                    found[asset_id] = cached[1]
+                else:
+                    missing.append(asset_id)
+        if missing:
+            # Read on a fresh connection: the caller's transaction may hold a
+            # REPEATABLE READ snapshot from before an invalidation marked below
+            with Session(bind=db.get_bind(inspect(Asset))) as fresh:
+                loaded = self._load(fresh, missing)
+            with self._lock:
+                for asset_id, entry in loaded.items():
+                    current = self.entries.get(asset_id)
+                    if current is not None and current[1] is None:
+                        if current[0] >= now:
+                            continue  # invalidated while this load ran
+                    self.entries[asset_id] = (now, entry)
+                    self.entries.move_to_end(asset_id)
+                while len(self.entries) > self.max_assets:
+                    self.entries.popitem(last=False)
+            found.update(loaded)
+        return found
+
+    @staticmethod
+    def _load(db: Session, asset_ids: List[str]) -> Dict[str, AclEntry]:
+        rows = (
+            db.query(
+                Asset.id,
+                Asset.tenant_id,
+                AssetPermission.subject_type,
+                AssetPermission.subject,
+                AssetPermission.level,
+            )
+            .outerjoin(AssetPermission, AssetPermission.asset_id == Asset.id)
+            .filter(Asset.id.in_(asset_ids))
+            .all()
+        )
+        grouped: Dict[str, Tuple[str, list]] = {}
+        for asset_id, tenant_id, subject_type, subject, level in rows:
+            entry = grouped.setdefault(asset_id, (tenant_id, []))
+            if subject is not None:
+                entry[1].append((principal(subject_type, subject), LEVELS[level]))
+        return {k: (tenant, tuple(acl)) for k, (tenant, acl) in grouped.items()}
+
+    def invalidate(self, asset_ids: Iterable[str]):
+        with self._lock:
+            now = time.monotonic()
+            for asset_id in asset_ids:
+                self.entries[asset_id] = (now, None)
+                self.entries.move_to_end(asset_id)
+            while len(self.entries) > self.max_assets:
+                self.entries.popitem(last=False)
+
+
+acl_cache = AclCache(
+    max_assets=settings.ACL_CACHE_MAX_ASSETS, ttl=settings.ACL_CACHE_TTL
+)
+
+
+class PermissionSet:
+    """
+    A user's effective permissions for one request.
+    Evaluation results are memoized, so repeated checks on the same assets
+    within a request cost nothing.
+    """
+
+    __slots__ = ("tenant_id", "principals", "is_admin", "_levels")
+
+    def __init__(self, tenant_id: str, user_id: str, roles: Iterable[str]):
+        self.tenant_id = tenant_id
+        self.principals = user_principals(user_id, roles)
+        self.is_admin = principal("group", ADMIN_ROLE) in self.principals
+        self._levels: Dict[str, int] = {}
+
+    def levels(self, db: Session, asset_ids: Iterable[str]) -> Dict[str, int]:
+        """
+        Effective level rank (0 = no access) per asset, evaluated in one batch.
+        Assets of other tenants and unknown assets get 0.
+        """
+        asset_ids = [str(i) for i in asset_ids]
+        todo = [i for i in asset_ids if i not in self._levels]
+        if todo:
+            acls = acl_cache.get_many(db, todo)
+            for asset_id in todo:
+                self._levels[asset_id] = self._evaluate(acls.get(asset_id))
+        return {i: self._levels[i] for i in asset_ids}
+
+    def _evaluate(self, entry: Optional[AclEntry]) -> int:
+        if entry is None or entry[0] != self.tenant_id:
+            return 0
+        if self.is_admin:
+            return LEVELS["admin"]
+        if not entry[1]:
+            return OPEN_LEVEL
+        return max((rank for p, rank in entry[1] if p in self.principals), default=0)
+
+    def allowed(self, db: Session, asset_ids: Iterable[str], level: str) -> List[str]:
+        """
+        The subset of `asset_ids` granted at least `level`, in input order.
+        """
+        need = LEVELS[level]
+        return [i for i, rank in self.levels(db, asset_ids).items() if rank >= need]
+
+    def can(self, db: Session, asset_id: str, level: str) -> bool:
+        return self.levels(db, [asset_id])[str(asset_id)] >= LEVELS[level]
+
+    def search_filter(self, level: str = "read") -> Optional[dict]:
+        """
+        Elasticsearch filter clause matching the assets this user may access,
+        using the ACL fields denormalized into asset documents.
+        Documents indexed before ACLs existed have no field and stay visible.
+        :return: Filter clause, or None when no filtering is needed (admins).
+        """
+        if self.is_admin:
+            return None
+        field = f"acl_{level}"
+        return {
+            "bool": {
+                "should": [
+                    {"terms": {field: sorted(self.principals) + [ANYONE]}},
+                    {"bool": {"must_not": {"exists": {"field": field}}}},
+                ],
+                "minimum_should_match": 1,
+            }
+        }
+
+    def sql_filter(self, level: str = "read"):
+        """
+        SQL counterpart of search_filter for queries on Asset: assets with an
+        ACL entry granting at least `level` to one of the user's principals,
+        plus open assets where OPEN_LEVEL suffices.
+        :return: Filter clause, or None when no filtering is needed (admins).
+        """
+        if self.is_admin:
+            return None
+        need = LEVELS[level]
+        entries = AssetPermission.asset_id == Asset.id
+        granted = exists().where(
+            entries,
+            AssetPermission.level.in_([n for n, r in LEVELS.items() if r >= need]),
+            tuple_(AssetPermission.subject_type, AssetPermission.subject).in_(
+                [tuple(p.split(":", 1)) for p in sorted(self.principals)]
+            ),
+        )
+        if need > OPEN_LEVEL:
+            return granted
+        return or_(~exists().where(entries), granted)
+
+
+def acl_document(permissions: List[AssetPermission]) -> dict:
+    """
+    ACL fields for an asset's search document: the principals granted at least
+    read and at least write. Open assets are marked with ANYONE.
+    """
+    if not permissions:
+        return {"acl_read": [ANYONE], "acl_write": [ANYONE]}
+    granted = [
+        (principal(p.subject_type, p.subject), LEVELS[p.level]) for p in permissions
+    ]
+    return {
+        "acl_read": sorted(p for p, rank in granted),
+        "acl_write": sorted(p for p, rank in granted if rank >= LEVELS["write"]),
+    }
+
+
+def get_asset_acl(db: Session, asset_id: str) -> List[AssetPermission]:
+    return (
+        db.query(AssetPermission)
+        .filter(AssetPermission.asset_id == asset_id)
+        .order_by(AssetPermission.subject_type, AssetPermission.subject)
+        .all()
+    )
+
+
+class AclReindexer:
+    """
+    Retries search document updates that failed after an ACL change was
+    committed, from a background thread with exponential backoff. Each retry
+    reads the asset's current ACL, so the latest change wins. Pending assets
+    are kept per process; one that still fails after `max_attempts` is logged
+    and left to a reindex.
+    """
+
+    def __init__(self, interval: float, max_attempts: int = 10):
+        self.interval = interval
+        self.max_attempts = max_attempts
+        # asset_id -> (tenant_id, attempts so far, next attempt at)
+        self.pending: Dict[str, Tuple[str, int, float]] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, asset_id: str, tenant_id: str):
+        with self._lock:
+            self.pending[asset_id] = (tenant_id, 0, time.monotonic() + self.interval)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="acl-reindex", daemon=True
+                )
+                self._thread.start()
+
+    def _retry(self, asset_id: str, tenant_id: str):
+        db = tenant_session(tenant_id)
+        try:
+            document = acl_document(get_asset_acl(db, asset_id))
+        finally:
+            db.close()
+        ensure_asset_mapping()
+        update_asset_index(asset_id, document)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            now = time.monotonic()
+            with self._lock:
+                due = [(k, v) for k, v in self.pending.items() if v[2] <= now]
+            for asset_id, entry in due:
+                tenant_id, attempts, _ = entry
+                retry = None
+                try:
+                    self._retry(asset_id, tenant_id)
+                except Exception as e:
+                    attempts += 1
+                    if attempts < self.max_attempts:
+                        delay = self.interval * 2**attempts
+                        retry = (tenant_id, attempts, time.monotonic() + delay)
+                    else:
+                        print(f"Giving up ACL index update of asset {asset_id}: {e}")
+                with self._lock:
+                    # Leave the entry alone if a newer ACL change replaced it
+                    if self.pending.get(asset_id) is entry:
+                        if retry is None:
+                            del self.pending[asset_id]
+                        else:
+                            self.pending[asset_id] = retry
+
+
+acl_reindexer = AclReindexer(interval=settings.ACL_REINDEX_RETRY_INTERVAL)
+
+
+def set_asset_acl(db: Session, asset: Asset, permissions: List[dict]) -> None:
+    """
+    Replace an asset's ACL, refresh its search document and drop the cached
+    evaluation. An empty list makes the asset open to its tenant again.
+    Access checks read the database through acl_cache, so other workers apply
+    the change within ACL_CACHE_TTL. If the search document update fails, it
+    is retried in the background by acl_reindexer; until then search results
+    filtered in Elasticsearch alone may still follow the old ACL.
+    :param permissions: Dicts with subject, type (user/group) and level.
+    """
+    # The same subject listed twice keeps its highest level
+    merged: Dict[Tuple[str, str], str] = {}
+    for p in permissions:
+        key = (p["type"], p["subject"])
+        if key not in merged or LEVELS[p["level"]] > LEVELS[merged[key]]:
+            merged[key] = p["level"]
+    db.query(AssetPermission).filter(AssetPermission.asset_id == asset.id).delete(
+        synchronize_session=False
+    )
+    rows = [
+        AssetPermission(
+            asset_id=asset.id,
+            tenant_id=asset.tenant_id,
+            subject_type=subject_type,
+            subject=subject,
+            level=level,
+        )
+        for (subject_type, subject), level in merged.items()
+    ]
+    db.add_all(rows)
+    db.commit()
+    acl_cache.invalidate([asset.id])
+    try:
+        ensure_asset_mapping()
+        update_asset_index(asset.id, acl_document(rows))
+    except Exception as e:
+        print(f"ACL index update of asset {asset.id} failed, will retry: {e}")
+        acl_reindexer.add(asset.id, asset.tenant_id)
@@ -0,0 +1,196 @@
+# utils/audit.py
+import atexit
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from config import settings
+from db import SessionLocal
+from models import AuditLog, generate_uuid
+
+
+class AuditWriter:
+    """
+    Buffers audit entries in memory and writes them in multi-row INSERTs.
+    A background thread flushes every `flush_interval` seconds, and a flush is
+    triggered early once `batch_size` entries are pending. The buffer holds at
+    most `max_pending` entries: while the database is down, the oldest ones
+    are dropped and counted in `dropped`, so requests never wait on a flush.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.failed_flushes = 0
+        self.dropped = 0
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="audit-writer", daemon=True
+            )
+            self._thread.start()
+
+    def record(
+        self,
+        tenant_id: str,
+        action: str,
+        user_id: Optional[str] = None,
+        asset_id: Optional[str] = None,
+        details: Optional[dict] = None,
+        ip_address: Optional[str] = None,
+    ):
+        """
+        Queue an audit entry. The timestamp is taken now, not at flush time.
+        """
+        if len(self.pending) >= self.max_pending:
+            try:
+                self.pending.popleft()
+                self.dropped += 1
+            except IndexError:
+                pass  # emptied by a concurrent flush
+        self.pending.append(
+            {
+                "id": generate_uuid(),
+                "created_at": datetime.utcnow(),
+                "tenant_id": tenant_id,
+                "user_id": user_id,
+                "asset_id": asset_id,
+                "action": action,
+                "details": details,
+                "ip_address": ip_address,
+            }
+        )
+        self.start()
+        if len(self.pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """
+        Write all pending entries. Entries are put back if the insert fails, as
+        far as the buffer limit allows; the oldest of the batch are dropped.
+        :return: Number of entries written.
+        """
+        with self._flush_lock:
+            written = 0
+            while self.pending:
+                batch = []
+                while self.pending and len(batch) < self.batch_size:
+                    batch.append(self.pending.popleft())
+                db = SessionLocal()
+                try:
+                    db.execute(insert(AuditLog).values(batch))
+                    db.commit()
+                    written += len(batch)
+                except Exception as e:
+                    db.rollback()
+                    room = max(self.max_pending - len(self.pending), 0)
+                    keep = batch[len(batch) - room :] if room else []
+                    self.dropped += len(batch) - len(keep)
+                    self.pending.extendleft(reversed(keep))
+                    self.failed_flushes += 1
+                    print(f"Audit log flush failed: {e}")
+                    break
+                finally:
+                    db.close()
+            return written
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self.pending:
+                self.flush()
+
+
+audit_writer = AuditWriter(
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+    max_pending=settings.AUDIT_MAX_PENDING,
+)
+atexit.register(audit_writer.flush)
+
+
+def record_audit(tenant_id: str, action: str, **kwargs):
+    """
+    Record an audit entry through the process-wide writer.
+    """
+    audit_writer.record(tenant_id, action, **kwargs)
+
+
+# --- Partition maintenance ---
+
+
+def month_start(d: date, offset: int = 0) -> date:
+    month = d.month - 1 + offset
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def list_partitions(db: Session) -> List[str]:
+    """
+    Names of the audit_logs partitions, oldest first.
+    """
+    rows = db.execute(
+        text(
+            "SELECT PARTITION_NAME FROM information_schema.PARTITIONS"
+            " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'audit_logs'"
+            " AND PARTITION_NAME IS NOT NULL ORDER BY PARTITION_ORDINAL_POSITION"
+        )
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+def ensure_partitions(db: Session, months_ahead: int = 3) -> List[str]:
+    """
+    Create monthly partitions from the current month up to `months_ahead`
+    months ahead by splitting the catch-all p_future partition. p_future is
+    kept empty, so the split does not move rows.
+    :return: Names of the partitions created.
+    """
+    existing = set(list_partitions(db))
+    if "p_future" not in existing:
+        return []
+    today = date.today()
+    created = []
+    for offset in range(months_ahead + 1):
+        start = month_start(today, offset)
+        name = f"p{start:%Y%m}"
+        if name in existing:
+            continue
+        end = month_start(start, 1)
+        db.execute(
+            text(
+                f"ALTER TABLE audit_logs REORGANIZE PARTITION p_future INTO ("
+                f"PARTITION {name} VALUES LESS THAN (TO_DAYS('{end:%Y-%m-%d}')), "
+                f"PARTITION p_future VALUES LESS THAN MAXVALUE)"
+            )
+        )
+        created.append(name)
+    return created
+
+
+def drop_partitions_before(db: Session, cutoff: date) -> List[str]:
+    """
+    Drop monthly partitions that end on or before the start of `cutoff`'s month.
+    Dropping a partition is a metadata operation, not a row-by-row DELETE.
+    :return: Names of the partitions dropped.
+    """
+    limit = f"p{month_start(cutoff):%Y%m}"
+    old = [
+        p
+        for p in list_partitions(db)
+        if p != "p_future" and p.startswith("p") and p < limit
+    ]
+    if old:
+        db.execute(text(f"ALTER TABLE audit_logs DROP PARTITION {', '.join(old)}"))
+    return old
@@ -0,0 +1,140 @@
+# utils/audit_export.py
+import base64
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterator, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+from db import SessionLocal
+from models import AuditLog
+
+EXPORT_COLUMNS = (
+    "id",
+    "timestamp",
+    "user_id",
+    "action",
+    "asset_id",
+    "details",
+    "ip_address",
+    "cursor",  # resume token of this row, see encode_cursor
+)
+YIELD_PER = 2000  # rows fetched per round trip from the server-side cursor
+ROWS_PER_CHUNK = 1000  # rows serialized per emitted chunk
+
+
+def encode_cursor(timestamp: str, entry_id: str) -> str:
+    """
+    Build a resume token from the timestamp and id of the last received row.
+    """
+    raw = f"{timestamp}|{entry_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, str]:
+    """
+    Parse a resume token. Raises ValueError if it is malformed.
+    """
+    padded = token + "=" * (-len(token) % 4)
+    timestamp, entry_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+    return datetime.fromisoformat(timestamp), entry_id
+
+
+def _rows(query, cursor: Optional[str]) -> Iterator[tuple]:
+    if cursor:
+        after_ts, after_id = decode_cursor(cursor)
+        query = query.filter(
+            or_(
+                AuditLog.created_at > after_ts,
+                and_(AuditLog.created_at == after_ts, AuditLog.id > after_id),
+            )
+        )
+    query = query.order_by(AuditLog.created_at, AuditLog.id).execution_options(
+        stream_results=True, yield_per=YIELD_PER
+    )
+    for row in query:
+        timestamp = row.created_at.isoformat()
+        yield (
+            row.id,
+            timestamp,
+            row.user_id,
+            row.action,
+            row.asset_id,
+            row.details,
+            row.ip_address,
+            encode_cursor(timestamp, row.id),
+        )
+
+
+def _ndjson_chunks(rows: Iterator[tuple]) -> Iterator[str]:
+    buf = []
+    for row in rows:
+        buf.append(json.dumps(dict(zip(EXPORT_COLUMNS, row)), separators=(",", ":")))
+        if len(buf) >= ROWS_PER_CHUNK:
+            yield "\n".join(buf) + "\n"
+            buf = []
+    if buf:
+        yield "\n".join(buf) + "\n"
+
+
+def _csv_chunks(rows: Iterator[tuple], header: bool = True) -> Iterator[str]:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    n = 0
+    for row in rows:
+        details = json.dumps(row[5], separators=(",", ":")) if row[5] else ""
+        writer.writerow(row[:5] + (details,) + row[6:])
+        n += 1
+        if n >= ROWS_PER_CHUNK:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+            n = 0
+    if out.tell():
+        yield out.getvalue()
+
+
+def _gzip(chunks: Iterator[str]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_audit_export(
+    build_query, fmt: str = "ndjson", compress: bool = False, cursor: str = None
+) -> Iterator[bytes]:
+    """
+    Stream audit entries as NDJSON or CSV in constant memory.
+    Rows come from a server-side cursor in (created_at, id) order, are
+    serialized in chunks and optionally gzip-compressed on the fly. Every row
+    carries its own resume token in the `cursor` column, so an interrupted
+    download resumes from the last complete row received. A resumed CSV
+    export has no header row and can be appended to the partial file.
+    :param build_query: Callable taking a session and returning the filtered
+                        AuditLog query; called with a session owned by the stream.
+    :param fmt: 'ndjson' or 'csv'.
+    :param compress: Gzip the output.
+    :param cursor: Resume token from encode_cursor; rows up to it are skipped.
+    """
+    db = SessionLocal()
+    try:
+        rows = _rows(build_query(db), cursor)
+        if fmt == "csv":
+            chunks = _csv_chunks(rows, header=not cursor)
+        else:
+            chunks = _ndjson_chunks(rows)
+        if compress:
+            yield from _gzip(chunks)
+        else:
+            for chunk in chunks:
+                yield chunk.encode()
+    finally:
+        db.close()
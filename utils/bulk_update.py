@@ -0,0 +1,186 @@
+# utils/bulk_update.py
+import json
+from typing import Dict, Iterator, List
+
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+
+from db import TENANT_READONLY, shard_router, tenant_session
+from models import Asset, BulkJob, ASSET_GONE
+from utils.es_indexing import bulk_update_asset_index
+from utils.metadata_schema import get_compiled_schema
+from utils.tag_autocomplete import tag_autocomplete
+from utils.tags import sync_asset_tags
+
+CHUNK_SIZE = 1000  # rows per UPDATE statement and per transaction
+
+
+def apply_patch_to_metainfo(metainfo: dict, patch: dict) -> dict:
+    """
+    Apply a bulk patch to one asset's metainfo and return the new value.
+    Patch keys: 'set' / 'unset' (custom metadata fields), 'tags_set',
+    'tags_add' and 'tags_remove' (tag names).
+    """
+    metainfo = dict(metainfo or {})
+    if patch.get("set") or patch.get("unset"):
+        custom = dict(metainfo.get("custom") or {})
+        custom.update(patch.get("set") or {})
+        for key in patch.get("unset") or ():
+            custom.pop(key, None)
+        metainfo["custom"] = custom
+    tags_set = patch.get("tags_set")
+    if tags_set is not None or patch.get("tags_add") or patch.get("tags_remove"):
+        tags = list(tags_set if tags_set is not None else metainfo.get("tags") or [])
+        for tag in patch.get("tags_add") or ():
+            if tag not in tags:
+                tags.append(tag)
+        remove = set(patch.get("tags_remove") or ())
+        metainfo["tags"] = [t for t in tags if t not in remove]
+    return metainfo
+
+
+def _chunks(ids: List[str], size: int) -> Iterator[List[str]]:
+    for i in range(0, len(ids), size):
+        yield ids[i : i + size]
+
+
+def _ensure_writable(tenant_id: str):
+    # Bulk patches write through their own sessions, past get_db's check
+    if shard_router.lookup(tenant_id)[1] == TENANT_READONLY:
+        raise ValueError("Tenant is being migrated; retry shortly")
+
+
+def apply_bulk_patch(
+    db: Session,
+    tenant_id: str,
+    asset_ids: List[str],
+    patch: dict,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Dict[str, int]]:
+    """
+    Apply a patch to many assets in chunked multi-row UPDATEs.
+    Each chunk is one SELECT ... FOR UPDATE, one UPDATE ... SET metainfo =
+    CASE id ... END, the batched asset_tags sync when tags change, and one
+    commit, so a failure only rolls back the current chunk. Each committed
+    chunk is then pushed to Elasticsearch with one bulk request, so memory
+    stays bounded by the chunk and an interrupted run leaves the index
+    matching what was committed.
+    Raises ValueError before any chunk once the tenant is read-only for a
+    shard move. Yields a progress dict after every chunk.
+    """
+    compiled = None
+    if patch.get("schema"):
+        compiled = get_compiled_schema(db, tenant_id, patch["schema"])
+        if compiled is None:
+            raise ValueError(f"Metadata schema '{patch['schema']}' not found")
+    touches_tags = bool(
+        patch.get("tags_set") is not None
+        or patch.get("tags_add")
+        or patch.get("tags_remove")
+    )
+    processed = failed = 0
+    for chunk in _chunks(asset_ids, chunk_size):
+        _ensure_writable(tenant_id)
+        # The patch is computed in Python from the rows read here, so they are
+        # locked until the chunk commits; otherwise a concurrent edit between
+        # this read and the UPDATE would be overwritten. Locking in id order
+        # keeps two bulk jobs on overlapping assets from deadlocking.
+        rows = (
+            db.query(Asset.id, Asset.metainfo)
+            .filter(
+                Asset.tenant_id == tenant_id,
+                Asset.id.in_(chunk),
+                Asset.state.notin_(ASSET_GONE),
+            )
+            .order_by(Asset.id)
+            .with_for_update()
+            .all()
+        )
+        failed += len(chunk) - len(rows)
+        new_values = {}
+        for asset_id, metainfo in rows:
+            new_metainfo = apply_patch_to_metainfo(metainfo, patch)
+            if compiled is not None and compiled.validate(
+                new_metainfo.get("custom") or {}
+            ):
+                failed += 1
+                continue
+            new_values[asset_id] = new_metainfo
+        if not new_values:
+            db.rollback()  # nothing to write; release the row locks
+        else:
+            try:
+                db.execute(
+                    update(Asset)
+                    .where(
+                        Asset.tenant_id == tenant_id,
+                        Asset.id.in_(list(new_values)),
+                    )
+                    .values(
+                        metainfo=case(
+                            {k: json.dumps(v) for k, v in new_values.items()},
+                            value=Asset.id,
+                        )
+                    )
+                    .execution_options(
+                        synchronize_session=False, row_cache_keys=list(new_values)
+                    )
+                )
+                tag_deltas = {}
+                if touches_tags:
+                    tag_deltas = sync_asset_tags(
+                        db,
+                        tenant_id,
+                        {k: v.get("tags") or [] for k, v in new_values.items()},
+                    )
+                db.commit()
+                if tag_deltas:
+                    tag_autocomplete.usage_changed(tenant_id, tag_deltas)
+            except Exception:
+                db.rollback()
+                raise
+            bulk_update_asset_index(
+                {
+                    k: {"metainfo": v, "tags": v.get("tags") or []}
+                    for k, v in new_values.items()
+                }
+            )
+        processed += len(new_values)
+        yield {"total": len(asset_ids), "processed": processed, "failed": failed}
+
+
+def run_bulk_job(job_id: str, tenant_id: str, asset_ids: List[str], patch: dict):
+    """
+    Run a bulk patch in the background and record progress on the BulkJob row.
+    Uses its own session since it outlives the request.
+    """
+    db = tenant_session(tenant_id)
+    try:
+        job = db.query(BulkJob).filter(BulkJob.id == job_id).first()
+        job.status = "running"
+        db.commit()
+        progress = {}
+        try:
+            for progress in apply_bulk_patch(db, job.tenant_id, asset_ids, patch):
+                job.processed = progress["processed"]
+                job.failed = progress["failed"]
+                db.commit()
+            job.status = "done"
+        except Exception as e:
+            db.rollback()
+            job.status = "failed"
+            job.error = str(e)
+        db.commit()
+    finally:
+        db.close()
+
+
+def create_bulk_job(db: Session, tenant_id: str, kind: str, total: int) -> BulkJob:
+    """
+    Create and commit a pending BulkJob row.
+    """
+    job = BulkJob(tenant_id=tenant_id, kind=kind, status="pending", total=total)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
@@ -1,8 +1,21 @@
 # utils/es.py
-from elasticsearch import Elasticsearch
+from config import settings
 
-ES_HOST = "http://localhost:9200"
-ES_INDEX = "assets"
+ES_HOST = settings.ES_HOST
+ES_INDEX = settings.ES_INDEX
 
-es = Elasticsearch(ES_HOST)
+_es = None
 
+
+def get_es():
+    """
+    Return the process-wide Elasticsearch client.
+    The client (and the elasticsearch package) is loaded on first use, so
+    workers and CLI tools that never search do not pay for it.
+    """
+    global _es
+    if _es is None:
+        from elasticsearch import Elasticsearch
+
+        _es = Elasticsearch(ES_HOST)
+    return _es
@@ -1,5 +1,30 @@
 # utils/es_indexing.py
-from utils.es import es, ES_INDEX
+from typing import List, Tuple
+
+from utils.es import get_es, ES_INDEX
+
+# Elasticsearch's default index.max_result_window: from + size may not exceed it
+MAX_RESULT_WINDOW = 10_000
+
+# Explicit mappings for fields that must be matched exactly
+ASSET_MAPPING = {
+    "properties": {
+        "acl_read": {"type": "keyword"},
+        "acl_write": {"type": "keyword"},
+    }
+}
+_mapping_ensured = False
+
+
+def ensure_asset_mapping():
+    """
+    Add the explicit field mappings to the asset index (once per process).
+    Putting a mapping for new fields is additive and safe on a live index.
+    """
+    global _mapping_ensured
+    if not _mapping_ensured:
+        get_es().indices.put_mapping(index=ES_INDEX, body=ASSET_MAPPING)
+        _mapping_ensured = True
 
 
 def index_asset(asset: dict):
@@ -8,7 +33,7 @@ def index_asset(asset: dict):
     :param asset: The asset data to index, should be a dict with at least an 'id' field.
     """
     # asset should be a dict with at least an 'id' field
-    es.index(index=ES_INDEX, id=asset["id"], document=asset)
+    get_es().index(index=ES_INDEX, id=asset["id"], document=asset)
 
 
 def update_asset_index(asset_id: str, asset: dict):
@@ -17,7 +42,7 @@ def update_asset_index(asset_id: str, asset: dict):
     :param asset_id: The ID of the asset to update.
     :param asset: The asset data to update, should be a dict.
     """
-    es.update(index=ES_INDEX, id=asset_id, doc={"doc": asset})
+    get_es().update(index=ES_INDEX, id=asset_id, doc=asset)
 
 
 def delete_asset_index(asset_id: str):
@@ -25,5 +50,105 @@ def delete_asset_index(asset_id: str):
     Delete an asset from the Elasticsearch index.
     :param asset_id: The ID of the asset to delete.
     """
-    es.delete(index=ES_INDEX, id=asset_id, ignore=[404])
+    get_es().delete(index=ES_INDEX, id=asset_id, ignore=[404])
+
+
+
+def bulk_update_asset_index(docs: dict, chunk_size: int = 500):
+    """
+    Partially update many assets in the Elasticsearch index with bulk requests.
+    :param docs: Mapping of asset ID to the partial document to merge.
+    :param chunk_size: Number of actions per bulk request.
+    """
+    from elasticsearch.helpers import bulk
+
+    actions = (
+        {"_op_type": "update", "_index": ES_INDEX, "_id": asset_id, "doc": doc}
+        for asset_id, doc in docs.items()
+    )
+    bulk(get_es(), actions, chunk_size=chunk_size, raise_on_error=False)
+
+
+def asset_query(
+    tenant_id: str,
+    q: str,
+    filters: dict = None,
+    acl_filter: dict = None,
+    clauses: list = None,
+) -> dict:
+    """
+    Build the bool query shared by the asset searches below.
+    :param clauses: Optional extra filter clauses in query DSL.
+    """
+    return {
+        "bool": {
+            "filter": [{"term": {"tenant_id": tenant_id}}]
+            + [{"term": {k: v}} for k, v in (filters or {}).items()]
+            + ([acl_filter] if acl_filter else [])
+            + list(clauses or ()),
+            "must": [{"simple_query_string": {"query": q}}] if q else [],
+        }
+    }
+
+
+def search_asset_ids(
+    tenant_id: str, q: str, filters: dict = None, acl_filter: dict = None
+):
+    """
+    Yield the IDs of all assets in a tenant matching a query string.
+    Uses a scroll without fetching _source, so large selections stay cheap.
+    :param tenant_id: Tenant to search in.
+    :param q: Query string (simple_query_string syntax).
+    :param filters: Optional exact-match term filters, e.g. {"mimetype": "image/png"}.
+    :param acl_filter: Optional permission filter clause (PermissionSet.search_filter).
+    """
+    from elasticsearch.helpers import scan
+
+    query = asset_query(tenant_id, q, filters, acl_filter)
+    for hit in scan(get_es(), index=ES_INDEX, query={"query": query}, _source=False):
+        yield hit["_id"]
+
+
+def search_asset_page(
+    tenant_id: str,
+    q: str,
+    offset: int,
+    size: int,
+    filters: dict = None,
+    acl_filter: dict = None,
+    clauses: list = None,
+) -> Tuple[List[str], int]:
+    """
+    One page of asset IDs matching a query string, in relevance order.
+    Only the requested page is fetched (from/size, no _source); the total
+    comes from hits.total. Pages past MAX_RESULT_WINDOW are not served.
+    :return: (asset IDs of the page, total number of matches)
+    """
+    if offset + size > MAX_RESULT_WINDOW:
+        raise ValueError(f"Search results are limited to {MAX_RESULT_WINDOW} hits")
+    response = get_es().search(
+        index=ES_INDEX,
+        query=asset_query(tenant_id, q, filters, acl_filter, clauses),
+        from_=offset,
+        size=size,
+        _source=False,
+        track_total_hits=True,
+    )
+    hits = response["hits"]
+    return [hit["_id"] for hit in hits["hits"]], hits["total"]["value"]
+
+
+def bulk_delete_asset_index(asset_ids: list, chunk_size: int = 500):
+    """
+    Delete many assets from the Elasticsearch index with bulk requests.
+    Missing documents are ignored.
+    :param asset_ids: The IDs of the assets to delete.
+    :param chunk_size: Number of actions per bulk request.
+    """
+    from elasticsearch.helpers import bulk
 
+    actions = (
+        {"_op_type": "delete", "_index": ES_INDEX, "_id": asset_id}
+        for asset_id in asset_ids
+    )
+    bulk(get_es(), actions, chunk_size=chunk_size, raise_on_error=False)
@@ -0,0 +1,158 @@
+# utils/health.py
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from functools import partial
+from typing import Callable, Dict
+
+from sqlalchemy import text
+
+from config import settings
+
+def probe_database(shard: str) -> dict:
+    """
+    Check out a connection from a shard's application pool and run SELECT 1.
+    Reports pool usage alongside, since a saturated pool fails requests even
+    when MySQL itself is healthy.
+    """
+    from db import shard_router
+
+    engine = shard_router.engine_for_shard(shard)
+    pool = engine.pool
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    capacity = settings.DB_POOL_SIZE + max(settings.DB_MAX_OVERFLOW, 0)
+    checked_out = pool.checkedout()
+    return {
+        "pool_size": pool.size(),
+        "checked_out": checked_out,
+        "overflow": pool.overflow(),
+        "saturation": round(checked_out / capacity, 3) if capacity else None,
+    }
+
+
+def probe_elasticsearch() -> dict:
+    """
+    Ask Elasticsearch for cluster health; red counts as down.
+    """
+    from utils.es import get_es
+
+    es = get_es().options(request_timeout=settings.HEALTH_PROBE_TIMEOUT)
+    health = es.cluster.health()
+    if health["status"] == "red":
+        raise RuntimeError("cluster status is red")
+    return {"cluster_status": health["status"]}
+
+
+def probe_storage() -> dict:
+    """
+    Run the configured storage backend's own health check.
+    """
+    from storage.factory import get_storage
+
+    get_storage().health_check()
+    return {"backend": settings.STORAGE_TYPE}
+
+
+def database_probes() -> Dict[str, Callable[[], dict]]:
+    """
+    One probe per shard, each with its own thread and timeout, so a slow or
+    saturated shard shows up by name. The default shard keeps the plain
+    "database" key.
+    """
+    from db import DEFAULT_SHARD, shard_router
+
+    return {
+        "database" if shard == DEFAULT_SHARD else f"database:{shard}": partial(
+            probe_database, shard
+        )
+        for shard in shard_router.shard_names()
+    }
+
+
+PROBES: Dict[str, Callable[[], dict]] = {
+    **database_probes(),
+    "elasticsearch": probe_elasticsearch,
+    "storage": probe_storage,
+}
+
+
+class HealthChecker:
+    """
+    Runs all dependency probes concurrently with a timeout and caches the
+    result for `ttl` seconds. Concurrent callers during a refresh wait for the
+    same run instead of starting their own, so health checks never multiply
+    load on the dependencies.
+    Each probe has its own single thread. A probe still running from an
+    earlier check (a hung dependency) is not started again; the check waits
+    for that run instead, so one slow dependency cannot delay the others or
+    pile up threads. Failure reasons are logged, not returned, since the
+    result is served unauthenticated.
+    """
+
+    def __init__(
+        self, probes: Dict[str, Callable[[], dict]], ttl: float, timeout: float
+    ):
+        self.probes = probes
+        self.ttl = ttl
+        self.timeout = timeout
+        self._result = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._executors = {
+            name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"health-{name}")
+            for name in probes
+        }
+        self._in_flight: Dict[str, Future] = {}
+
+    def _run_probe(self, name: str, fn: Callable[[], dict]) -> dict:
+        start = time.perf_counter()
+        try:
+            details = fn()
+            status = "ok"
+        except Exception as e:
+            print(f"Health probe {name} failed: {e}")
+            details = {"error": "failed"}
+            status = "down"
+        details.update(
+            status=status, latency_ms=round((time.perf_counter() - start) * 1000, 2)
+        )
+        return details
+
+    def _run_all(self) -> dict:
+        futures = {}
+        for name, fn in self.probes.items():
+            future = self._in_flight.get(name)
+            if future is None or future.done():
+                future = self._executors[name].submit(self._run_probe, name, fn)
+                self._in_flight[name] = future
+            futures[name] = future
+        deadline = time.monotonic() + self.timeout
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result(max(0.0, deadline - time.monotonic()))
+            except TimeoutError:
+                results[name] = {
+                    "status": "down",
+                    "error": "timeout",
+                    "latency_ms": self.timeout * 1000,
+                }
+        ready = all(r["status"] == "ok" for r in results.values())
+        return {"status": "ok" if ready else "degraded", "details": results}
+
+    def check(self) -> dict:
+        """
+        Return the cached readiness result, refreshing it if older than ttl.
+        """
+        with self._lock:
+            if self._result is None or time.monotonic() - self._checked_at >= self.ttl:
+                self._result = self._run_all()
+                self._checked_at = time.monotonic()
+            age = time.monotonic() - self._checked_at
+            return dict(self._result, age_seconds=round(age, 3))
+
+
+health_checker = HealthChecker(
+    PROBES, ttl=settings.HEALTH_CACHE_SECONDS, timeout=settings.HEALTH_PROBE_TIMEOUT
+)
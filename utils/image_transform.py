@@ -1,7 +1,115 @@
 # utils/image_transform.py
-from PIL import Image
 import io
 
+from config import settings
+
+# Bytes per decoded pixel for the common Pillow modes.
+MODE_BYTES_PER_PIXEL = {
+    "1": 1,
+    "L": 1,
+    "P": 1,
+    "LA": 2,
+    "I;16": 2,
+    "RGB": 3,
+    "YCbCr": 3,
+    "LAB": 3,
+    "HSV": 3,
+    "RGBA": 4,
+    "RGBX": 4,
+    "CMYK": 4,
+    "I": 4,
+    "F": 4,
+}
+
+
+class ImageTooLargeError(ValueError):
+    """
+    Raised when an image cannot be decoded within the configured pixel limit.
+    """
+
+    pass
+
+
+def pil_image():
+    """
+    Import Pillow's Image module on first use, so processes that never decode
+    images do not pay for the import.
+    Pillow's decompression-bomb guard raises on open above 2x the limit set
+    here. Large JPEGs can still be drafted down below IMAGE_MAX_PIXELS, so the
+    hard ceiling on header dimensions is IMAGE_MAX_SOURCE_PIXELS.
+    """
+    from PIL import Image
+
+    Image.MAX_IMAGE_PIXELS = settings.IMAGE_MAX_SOURCE_PIXELS // 2
+    return Image
+
+
+def open_image(input_path: str):
+    """
+    Open an image with Pillow (header only, pixels are decoded lazily).
+    :raises ImageTooLargeError: If Pillow's decompression-bomb guard rejects it.
+    """
+    Image = pil_image()
+    try:
+        return Image.open(input_path)
+    except Image.DecompressionBombError as e:
+        raise ImageTooLargeError(str(e))
+
+
+def estimate_decode_bytes(width: int, height: int, mode: str) -> int:
+    """
+    Estimate the memory needed to hold a decoded image.
+    :param width: Image width in pixels.
+    :param height: Image height in pixels.
+    :param mode: Pillow image mode (e.g., 'RGB', 'RGBA').
+    :return: Estimated number of bytes for the decoded bitmap.
+    """
+    return width * height * MODE_BYTES_PER_PIXEL.get(mode, 4)
+
+
+def _draft_size(img, width: int = None, height: int = None):
+    """
+    Ask the decoder to downscale on decode (JPEG only: 1/2, 1/4, 1/8).
+    The decoder never goes below the requested size, so output quality is kept.
+    :return: The (width, height) the image will decode to.
+    """
+    if img.format != "JPEG" or not (width or height):
+        return img.size
+    target = (width or img.width, height or img.height)
+    img.draft(img.mode, target)
+    return img.size
+
+
+def probe_image(input_path: str, width: int = None, height: int = None) -> dict:
+    """
+    Read the image header (no pixel decode) and estimate the decode cost.
+    :param input_path: Path to the input image file.
+    :param width: Requested output width, used to plan downscale-on-decode.
+    :param height: Requested output height, used to plan downscale-on-decode.
+    :return: Dict with format, mode, source size, decode size and decode_bytes.
+    :raises ImageTooLargeError: If the image exceeds IMAGE_MAX_PIXELS even after draft.
+    """
+    with open_image(input_path) as img:
+        source_size = img.size
+        decode_size = _draft_size(img, width, height)
+        info = {
+            "format": img.format,
+            "mode": img.mode,
+            "width": source_size[0],
+            "height": source_size[1],
+            "decode_width": decode_size[0],
+            "decode_height": decode_size[1],
+            "decode_bytes": estimate_decode_bytes(
+                decode_size[0], decode_size[1], img.mode
+            ),
+        }
+    if info["decode_width"] * info["decode_height"] > settings.IMAGE_MAX_PIXELS:
+        raise ImageTooLargeError(
+            f"Image is {info['width']}x{info['height']} pixels, "
+            f"limit is {settings.IMAGE_MAX_PIXELS} pixels."
+        )
+    return info
+
 
 def transform_image(
     input_path: str,
@@ -21,9 +129,18 @@ def transform_image(
     :param crop: If True, crop the image to the specified width and height.
     :param format: Desired output format (e.g., 'JPEG', 'PNG'). If None, keeps original format.
     :param quality: Quality of the output image (1-100, default is 80).
+    :raises ImageTooLargeError: If the image exceeds IMAGE_MAX_PIXELS even after draft.
     """
-    with Image.open(input_path) as img:
+    with open_image(input_path) as img:
         orig_format = img.format
+        # Crops are in source coordinates, so only draft when resizing.
+        if not crop:
+            _draft_size(img, width, height)
+        if img.width * img.height > settings.IMAGE_MAX_PIXELS:
+            raise ImageTooLargeError(
+                f"Image is {img.width}x{img.height} pixels, "
+                f"limit is {settings.IMAGE_MAX_PIXELS} pixels."
+            )
         if width and height:
             if crop:
                 img = img.crop((0, 0, width, height))
@@ -32,4 +149,3 @@ def transform_image(
         elif width or height:
             img.thumbnail((width or img.width, height or img.height))
         img.save(output_path, format=format or orig_format, quality=quality)
-
@@ -0,0 +1,138 @@
+# utils/lifecycle.py
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import (
+    Asset,
+    AssetFingerprint,
+    AssetPermission,
+    AssetVersion,
+    ASSET_DELETED,
+    ASSET_PURGING,
+)
+from storage.factory import get_storage, asset_key
+from utils.acl import acl_cache
+from utils.es_indexing import bulk_delete_asset_index
+from utils.tags import sync_asset_tags
+
+
+def asset_blob_keys(db: Session, asset_ids: List[str]) -> List[str]:
+    """
+    Storage keys of every blob belonging to the given assets: the original
+    upload plus every stored version.
+    """
+    keys = {asset_key(asset_id) for asset_id in asset_ids}
+    if asset_ids:
+        keys.update(
+            key
+            for (key,) in db.query(AssetVersion.blob_key).filter(
+                AssetVersion.asset_id.in_(asset_ids)
+            )
+        )
+    return sorted(keys)
+
+
+def purge_batch(db: Session, rows: List[tuple]) -> int:
+    """
+    Hard-delete one batch of soft-deleted assets from storage, Elasticsearch
+    and MySQL. The rows are first claimed (state deleted -> purging, committed)
+    so a restore racing the purge either wins before the claim or gets a 409;
+    external data is deleted only for the rows actually claimed. If a later
+    step fails, the rows stay in the purging state and the next run retries.
+    :param rows: (asset_id, tenant_id) pairs.
+    :return: Number of assets purged.
+    """
+    candidates = [r[0] for r in rows]
+    db.query(Asset).filter(
+        Asset.id.in_(candidates), Asset.state.in_([ASSET_DELETED, ASSET_PURGING])
+    ).execution_options(row_cache_keys=candidates).update(
+        {Asset.state: ASSET_PURGING}, synchronize_session=False
+    )
+    db.commit()
+    rows = (
+        db.query(Asset.id, Asset.tenant_id)
+        .filter(Asset.id.in_(candidates), Asset.state == ASSET_PURGING)
+        .all()
+    )
+    if not rows:
+        return 0
+    asset_ids = [r[0] for r in rows]
+    get_storage().delete_many(asset_blob_keys(db, asset_ids))
+    bulk_delete_asset_index(asset_ids)
+    by_tenant = defaultdict(list)
+    for asset_id, tenant_id in rows:
+        by_tenant[tenant_id].append(asset_id)
+    for tenant_id, ids in by_tenant.items():
+        # Drops the asset_tags links and decrements tag usage counts
+        sync_asset_tags(db, tenant_id, {asset_id: [] for asset_id in ids})
+    db.query(AssetFingerprint).filter(AssetFingerprint.asset_id.in_(asset_ids)).delete(
+        synchronize_session=False
+    )
+    db.query(AssetVersion).filter(AssetVersion.asset_id.in_(asset_ids)).delete(
+        synchronize_session=False
+    )
+    db.query(AssetPermission).filter(AssetPermission.asset_id.in_(asset_ids)).delete(
+        synchronize_session=False
+    )
+    db.query(Asset).filter(
+        Asset.id.in_(asset_ids), Asset.state == ASSET_PURGING
+    ).execution_options(row_cache_keys=asset_ids).delete(synchronize_session=False)
+    db.commit()
+    acl_cache.invalidate(asset_ids)
+    return len(asset_ids)
+
+
+def purge_expired_assets(
+    db: Session,
+    older_than_days: int = None,
+    batch_size: int = None,
+    duty_cycle: float = None,
+    max_batches: int = None,
+) -> int:
+    """
+    Hard-delete assets soft-deleted more than `older_than_days` ago.
+    Works in small batches and sleeps between them so the purger is busy at
+    most `duty_cycle` of the wall time (a batch that took 1s with duty cycle
+    0.2 is followed by a 4s pause). Slow batches, such as under heavy live
+    load, get longer pauses too.
+    :return: Number of assets purged.
+    """
+    if older_than_days is None:
+        older_than_days = settings.ASSET_PURGE_AFTER_DAYS
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    duty_cycle = duty_cycle or settings.PURGE_DUTY_CYCLE
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = (
+            db.query(Asset.id, Asset.tenant_id)
+            .filter(
+                # Purging rows were claimed by a run that failed midway
+                or_(
+                    Asset.state == ASSET_PURGING,
+                    and_(Asset.state == ASSET_DELETED, Asset.deleted_at < cutoff),
+                )
+            )
+            .order_by(Asset.deleted_at)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        start = time.monotonic()
+        try:
+            total += purge_batch(db, rows)
+        except Exception as e:
+            db.rollback()
+            print(f"Purge batch failed: {e}")
+            break
+        batches += 1
+        elapsed = time.monotonic() - start
+        time.sleep(elapsed * (1 - duty_cycle) / duty_cycle)
+    return total
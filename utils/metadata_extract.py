@@ -0,0 +1,287 @@
+# utils/metadata_extract.py
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from db import tenant_session
+from models import Asset, ASSET_GONE
+from storage.factory import get_storage
+from utils.es_indexing import bulk_update_asset_index
+from utils.image_transform import open_image
+from utils.projection import metainfo_has
+from utils.transform_scheduler import QueueFull, transform_scheduler
+from utils.versions import blob_keys
+
+logger = logging.getLogger(__name__)
+
+MAX_XMP_BYTES = 64 * 1024  # larger packets are dropped, not truncated
+
+
+def _jsonable(value):
+    """
+    Convert EXIF/IPTC values into JSON-serializable types.
+    """
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace").rstrip("\x00")
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, (int, float, str, bool)) or value is None:
+        return value
+    # IFDRational and friends
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def extract_image_metadata(input_path: str) -> dict:
+    """
+    Read dimensions, color profile, EXIF, IPTC and XMP from an image header.
+    Pillow's open() only parses the header, so no pixel data is decoded.
+    :param input_path: Path to the image file.
+    :return: Dict of technical metadata.
+    """
+    from PIL import ExifTags, IptcImagePlugin
+
+    with open_image(input_path) as img:
+        meta = {
+            "format": img.format,
+            "width": img.width,
+            "height": img.height,
+            "mode": img.mode,
+            "frames": getattr(img, "n_frames", 1),
+            "has_icc_profile": bool(img.info.get("icc_profile")),
+        }
+        exif = img.getexif()
+        if exif:
+            meta["exif"] = {
+                ExifTags.TAGS.get(tag, str(tag)): _jsonable(value)
+                for tag, value in exif.items()
+                if tag in ExifTags.TAGS
+            }
+        iptc = IptcImagePlugin.getiptcinfo(img)
+        if iptc:
+            meta["iptc"] = {f"{k[0]}:{k[1]}": _jsonable(v) for k, v in iptc.items()}
+        xmp = img.info.get("xmp") or img.info.get("XML:com.adobe.xmp")
+        if xmp and len(xmp) <= MAX_XMP_BYTES:
+            meta["xmp"] = _jsonable(xmp)
+    return meta
+
+
+def extract_pdf_metadata(input_path: str) -> dict:
+    """
+    Read page count, page size and document info from a PDF via pdfinfo.
+    :param input_path: Path to the PDF file.
+    :return: Dict of technical metadata.
+    """
+    from pdf2image import pdfinfo_from_path
+
+    info = pdfinfo_from_path(input_path)
+    meta = {"pages": info.get("Pages"), "page_size": info.get("Page size")}
+    for key in ("Title", "Author", "Creator", "Producer", "CreationDate"):
+        if info.get(key):
+            meta[key.lower()] = info[key]
+    return meta
+
+
+def extract_video_metadata(input_path: str) -> dict:
+    """
+    Read duration, codecs and dimensions from a video via ffprobe.
+    :param input_path: Path to the video file.
+    :return: Dict of technical metadata.
+    """
+    import ffmpeg
+
+    probe = ffmpeg.probe(input_path)
+    fmt = probe.get("format", {})
+    meta = {
+        "container": fmt.get("format_name"),
+        "duration": float(fmt["duration"]) if fmt.get("duration") else None,
+        "bit_rate": int(fmt["bit_rate"]) if fmt.get("bit_rate") else None,
+    }
+    for stream in probe.get("streams", []):
+        if stream.get("codec_type") == "video" and "video_codec" not in meta:
+            meta["video_codec"] = stream.get("codec_name")
+            meta["width"] = stream.get("width")
+            meta["height"] = stream.get("height")
+            meta["frame_rate"] = stream.get("avg_frame_rate")
+        elif stream.get("codec_type") == "audio" and "audio_codec" not in meta:
+            meta["audio_codec"] = stream.get("codec_name")
+    return meta
+
+
+def extract_metadata(input_path: str, mimetype: str) -> Optional[dict]:
+    """
+    Dispatch to the extractor for a MIME type.
+    :return: Dict of technical metadata, or None for unsupported types.
+    """
+    if mimetype.startswith("image/"):
+        return extract_image_metadata(input_path)
+    if mimetype == "application/pdf":
+        return extract_pdf_metadata(input_path)
+    if mimetype.startswith("video/"):
+        return extract_video_metadata(input_path)
+    return None
+
+
+def _extract_one(asset: Asset, key: str, tmpdir: str) -> Optional[dict]:
+    local_path = os.path.join(tmpdir, asset.id)
+    try:
+        get_storage().download(key, local_path)
+        return extract_metadata(local_path, asset.mimetype)
+    except Exception:
+        logger.exception("Metadata extraction failed for asset %s", asset.id)
+        return None
+    finally:
+        if os.path.exists(local_path):
+            os.remove(local_path)
+
+
+def store_technical(
+    db: Session, assets: List[Asset], results: List[Optional[dict]]
+) -> int:
+    """
+    Write extracted metadata to metainfo['technical'] with one UPDATE that
+    sets only that key (JSON_SET), so metadata edited while the files were
+    being read is kept. Rows whose version changed meanwhile are skipped:
+    their technical metadata belongs to the new content. Commits the session
+    and merges the same key into the Elasticsearch documents.
+    :return: Number of assets updated.
+    """
+    extracted: Dict[str, dict] = {}
+    versions = {}
+    for asset, technical in zip(assets, results):
+        if technical is not None:
+            extracted[asset.id] = technical
+            versions[asset.id] = asset.version
+    if not extracted:
+        return 0
+    # JSON_EXTRACT(<text>, '$') parses the text as a JSON document, like
+    # CAST(<text> AS JSON), but also inside a CASE
+    technical = func.JSON_EXTRACT(
+        case({k: json.dumps(v) for k, v in extracted.items()}, value=Asset.id), "$"
+    )
+    current = (
+        Asset.id.in_(list(extracted)),
+        Asset.version == case(versions, value=Asset.id),
+    )
+    db.execute(
+        update(Asset)
+        .where(*current)
+        .values(
+            metainfo=func.JSON_SET(
+                func.COALESCE(Asset.metainfo, func.JSON_OBJECT()),
+                "$.technical",
+                technical,
+            )
+        )
+        .execution_options(
+            synchronize_session=False, row_cache_keys=list(extracted)
+        )
+    )
+    # The UPDATE holds the rows' locks, so this reads what it changed
+    updated = db.execute(select(Asset.id).where(*current)).scalars().all()
+    db.commit()
+    bulk_update_asset_index(
+        {k: {"metainfo": {"technical": extracted[k]}} for k in updated}
+    )
+    return len(updated)
+
+
+def extract_batch(db: Session, assets: List[Asset], pool: ThreadPoolExecutor) -> int:
+    """
+    Extract metadata for a batch of assets in the worker pool and write the
+    results back with one UPDATE and one Elasticsearch bulk request.
+    Commits the session.
+    :return: Number of assets updated.
+    """
+    keys = blob_keys(db, [(a.id, a.version) for a in assets])
+    with tempfile.TemporaryDirectory() as tmpdir:
+        results = list(
+            pool.map(lambda a: _extract_one(a, keys[a.id], tmpdir), assets)
+        )
+    return store_technical(db, assets, results)
+
+
+def extract_version(tenant_id: str, asset_id: str, version: int):
+    """
+    Extract metadata for one freshly uploaded version. Does nothing if the
+    asset has moved on to another version or was deleted in the meantime.
+    """
+    db = tenant_session(tenant_id)
+    try:
+        asset = (
+            db.query(Asset)
+            .filter(
+                Asset.id == asset_id,
+                Asset.tenant_id == tenant_id,
+                Asset.version == version,
+                Asset.state.notin_(ASSET_GONE),
+            )
+            .first()
+        )
+        if asset is None:
+            return
+        key = blob_keys(db, [(asset.id, asset.version)])[asset.id]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            technical = _extract_one(asset, key, tmpdir)
+        store_technical(db, [asset], [technical])
+    except Exception:
+        db.rollback()
+        logger.exception("Metadata extraction failed for asset %s", asset_id)
+    finally:
+        db.close()
+
+
+def enqueue_extraction(tenant_id: str, asset_id: str, version: int):
+    """
+    Extract a new version's metadata in the background, on the transform
+    workers at background priority. If the tenant's queue is full the version
+    is left for the extract_metadata.py backfill, which picks up every asset
+    without metainfo['technical'].
+    """
+    try:
+        transform_scheduler.submit(
+            tenant_id,
+            lambda: extract_version(tenant_id, asset_id, version),
+            priority="background",
+        )
+    except QueueFull:
+        logger.warning("Metadata extraction for %s left to the backfill", asset_id)
+
+
+def run_extraction(
+    db: Session,
+    tenant_id: str = None,
+    batch_size: int = 500,
+    workers: int = 8,
+    only_missing: bool = True,
+) -> int:
+    """
+    Walk assets in primary-key order and extract metadata batch by batch.
+    :param only_missing: Skip assets that already have metainfo['technical'].
+    :return: Total number of assets updated.
+    """
+    last_id = ""
+    total = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            query = db.query(Asset).filter(Asset.id > last_id)
+            if tenant_id:
+                query = query.filter(Asset.tenant_id == tenant_id)
+            if only_missing:
+                # Filtered in SQL so already-extracted rows are not fetched
+                query = query.filter(~metainfo_has("technical"))
+            batch = query.order_by(Asset.id).limit(batch_size).all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+            total += extract_batch(db, batch, pool)
+            db.expunge_all()
+    return total
@@ -0,0 +1,215 @@
+# utils/metadata_schema.py
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import MetadataSchema
+
+FIELD_TYPES = ("string", "integer", "number", "boolean", "date", "enum", "list")
+
+_DATE_RE = re.compile(
+    r"^\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?)?$"
+)
+
+
+class SchemaDefinitionError(ValueError):
+    """
+    Raised when a schema definition cannot be compiled.
+    """
+
+    pass
+
+
+def _compile_field(name: str, spec: dict) -> Callable[[object], Optional[str]]:
+    """
+    Build a checker for one field. The checker returns an error message or None.
+    All per-field work (type lookup, regex, choice sets) happens here, once.
+    """
+    ftype = spec.get("type", "string")
+    if ftype not in FIELD_TYPES:
+        raise SchemaDefinitionError(f"Field '{name}': unknown type '{ftype}'")
+    max_length = spec.get("max_length")
+    minimum = spec.get("min")
+    maximum = spec.get("max")
+
+    if ftype == "string":
+        try:
+            pattern = re.compile(spec["pattern"]) if spec.get("pattern") else None
+        except re.error as e:
+            raise SchemaDefinitionError(f"Field '{name}': invalid pattern: {e}")
+
+        def check(v):
+            if not isinstance(v, str):
+                return "must be a string"
+            if max_length is not None and len(v) > max_length:
+                return f"must be at most {max_length} characters"
+            if pattern is not None and not pattern.match(v):
+                return "does not match pattern"
+
+    elif ftype in ("integer", "number"):
+        accepted = int if ftype == "integer" else (int, float)
+        type_error = "must be an integer" if ftype == "integer" else "must be a number"
+
+        def check(v):
+            if isinstance(v, bool) or not isinstance(v, accepted):
+                return type_error
+            if minimum is not None and v < minimum:
+                return f"must be >= {minimum}"
+            if maximum is not None and v > maximum:
+                return f"must be <= {maximum}"
+
+    elif ftype == "boolean":
+
+        def check(v):
+            if not isinstance(v, bool):
+                return "must be a boolean"
+
+    elif ftype == "date":
+
+        def check(v):
+            if not isinstance(v, str) or not _DATE_RE.match(v):
+                return "must be an ISO 8601 date"
+
+    elif ftype == "enum":
+        choices = frozenset(spec.get("choices") or ())
+        if not choices:
+            raise SchemaDefinitionError(f"Field '{name}': enum needs 'choices'")
+
+        def check(v):
+            if not isinstance(v, (str, int)) or v not in choices:
+                return "is not an allowed choice"
+
+    else:  # list of strings
+
+        def check(v):
+            if not isinstance(v, list) or not all(isinstance(i, str) for i in v):
+                return "must be a list of strings"
+            if max_length is not None and len(v) > max_length:
+                return f"must have at most {max_length} items"
+
+    return check
+
+
+class CompiledSchema:
+    """
+    A metadata schema compiled into per-field checker closures.
+    Validating a document is a dict walk with no model construction.
+    """
+
+    __slots__ = ("name", "version", "checks", "required", "allow_extra")
+
+    def __init__(
+        self, name: str, version: int, fields: dict, allow_extra: bool = True
+    ):
+        self.name = name
+        self.version = version
+        self.checks = {
+            fname: _compile_field(fname, spec or {}) for fname, spec in fields.items()
+        }
+        self.required = frozenset(
+            fname for fname, spec in fields.items() if (spec or {}).get("required")
+        )
+        self.allow_extra = allow_extra
+
+    def validate(self, values: dict, partial: bool = False) -> Dict[str, str]:
+        """
+        Validate a metadata document.
+        :param values: The metadata values to check.
+        :param partial: If True (a patch), required fields may be missing.
+        :return: Mapping of field name to error message; empty if valid.
+        """
+        if not isinstance(values, dict):
+            return {"__root__": "must be an object"}
+        errors = {}
+        checks = self.checks
+        for key, value in values.items():
+            check = checks.get(key)
+            if check is None:
+                if not self.allow_extra:
+                    errors[key] = "is not allowed"
+                continue
+            if value is None:
+                if key in self.required:
+                    errors[key] = "is required"
+                continue
+            error = check(value)
+            if error:
+                errors[key] = error
+        if not partial:
+            for key in self.required:
+                if key not in values:
+                    errors[key] = "is required"
+        return errors
+
+
+def compile_schema(schema: MetadataSchema) -> CompiledSchema:
+    """
+    Compile a stored schema. Raises SchemaDefinitionError on invalid definitions.
+    """
+    return CompiledSchema(
+        schema.name, schema.version, schema.fields or {}, schema.allow_extra
+    )
+
+
+# (tenant_id, name) -> (schema row id, CompiledSchema). The row id tells a
+# schema apart from a deleted one that had the same name and version.
+_cache: Dict[Tuple[str, str], Tuple[str, CompiledSchema]] = {}
+_cache_lock = threading.Lock()
+
+
+def invalidate_schema(tenant_id: str, name: str):
+    """
+    Drop a compiled schema from this process's cache.
+    """
+    with _cache_lock:
+        _cache.pop((tenant_id, name), None)
+
+
+def get_compiled_schema(
+    db: Session, tenant_id: str, name: str
+) -> Optional[CompiledSchema]:
+    """
+    Return the compiled validator for a tenant's schema, or None if it does not exist.
+    Only the schema's id and version are read on a cache hit; the definition is
+    loaded and compiled again only when another worker has changed or replaced it.
+    """
+    row = (
+        db.query(MetadataSchema.id, MetadataSchema.version)
+        .filter(MetadataSchema.tenant_id == tenant_id, MetadataSchema.name == name)
+        .first()
+    )
+    if row is None:
+        invalidate_schema(tenant_id, name)
+        return None
+    cached = _cache.get((tenant_id, name))
+    if cached is not None and (cached[0], cached[1].version) == (row.id, row.version):
+        return cached[1]
+    schema = (
+        db.query(MetadataSchema)
+        .filter(MetadataSchema.tenant_id == tenant_id, MetadataSchema.name == name)
+        .first()
+    )
+    if schema is None:
+        return None
+    compiled = compile_schema(schema)
+    with _cache_lock:
+        _cache[(tenant_id, name)] = (schema.id, compiled)
+    return compiled
+
+
+def validate_many(
+    compiled: CompiledSchema, documents: List[dict], partial: bool = False
+) -> List[Tuple[int, Dict[str, str]]]:
+    """
+    Validate many documents against one compiled schema.
+    :return: List of (index, errors) for the invalid documents only.
+    """
+    validate = compiled.validate
+    failures = []
+    for i, doc in enumerate(documents):
+        errors = validate(doc, partial)
+        if errors:
+            failures.append((i, errors))
+    return failures
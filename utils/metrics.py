@@ -0,0 +1,265 @@
+# utils/metrics.py
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import settings
+
+# Latency buckets in seconds (upper bounds); +Inf is implicit.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Queued transforms a tenant needs before it gets its own queue wait series,
+# and how many unlabelled tenants are counted before the counts start over.
+QUEUE_WAIT_PROMOTE_AFTER = 100
+QUEUE_WAIT_MAX_CANDIDATES = 10_000
+OTHER_TENANTS = "other"
+
+# Per-request accumulated time per phase ('db', 'storage', 'transform').
+# The dict is created by the middleware and shared with threadpool workers,
+# since Starlette copies the context into run_in_threadpool.
+_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("phases", default=None)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Buckets are stored non-cumulative and summed at
+    render time, so an observation is one bisect and two additions.
+    """
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Process-local request metrics.
+    All writes happen on the event loop thread (MetricsMiddleware, awaited
+    transform jobs), so there is a single writer and no lock on the hot path.
+    Each uvicorn worker keeps its own registry.
+    """
+
+    def __init__(self, queue_wait_tenants: int = 20):
+        # (method, route, status) -> count
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        # (method, route) -> Histogram
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        # (phase, route) -> Histogram
+        self.phases: Dict[Tuple[str, str], Histogram] = {}
+        # (priority, tenant label) -> Histogram of transform queue waits.
+        # Only the busiest `queue_wait_tenants` tenants get their own label;
+        # everyone else shares "other", so series stay bounded.
+        self.queue_wait: Dict[Tuple[str, str], Histogram] = {}
+        self.queue_wait_tenants = queue_wait_tenants
+        self.wait_labelled: set = set()
+        self.wait_candidates: Dict[str, int] = {}
+        self.in_flight = 0
+        self.gauges: List[Tuple[str, str, Callable[[], Dict[str, float]]]] = []
+
+    def observe_request(
+        self, method: str, route: str, status: int, seconds: float, phases: dict
+    ):
+        key = (method, route, str(status))
+        self.requests[key] = self.requests.get(key, 0) + 1
+        hist = self.latency.get((method, route))
+        if hist is None:
+            hist = self.latency[(method, route)] = Histogram()
+        hist.observe(seconds)
+        for phase, spent in phases.items():
+            hist = self.phases.get((phase, route))
+            if hist is None:
+                hist = self.phases[(phase, route)] = Histogram()
+            hist.observe(spent)
+
+    def observe_queue_wait(self, tenant_id: str, priority: str, seconds: float):
+        key = (priority, self._wait_label(tenant_id))
+        hist = self.queue_wait.get(key)
+        if hist is None:
+            hist = self.queue_wait[key] = Histogram()
+        hist.observe(seconds)
+
+    def _wait_label(self, tenant_id: str) -> str:
+        """
+        Tenant label for a queue wait. A tenant is promoted to its own label,
+        for good, once it has queued QUEUE_WAIT_PROMOTE_AFTER transforms while
+        label slots remain; its earlier waits stay counted under "other".
+        """
+        if tenant_id in self.wait_labelled:
+            return tenant_id
+        if len(self.wait_labelled) >= self.queue_wait_tenants:
+            return OTHER_TENANTS
+        seen = self.wait_candidates.get(tenant_id, 0) + 1
+        if seen >= QUEUE_WAIT_PROMOTE_AFTER:
+            self.wait_labelled.add(tenant_id)
+            del self.wait_candidates[tenant_id]
+            return tenant_id
+        if len(self.wait_candidates) >= QUEUE_WAIT_MAX_CANDIDATES:
+            self.wait_candidates.clear()
+        self.wait_candidates[tenant_id] = seen
+        return OTHER_TENANTS
+
+    def register_gauge(
+        self, name: str, help_text: str, fn: Callable[[], Dict[str, float]]
+    ):
+        """
+        Register a gauge read at scrape time.
+        :param fn: Returns a mapping of label value (for label 'key') to value.
+        """
+        self.gauges.append((name, help_text, fn))
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP dam_http_requests_total HTTP requests by route and status.",
+            "# TYPE dam_http_requests_total counter",
+        ]
+        for (method, route, status), n in sorted(self.requests.items()):
+            lines.append(
+                f'dam_http_requests_total{{method="{method}",route="{_esc(route)}",'
+                f'status="{status}"}} {n}'
+            )
+        lines += [
+            "# HELP dam_http_requests_in_flight Requests currently being served.",
+            "# TYPE dam_http_requests_in_flight gauge",
+            f"dam_http_requests_in_flight {self.in_flight}",
+            "# HELP dam_http_request_duration_seconds Request latency.",
+            "# TYPE dam_http_request_duration_seconds histogram",
+        ]
+        for (method, route), hist in sorted(self.latency.items()):
+            labels = f'method="{method}",route="{_esc(route)}"'
+            lines += _histogram_lines("dam_http_request_duration_seconds", labels, hist)
+        lines += [
+            "# HELP dam_request_phase_seconds Time per request spent in DB,"
+            " storage I/O and transforms.",
+            "# TYPE dam_request_phase_seconds histogram",
+        ]
+        for (phase, route), hist in sorted(self.phases.items()):
+            labels = f'phase="{phase}",route="{_esc(route)}"'
+            lines += _histogram_lines("dam_request_phase_seconds", labels, hist)
+        lines += [
+            "# HELP dam_transform_queue_wait_seconds Time transforms spent queued.",
+            "# TYPE dam_transform_queue_wait_seconds histogram",
+        ]
+        for (priority, tenant), hist in sorted(self.queue_wait.items()):
+            labels = f'priority="{priority}",tenant="{_esc(tenant)}"'
+            lines += _histogram_lines("dam_transform_queue_wait_seconds", labels, hist)
+        for name, help_text, fn in self.gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            try:
+                values = fn()
+            except Exception:
+                continue
+            for key, value in sorted(values.items()):
+                lines.append(f'{name}{{key="{_esc(key)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def _esc(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_lines(name: str, labels: str, hist: Histogram) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, n in zip(LATENCY_BUCKETS, hist.counts):
+        cumulative += n
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+    lines.append(f"{name}_sum{{{labels}}} {hist.sum}")
+    lines.append(f"{name}_count{{{labels}}} {hist.count}")
+    return lines
+
+
+registry = MetricsRegistry(settings.TRANSFORM_WAIT_TENANT_SERIES)
+
+
+def add_phase_time(phase: str, seconds: float):
+    """
+    Add time to a phase of the current request. No-op outside a request.
+    """
+    phases = _phases.get()
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase: str):
+    """
+    Time a block and add it to the current request's phase total.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase_time(phase, time.perf_counter() - start)
+
+
+def instrument_engine(engine):
+    """
+    Attribute SQL execution time to the 'db' phase of the current request.
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        add_phase_time("db", time.perf_counter() - conn.info["query_start"].pop())
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route request counts, status codes,
+    latency and phase timings. Routes are labelled by their template
+    (e.g. '/assets/{id}') to keep label cardinality bounded.
+    It also feeds the per-tenant API usage counters used by /reports/api;
+    the tenant is read from request.state, set by get_current_user.
+    """
+
+    def __init__(self, app, usage_counters=None):
+        self.app = app
+        self.usage_counters = usage_counters
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+        phases = {}
+        token = _phases.set(phases)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        registry.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            registry.in_flight -= 1
+            _phases.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path_format", None) or "<unmatched>"
+            method = scope["method"]
+            registry.observe_request(method, path, status_code, elapsed, phases)
+            tenant_id = scope.get("state", {}).get("tenant_id")
+            if self.usage_counters is not None and tenant_id:
+                self.usage_counters.record_api(tenant_id, f"{method} {path}")
@@ -0,0 +1,496 @@
+# utils/migrations.py
+import math
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import UniqueConstraint, bindparam, inspect, insert, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from config import settings
+from models import Asset, AssetVersion, SchemaMigration, Tag
+
+
+class MigrationError(RuntimeError):
+    pass
+
+
+def is_mysql(conn: Connection) -> bool:
+    return conn.dialect.name == "mysql"
+
+
+def table_stats(conn: Connection, table: str) -> dict:
+    """
+    Approximate row count and on-disk size of a table. On MySQL these come from
+    information_schema (no table scan); elsewhere rows are counted and sizes
+    are unknown.
+    """
+    if is_mysql(conn):
+        row = conn.execute(
+            text(
+                "SELECT TABLE_ROWS, DATA_LENGTH, INDEX_LENGTH "
+                "FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t"
+            ),
+            {"t": table},
+        ).first()
+        if row is None:
+            return {"rows": 0, "data_mb": 0.0, "index_mb": 0.0}
+        return {
+            "rows": int(row[0] or 0),
+            "data_mb": (row[1] or 0) / 2**20,
+            "index_mb": (row[2] or 0) / 2**20,
+        }
+    rows = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+    return {"rows": int(rows), "data_mb": None, "index_mb": None}
+
+
+def scan_seconds(megabytes: Optional[float]) -> Optional[float]:
+    if megabytes is None:
+        return None
+    return megabytes / settings.MIGRATION_SCAN_MB_PER_SEC
+
+
+class Operation(ABC):
+    """
+    One idempotent schema or data change on a model's table. Operations check
+    the live schema before running, so a migration interrupted halfway (or run
+    against tables that create_all already built from models.py) resumes
+    without repeating work.
+    """
+
+    def __init__(self, model):
+        self.table = model.__table__
+
+    @abstractmethod
+    def describe(self) -> str:
+        pass
+
+    def is_applied(self, conn: Connection) -> bool:
+        return False
+
+    def statements(self, conn: Connection, online: bool = True) -> List[str]:
+        return []
+
+    @abstractmethod
+    def estimate(self, conn: Connection, stats: dict) -> dict:
+        """
+        :return: {"method", "seconds" (None if unknown), "note"}
+        """
+
+    def apply(self, conn: Connection, online: bool = True):
+        for statement in self.statements(conn, online):
+            conn.execute(text(statement))
+        conn.commit()
+
+
+class AddColumn(Operation):
+    """
+    Add a column as declared on the model. On MySQL this is tried as an INSTANT
+    (metadata-only) change first, then as an INPLACE rebuild with LOCK=NONE,
+    which rewrites the table but keeps it readable and writable.
+    """
+
+    def __init__(self, model, name: str):
+        super().__init__(model)
+        self.column = self.table.c[name]
+
+    def describe(self) -> str:
+        return f"add column {self.table.name}.{self.column.name}"
+
+    def is_applied(self, conn: Connection) -> bool:
+        columns = inspect(conn).get_columns(self.table.name)
+        return any(c["name"] == self.column.name for c in columns)
+
+    def statements(self, conn: Connection, online: bool = True) -> List[str]:
+        ddl = CreateColumn(self.column).compile(dialect=conn.dialect)
+        statement = f"ALTER TABLE {self.table.name} ADD COLUMN {ddl}"
+        if online and is_mysql(conn):
+            return [
+                f"{statement}, ALGORITHM=INSTANT",
+                f"{statement}, ALGORITHM=INPLACE, LOCK=NONE",
+            ]
+        return [statement]
+
+    def apply(self, conn: Connection, online: bool = True):
+        # Alternatives in order of preference; the first one the server accepts
+        # wins. MySQL rejects an ALGORITHM/LOCK it cannot honour rather than
+        # silently taking a table lock.
+        *preferred, last = self.statements(conn, online)
+        for statement in preferred:
+            try:
+                conn.execute(text(statement))
+                conn.commit()
+                return
+            except DBAPIError:
+                conn.rollback()
+        conn.execute(text(last))
+        conn.commit()
+
+    def estimate(self, conn: Connection, stats: dict) -> dict:
+        if not is_mysql(conn):
+            return {"method": "ALTER", "seconds": None, "note": ""}
+        rebuild = scan_seconds(stats["data_mb"] + stats["index_mb"])
+        return {
+            "method": "INSTANT",
+            "seconds": 0.0,
+            "note": f"INPLACE rebuild ~{rebuild:.0f}s if INSTANT is unsupported",
+        }
+
+
+class AddIndex(Operation):
+    """
+    Create an index (or unique constraint) declared on the model. On MySQL it
+    is built with ALGORITHM=INPLACE, LOCK=NONE: concurrent reads and writes
+    continue while the table is scanned and sorted.
+    """
+
+    def __init__(self, model, name: str):
+        super().__init__(model)
+        self.name = name
+        indexes = {i.name: i for i in self.table.indexes}
+        indexes.update({c.name: c for c in self.table.constraints if c.name})
+        if name not in indexes:
+            raise MigrationError(f"{self.table.name} declares no index {name}")
+        self.index = indexes[name]
+        self.unique = bool(getattr(self.index, "unique", True))
+        self.columns = [c.name for c in self.index.columns]
+
+    def describe(self) -> str:
+        kind = "unique index" if self.unique else "index"
+        return f"add {kind} {self.table.name}.{self.name}({', '.join(self.columns)})"
+
+    def is_applied(self, conn: Connection) -> bool:
+        inspector = inspect(conn)
+        names = {i["name"] for i in inspector.get_indexes(self.table.name)}
+        names |= {
+            c["name"] for c in inspector.get_unique_constraints(self.table.name)
+        }
+        return self.name in names
+
+    def statements(self, conn: Connection, online: bool = True) -> List[str]:
+        if not is_mysql(conn):
+            if self.unique:
+                columns = ", ".join(self.columns)
+                return [
+                    f"CREATE UNIQUE INDEX {self.name} "
+                    f"ON {self.table.name} ({columns})"
+                ]
+            return [str(CreateIndex(self.index).compile(dialect=conn.dialect))]
+        kind = "UNIQUE INDEX" if self.unique else "INDEX"
+        statement = (
+            f"ALTER TABLE {self.table.name} "
+            f"ADD {kind} {self.name} ({', '.join(self.columns)})"
+        )
+        if online:
+            statement += ", ALGORITHM=INPLACE, LOCK=NONE"
+        return [statement]
+
+    def estimate(self, conn: Connection, stats: dict) -> dict:
+        # Rough key width: declared string lengths (utf8mb4 worst case) plus
+        # the primary key every secondary index entry carries
+        columns = [self.table.c[c] for c in self.columns]
+        columns += list(self.table.primary_key.columns)
+        width = sum(getattr(c.type, "length", None) or 8 for c in columns)
+        index_mb = stats["rows"] * width * 4 / 2**20
+        return {
+            "method": "INPLACE, LOCK=NONE" if is_mysql(conn) else "CREATE INDEX",
+            "seconds": scan_seconds(stats["data_mb"]),
+            "note": f"new index up to ~{index_mb:.0f} MB",
+        }
+
+
+class Backfill(Operation):
+    """
+    Populate a column with an UPDATE run in primary-key batches. Each batch is
+    its own short transaction, followed by a pause, so row locks are held
+    briefly and replicas keep up. `where` limits the rows that still need the
+    update, which keeps a re-run cheap.
+    """
+
+    def __init__(self, model, assignments: str, where: str = "1 = 1"):
+        super().__init__(model)
+        (self.pk,) = self.table.primary_key.columns
+        self.assignments = assignments
+        self.where = where
+
+    def describe(self) -> str:
+        return f"backfill {self.table.name}: SET {self.assignments}"
+
+    def statements(self, conn: Connection, online: bool = True) -> List[str]:
+        return [
+            f"UPDATE {self.table.name} SET {self.assignments} "
+            f"WHERE {self.pk.name} IN (:batch) AND ({self.where})"
+        ]
+
+    def apply(self, conn: Connection, online: bool = True):
+        update = text(
+            f"UPDATE {self.table.name} SET {self.assignments} "
+            f"WHERE {self.pk.name} IN :ids AND ({self.where})"
+        ).bindparams(bindparam("ids", expanding=True))
+        last = None
+        while True:
+            # Keyset pagination: each batch seeks past the previous one instead
+            # of re-scanning rows that were already updated
+            query = select(self.pk).order_by(self.pk)
+            if last is not None:
+                query = query.where(self.pk > last)
+            query = query.limit(settings.MIGRATION_BATCH_SIZE)
+            ids = conn.execute(query).scalars().all()
+            if not ids:
+                break
+            conn.execute(update, {"ids": ids})
+            conn.commit()
+            last = ids[-1]
+            time.sleep(settings.MIGRATION_BATCH_PAUSE)
+
+    def estimate(self, conn: Connection, stats: dict) -> dict:
+        batches = math.ceil(stats["rows"] / settings.MIGRATION_BATCH_SIZE)
+        seconds = scan_seconds(stats["data_mb"])
+        if seconds is not None:
+            seconds += batches * settings.MIGRATION_BATCH_PAUSE
+        return {
+            "method": "batched UPDATE",
+            "seconds": seconds,
+            "note": f"{batches} batches of {settings.MIGRATION_BATCH_SIZE}",
+        }
+
+
+class MergeDuplicateTags(Operation):
+    """
+    Merge tags whose names are equal under the tags.name collation ("Beach"
+    and "beach") within a tenant, so the unique (tenant_id, name) index can be
+    built. The tag with the smallest id survives: the other tags' asset_tags
+    rows are moved to it, its usage_count is recounted, and the duplicates
+    are deleted. Grouping is done in SQL, so it matches the index exactly.
+    """
+
+    # Each duplicate with the tag that replaces it
+    DUPLICATES = (
+        "SELECT t.id AS dup, d.keep FROM tags t JOIN ("
+        "SELECT tenant_id, name, MIN(id) AS keep FROM tags "
+        "GROUP BY tenant_id, name HAVING COUNT(*) > 1"
+        ") d ON t.tenant_id = d.tenant_id AND t.name = d.name "
+        "WHERE t.id <> d.keep"
+    )
+    MERGE = [
+        "INSERT INTO asset_tags (asset_id, tag_id, tenant_id) "
+        "SELECT asset_id, :keep, tenant_id FROM asset_tags "
+        "WHERE tag_id = :dup AND asset_id NOT IN "
+        "(SELECT asset_id FROM asset_tags WHERE tag_id = :keep)",
+        "DELETE FROM asset_tags WHERE tag_id = :dup",
+        "DELETE FROM tags WHERE id = :dup",
+    ]
+    RECOUNT = (
+        "UPDATE tags SET usage_count = "
+        "(SELECT COUNT(*) FROM asset_tags WHERE asset_tags.tag_id = tags.id) "
+        "WHERE id IN :ids"
+    )
+
+    def __init__(self):
+        super().__init__(Tag)
+
+    def describe(self) -> str:
+        return "merge tags with duplicate names per tenant"
+
+    def is_applied(self, conn: Connection) -> bool:
+        return self.count(conn)[0] == 0
+
+    def count(self, conn: Connection):
+        """
+        :return: (tags that would be deleted, names they collapse into)
+        """
+        row = conn.execute(
+            text(
+                "SELECT COUNT(*), COUNT(DISTINCT keep) "
+                f"FROM ({self.DUPLICATES}) duplicates"
+            )
+        ).first()
+        return int(row[0]), int(row[1])
+
+    def statements(self, conn: Connection, online: bool = True) -> List[str]:
+        return [self.DUPLICATES] + self.MERGE + [self.RECOUNT]
+
+    def apply(self, conn: Connection, online: bool = True):
+        recount = text(self.RECOUNT).bindparams(bindparam("ids", expanding=True))
+        while True:
+            # Merged duplicates are gone, so each pass picks up the next batch
+            rows = conn.execute(
+                text(f"{self.DUPLICATES} LIMIT {settings.MIGRATION_BATCH_SIZE}")
+            ).all()
+            if not rows:
+                break
+            for row in rows:
+                for statement in self.MERGE:
+                    conn.execute(text(statement), {"dup": row.dup, "keep": row.keep})
+            conn.execute(recount, {"ids": sorted({row.keep for row in rows})})
+            conn.commit()
+            time.sleep(settings.MIGRATION_BATCH_PAUSE)
+
+    def estimate(self, conn: Connection, stats: dict) -> dict:
+        duplicates, names = self.count(conn)
+        return {
+            "method": "batched merge",
+            "seconds": scan_seconds(stats["data_mb"]),
+            "note": f"{duplicates} duplicate tags of {names} names to merge",
+        }
+
+
+class Migration:
+    def __init__(self, id: str, description: str, operations: List[Operation]):
+        self.id = id
+        self.description = description
+        self.operations = operations
+
+
+# Changes to tables that already exist in deployed databases, oldest first.
+# New tables need no entry: create_all builds them from models.py. Never edit
+# or reorder an entry once released; add a new one instead.
+MIGRATIONS = [
+    Migration(
+        "0001_asset_lifecycle",
+        "Lifecycle state on assets and the indexes that serve it",
+        [
+            AddColumn(Asset, "state"),
+            AddColumn(Asset, "archived_at"),
+            AddColumn(Asset, "deleted_at"),
+            AddIndex(Asset, "ix_assets_tenant_state_created"),
+            AddIndex(Asset, "ix_assets_state_deleted"),
+        ],
+    ),
+    Migration(
+        "0002_tag_usage_counts",
+        "Materialized tag usage counts and per-tenant tag name uniqueness",
+        [
+            AddColumn(Tag, "usage_count"),
+            Backfill(
+                Tag,
+                "usage_count = "
+                "(SELECT COUNT(*) FROM asset_tags WHERE asset_tags.tag_id = tags.id)",
+            ),
+            # Older releases created tags differing only in case or accents
+            MergeDuplicateTags(),
+            AddIndex(Tag, "uq_tags_tenant_name"),
+            AddIndex(Tag, "ix_tags_tenant_usage"),
+        ],
+    ),
+    Migration(
+        "0003_asset_versions_content_hash",
+        "Look up earlier uploads by content hash",
+        [AddIndex(AssetVersion, "ix_asset_versions_tenant_hash")],
+    ),
+    Migration(
+        "0004_asset_metainfo_columns",
+        "Indexed generated columns for frequently filtered metainfo keys",
+        [
+            # Virtual columns are metadata-only (INSTANT); only the index
+            # builds read the table
+            AddColumn(Asset, "meta_title"),
+            AddColumn(Asset, "meta_schema"),
+            AddColumn(Asset, "meta_width"),
+            AddColumn(Asset, "meta_height"),
+            AddIndex(Asset, "ix_assets_tenant_schema"),
+            AddIndex(Asset, "ix_assets_tenant_title"),
+            AddIndex(Asset, "ix_assets_tenant_dimensions"),
+        ],
+    ),
+]
+
+
+def applied_migrations(conn: Connection) -> set:
+    # Databases from before the migration runner have no schema_migrations
+    # table yet (create_all adds it, but --dry-run does not run create_all)
+    if not inspect(conn).has_table(SchemaMigration.__tablename__):
+        return set()
+    return set(conn.execute(select(SchemaMigration.id)).scalars())
+
+
+def pending_migrations(conn: Connection) -> List[Migration]:
+    done = applied_migrations(conn)
+    return [m for m in MIGRATIONS if m.id not in done]
+
+
+def estimate_migration(conn: Connection, migration: Migration) -> List[dict]:
+    """
+    Dry-run cost of each operation of a migration that still has work to do,
+    with the SQL it would run.
+    """
+    stats = {}
+    estimates = []
+    tables = set(inspect(conn).get_table_names())
+    for op in migration.operations:
+        if op.table.name not in tables or op.is_applied(conn):
+            continue
+        name = op.table.name
+        if name not in stats:
+            stats[name] = table_stats(conn, name)
+        estimate = op.estimate(conn, stats[name])
+        estimate.update(
+            {
+                "operation": op.describe(),
+                "rows": stats[name]["rows"],
+                "sql": op.statements(conn),
+            }
+        )
+        estimates.append(estimate)
+    return estimates
+
+
+def apply_migration(conn: Connection, migration: Migration, online: bool = True):
+    """
+    Run a migration's outstanding operations and record it as applied.
+    :param online: Require non-locking DDL on MySQL; with False the server may
+                   pick a locking algorithm (for maintenance windows).
+    """
+    if is_mysql(conn):
+        # Online DDL still needs a brief metadata lock at start and end; fail
+        # fast instead of queueing every query on the table behind it
+        timeout = settings.MIGRATION_LOCK_WAIT_TIMEOUT
+        conn.execute(text(f"SET SESSION lock_wait_timeout = {timeout}"))
+    # Shards only hold the tenant tables; operations on other tables are skipped
+    tables = set(inspect(conn).get_table_names())
+    for op in migration.operations:
+        if op.table.name not in tables or op.is_applied(conn):
+            continue
+        try:
+            op.apply(conn, online)
+        except DBAPIError as e:
+            conn.rollback()
+            raise MigrationError(f"{migration.id}: {op.describe()} failed: {e.orig}")
+    conn.execute(
+        insert(SchemaMigration).values(id=migration.id, applied_at=datetime.utcnow())
+    )
+    conn.commit()
+
+
+def schema_drift(conn: Connection, tables) -> List[str]:
+    """
+    Columns and indexes declared in models.py for `tables` but missing from the
+    database, i.e. model changes that still need a migration.
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in tables:
+        if table.name not in existing_tables:
+            missing.append(f"table {table.name}")
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        missing += [
+            f"column {table.name}.{c.name}"
+            for c in table.columns
+            if c.name not in columns
+        ]
+        indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        indexes |= {c["name"] for c in inspector.get_unique_constraints(table.name)}
+        declared = [i.name for i in table.indexes]
+        declared += [
+            c.name
+            for c in table.constraints
+            if isinstance(c, UniqueConstraint) and c.name
+        ]
+        missing += [f"index {table.name}.{n}" for n in declared if n not in indexes]
+    return missing
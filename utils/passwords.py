@@ -0,0 +1,24 @@
+# utils/passwords.py
+_pwd_context = None
+
+
+def get_pwd_context():
+    """
+    Return the shared bcrypt password context.
+    passlib and its bcrypt backend are imported on first use, so startup and
+    CLI tools that never hash a password do not load them.
+    """
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
+
+def get_password_hash(password: str) -> str:
+    return get_pwd_context().hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return get_pwd_context().verify(plain_password, hashed_password)
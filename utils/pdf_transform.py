@@ -1,9 +1,34 @@
 # utils/pdf_transform.py
-from pdf2image import convert_from_path
+
+# US Letter in points, used when the page size cannot be read.
+DEFAULT_PAGE_SIZE_PT = (612.0, 792.0)
+
+
+def estimate_render_bytes(input_path: str, page: int = 1, dpi: int = 200) -> int:
+    """
+    Estimate the memory needed to rasterize a PDF page as RGB.
+    Reads the page size from the PDF header via pdfinfo, no rendering.
+    :param input_path: Path to the input PDF file.
+    :param page: Page number (1-based).
+    :param dpi: Render resolution.
+    :return: Estimated number of bytes for the rendered bitmap.
+    """
+    from pdf2image import pdfinfo_from_path
+
+    width_pt, height_pt = DEFAULT_PAGE_SIZE_PT
+    try:
+        info = pdfinfo_from_path(input_path, first_page=page, last_page=page)
+        # e.g. "612 x 792 pts (letter)"
+        size = info.get("Page size", "").split()
+        width_pt, height_pt = float(size[0]), float(size[2])
+    except Exception:
+        pass
+    return int(width_pt / 72 * dpi) * int(height_pt / 72 * dpi) * 3
 
 
 def pdf_to_image(input_path: str, output_path: str, page: int = 1, dpi: int = 200):
+    from pdf2image import convert_from_path
+
     images = convert_from_path(input_path, dpi=dpi, first_page=page, last_page=page)
     if images:
         images[0].save(output_path, "JPEG")
-
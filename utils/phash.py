@@ -0,0 +1,98 @@
+# utils/phash.py
+import math
+import os
+import tempfile
+from statistics import median
+
+from utils.image_transform import open_image, pil_image, probe_image
+from utils.transform_admission import transform_admission
+from utils.video_transform import video_to_thumbnail
+
+_DCT_SIZE = 32  # image is reduced to 32x32 before the DCT
+_DCT_KEEP = 8  # top-left 8x8 low-frequency block -> 64-bit hash
+
+# Cosine table for the first _DCT_KEEP DCT-II basis functions.
+_DCT_COS = [
+    [math.cos(math.pi * (2 * x + 1) * u / (2 * _DCT_SIZE)) for x in range(_DCT_SIZE)]
+    for u in range(_DCT_KEEP)
+]
+
+
+def _phash(pixels) -> int:
+    """
+    Compute a 64-bit DCT perceptual hash from 32x32 grayscale pixels.
+    Only the low-frequency 8x8 block is computed (separable DCT).
+    """
+    n, k = _DCT_SIZE, _DCT_KEEP
+    rows = [pixels[i * n : (i + 1) * n] for i in range(n)]
+    # DCT along each row, keeping the first k coefficients: n x k
+    row_coeffs = [
+        [sum(c * p for c, p in zip(_DCT_COS[u], row)) for u in range(k)]
+        for row in rows
+    ]
+    # DCT down each of the k kept columns: k x k
+    coeffs = [
+        sum(_DCT_COS[v][y] * row_coeffs[y][u] for y in range(n))
+        for v in range(k)
+        for u in range(k)
+    ]
+    # The DC term dominates, so leave it out of the median.
+    threshold = median(coeffs[1:])
+    bits = 0
+    for c in coeffs:
+        bits = (bits << 1) | (c > threshold)
+    return bits
+
+
+def _dhash(pixels) -> int:
+    """
+    Compute a 64-bit difference hash from 9x8 grayscale pixels.
+    """
+    bits = 0
+    for y in range(8):
+        row = pixels[y * 9 : (y + 1) * 9]
+        for x in range(8):
+            bits = (bits << 1) | (row[x] > row[x + 1])
+    return bits
+
+
+def image_hashes(input_path: str) -> dict:
+    """
+    Compute pHash and dHash for an image file.
+    Large JPEGs are drafted down on decode; oversized images raise ImageTooLargeError.
+    :param input_path: Path to the image file.
+    :return: Dict with 'phash' and 'dhash' as unsigned 64-bit integers.
+    """
+    info = probe_image(input_path, _DCT_SIZE, _DCT_SIZE)
+    Image = pil_image()
+    with transform_admission.admit(info["decode_bytes"]):
+        with open_image(input_path) as img:
+            img.draft("L", (_DCT_SIZE, _DCT_SIZE))
+            gray = img.convert("L")
+            small = list(gray.resize((_DCT_SIZE, _DCT_SIZE), Image.LANCZOS).getdata())
+            tiny = list(gray.resize((9, 8), Image.LANCZOS).getdata())
+    return {"phash": _phash(small), "dhash": _dhash(tiny)}
+
+
+def fingerprint_file(input_path: str, mimetype: str):
+    """
+    Compute perceptual hashes for an image, or for the poster frame of a video.
+    :param input_path: Path to the asset file.
+    :param mimetype: MIME type of the asset.
+    :return: Dict with 'phash' and 'dhash', or None for unsupported types.
+    """
+    if mimetype.startswith("image/"):
+        return image_hashes(input_path)
+    if mimetype.startswith("video/"):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            poster = os.path.join(tmpdir, "poster.jpg")
+            video_to_thumbnail(input_path, poster, time=1.0)
+            return image_hashes(poster)
+    return None
+
+
+def hamming(a: int, b: int) -> int:
+    """
+    Number of differing bits between two hashes.
+    """
+    return bin(a ^ b).count("1")
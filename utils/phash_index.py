@@ -0,0 +1,160 @@
+# utils/phash_index.py
+from itertools import combinations
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from models import Asset, AssetFingerprint, ASSET_GONE
+from utils.phash import hamming
+
+# 64-bit hashes are split into 4 bands of 16 bits (multi-index hashing).
+# If two hashes differ in at most r bits, at least one band differs in at
+# most r // 4 bits, so a lookup only has to probe each band's neighbourhood.
+BANDS = 4
+BAND_BITS = 16
+BAND_MASK = (1 << BAND_BITS) - 1
+MAX_DISTANCE = 11  # keeps each band probe at <= 137 values
+
+
+def split_bands(h: int) -> List[int]:
+    """
+    Split a 64-bit hash into BANDS integers, most significant band first.
+    """
+    return [
+        (h >> (BAND_BITS * (BANDS - 1 - i))) & BAND_MASK for i in range(BANDS)
+    ]
+
+
+def band_neighbors(value: int, radius: int) -> Set[int]:
+    """
+    All band values within `radius` bits of `value`.
+    """
+    result = {value}
+    for r in range(1, radius + 1):
+        for bits in combinations(range(BAND_BITS), r):
+            flipped = value
+            for b in bits:
+                flipped ^= 1 << b
+            result.add(flipped)
+    return result
+
+
+def _band_probes(h: int, max_distance: int) -> List[Set[int]]:
+    if max_distance > MAX_DISTANCE:
+        raise ValueError(f"max_distance must be <= {MAX_DISTANCE}")
+    radius = max_distance // BANDS
+    return [band_neighbors(v, radius) for v in split_bands(h)]
+
+
+class MultiIndexHash:
+    """
+    In-memory near-duplicate index over 64-bit perceptual hashes.
+    Used to dedupe a batch (e.g. an import) against itself without
+    pairwise comparison.
+    """
+
+    def __init__(self):
+        self.hashes: Dict[str, int] = {}
+        self.buckets: List[Dict[int, Set[str]]] = [{} for _ in range(BANDS)]
+
+    def add(self, key: str, h: int):
+        self.remove(key)
+        self.hashes[key] = h
+        for i, v in enumerate(split_bands(h)):
+            self.buckets[i].setdefault(v, set()).add(key)
+
+    def remove(self, key: str):
+        h = self.hashes.pop(key, None)
+        if h is None:
+            return
+        for i, v in enumerate(split_bands(h)):
+            bucket = self.buckets[i].get(v)
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del self.buckets[i][v]
+
+    def query(self, h: int, max_distance: int = 6) -> List[Tuple[str, int]]:
+        """
+        Find keys whose hash is within `max_distance` bits of `h`.
+        :return: List of (key, distance), closest first.
+        """
+        candidates = set()
+        for i, values in enumerate(_band_probes(h, max_distance)):
+            bucket = self.buckets[i]
+            for v in values:
+                candidates.update(bucket.get(v, ()))
+        matches = []
+        for key in candidates:
+            d = hamming(h, self.hashes[key])
+            if d <= max_distance:
+                matches.append((key, d))
+        return sorted(matches, key=lambda m: m[1])
+
+    def __len__(self):
+        return len(self.hashes)
+
+
+def store_fingerprint(db: Session, asset_id: str, tenant_id: str, hashes: dict):
+    """
+    Insert or replace the fingerprint row for an asset. Does not commit.
+    :param hashes: Dict with 'phash' and 'dhash', as returned by fingerprint_file.
+    """
+    bands = split_bands(hashes["phash"])
+    db.merge(
+        AssetFingerprint(
+            asset_id=asset_id,
+            tenant_id=tenant_id,
+            phash=hashes["phash"],
+            dhash=hashes["dhash"],
+            band0=bands[0],
+            band1=bands[1],
+            band2=bands[2],
+            band3=bands[3],
+        )
+    )
+
+
+def find_near_duplicates(
+    db: Session,
+    tenant_id: str,
+    phash: int,
+    max_distance: int = 6,
+    exclude_id: Optional[str] = None,
+    limit: Optional[int] = 50,
+) -> List[Tuple[str, int]]:
+    """
+    Find assets in a tenant whose pHash is within `max_distance` bits.
+    Each band is an indexed (tenant_id, bandN) lookup, so the cost depends on
+    the number of candidates, not the size of the tenant. Deleted and purging
+    assets are left out; their fingerprints stay until the purge.
+    :param limit: Max matches, or None for all (e.g. to filter them first).
+    :return: List of (asset_id, distance), closest first.
+    """
+    band_columns = [
+        AssetFingerprint.band0,
+        AssetFingerprint.band1,
+        AssetFingerprint.band2,
+        AssetFingerprint.band3,
+    ]
+    probes = _band_probes(phash, max_distance)
+    rows = (
+        db.query(AssetFingerprint.asset_id, AssetFingerprint.phash)
+        .join(Asset, Asset.id == AssetFingerprint.asset_id)
+        .filter(
+            AssetFingerprint.tenant_id == tenant_id,
+            or_(*[col.in_(list(vals)) for col, vals in zip(band_columns, probes)]),
+            Asset.state.notin_(ASSET_GONE),
+        )
+        .all()
+    )
+    matches = []
+    for asset_id, candidate in rows:
+        if asset_id == exclude_id:
+            continue
+        d = hamming(phash, candidate)
+        if d <= max_distance:
+            matches.append((asset_id, d))
+    matches.sort(key=lambda m: m[1])
+    return matches if limit is None else matches[:limit]
@@ -0,0 +1,144 @@
+# utils/policy.py
+import json
+import os
+import threading
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from config import settings
+
+# Built-in policy, used when no AUTHZ_POLICY_FILE is configured.
+# Permissions are "<resource>:<action>"; "<resource>:*" and "*" are wildcards.
+# "default" is granted to every authenticated user on top of their roles.
+# Asset access is governed by asset ACLs, not by this table.
+DEFAULT_POLICY = {
+    "default": [],
+    "roles": {
+        "admin": ["*"],
+        "editor": ["schemas:write"],
+        "auditor": ["audit:read", "reports:read"],
+    },
+    # Per-tenant role definitions replace the global ones of the same name
+    "tenants": {},
+}
+
+
+class PolicyError(ValueError):
+    pass
+
+
+def _permissions(value, where: str) -> FrozenSet[str]:
+    # A bare string would otherwise become a set of its characters
+    if not isinstance(value, list) or not all(isinstance(p, str) for p in value):
+        raise PolicyError(f"Malformed policy: {where} must be a list of strings")
+    return frozenset(value)
+
+
+class Policy:
+    """
+    Immutable role -> permission table.
+    Decisions are memoized per (tenant, roles, permission), so after warm-up a
+    check is a single dict lookup.
+    """
+
+    def __init__(self, document: dict):
+        try:
+            self.default = _permissions(document.get("default", []), "default")
+            self.roles = {
+                role: _permissions(perms, f"role {role}")
+                for role, perms in document.get("roles", {}).items()
+            }
+            self.tenants = {
+                tenant_id: {
+                    role: _permissions(perms, f"role {role} of tenant {tenant_id}")
+                    for role, perms in tenant.get("roles", {}).items()
+                }
+                for tenant_id, tenant in document.get("tenants", {}).items()
+            }
+        except (AttributeError, TypeError) as e:
+            raise PolicyError(f"Malformed policy: {e}")
+        self._decisions: Dict[Tuple[str, Tuple[str, ...], str], bool] = {}
+
+    def grants(self, tenant_id: str, roles: Iterable[str]) -> FrozenSet[str]:
+        """
+        All permissions granted to a set of roles in a tenant.
+        """
+        overrides = self.tenants.get(tenant_id, {})
+        granted = set(self.default)
+        for role in roles:
+            granted |= overrides.get(role, self.roles.get(role, frozenset()))
+        return frozenset(granted)
+
+    def allows(self, tenant_id: str, roles: Tuple[str, ...], permission: str) -> bool:
+        key = (tenant_id, roles, permission)
+        decision = self._decisions.get(key)
+        if decision is None:
+            granted = self.grants(tenant_id, roles)
+            resource = permission.split(":", 1)[0]
+            decision = (
+                permission in granted
+                or f"{resource}:*" in granted
+                or "*" in granted
+            )
+            if len(self._decisions) >= settings.AUTHZ_DECISION_CACHE_SIZE:
+                self._decisions.clear()
+            self._decisions[key] = decision
+        return decision
+
+
+class PolicyStore:
+    """
+    Holds the active policy and hot-reloads it from AUTHZ_POLICY_FILE.
+    A background thread polls the file's mtime; a new Policy is built off the
+    request path and swapped in with one reference assignment. A file that
+    is missing or fails to parse is reported and the previous policy (at
+    startup, the built-in DEFAULT_POLICY) stays active.
+    """
+
+    def __init__(self, path: str, reload_interval: float):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.policy = Policy(DEFAULT_POLICY)
+        self._mtime: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load(self) -> bool:
+        """
+        (Re)load the policy file if it changed since the last load.
+        :return: True if a new policy was activated.
+        """
+        if not self.path:
+            return False
+        mtime = os.stat(self.path).st_mtime
+        if mtime == self._mtime:
+            return False
+        with open(self.path) as f:
+            self.policy = Policy(json.load(f))
+        self._mtime = mtime
+        return True
+
+    def start(self):
+        try:
+            self.load()
+        except (OSError, ValueError) as e:
+            print(f"Authorization policy load failed, using built-in defaults: {e}")
+        if self.path and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(
+                target=self._run, name="policy-reloader", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.reload_interval):
+            try:
+                self.load()
+            except (OSError, ValueError) as e:
+                print(f"Authorization policy reload failed, keeping old policy: {e}")
+
+    def allows(self, tenant_id: str, roles: Tuple[str, ...], permission: str) -> bool:
+        return self.policy.allows(tenant_id, roles, permission)
+
+
+policy_store = PolicyStore(
+    settings.AUTHZ_POLICY_FILE, reload_interval=settings.AUTHZ_RELOAD_INTERVAL
+)
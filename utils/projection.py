@@ -0,0 +1,76 @@
+# utils/projection.py
+import re
+from typing import Sequence
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session, load_only, undefer
+
+from models import METAINFO_COLUMNS, Asset
+
+# Dotted metainfo paths; also keeps user input out of the JSON path literal
+PATH_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+
+def columns(model, fields: Sequence[str]) -> list:
+    return [getattr(model, f) for f in fields]
+
+
+def project(db: Session, model, fields: Sequence[str]) -> Query:
+    """
+    Column-only query: rows are plain tuples in `fields` order, so no ORM
+    instances are built and deferred columns never come into play.
+    """
+    return db.query(*columns(model, fields))
+
+
+def load_columns(model, fields: Sequence[str]):
+    """
+    Loader option for queries that need ORM instances but only some columns,
+    e.g. db.query(Asset).options(load_columns(Asset, ("id", "size"))).
+    """
+    return load_only(*columns(model, fields))
+
+
+def with_metainfo():
+    """
+    Loader option that fetches Asset.metainfo with the row instead of on
+    first access, for code paths that read or rewrite it.
+    """
+    return undefer(Asset.metainfo)
+
+
+def _path(path: str) -> tuple:
+    if not PATH_RE.match(path):
+        raise ValueError(f"Invalid metainfo path: {path!r}")
+    return tuple(path.split("."))
+
+
+def metainfo_value(path: str):
+    """
+    SQL expression for a scalar metainfo value, e.g. "title" or
+    "technical.width". Paths in METAINFO_COLUMNS read the indexed generated
+    column; others are extracted from the JSON document as strings, which
+    works but cannot use an index.
+    """
+    column = METAINFO_COLUMNS.get(path)
+    if column is not None:
+        return getattr(Asset, column)
+    return Asset.metainfo[_path(path)].as_string()
+
+
+def metainfo_json(path: str):
+    """
+    SQL expression for a metainfo sub-document (a list or object), decoded
+    as JSON when selected.
+    """
+    return Asset.metainfo[_path(path)]
+
+
+def metainfo_has(path: str):
+    """
+    Filter for assets whose metainfo contains `path`; assets without metainfo
+    do not match.
+    """
+    json_path = "$." + ".".join(_path(path))
+    found = func.json_contains_path(Asset.metainfo, "one", json_path)
+    return func.coalesce(found, 0) == 1
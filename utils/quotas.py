@@ -0,0 +1,126 @@
+# utils/quotas.py
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Asset, AssetUsageRollup, AssetVersion, ASSET_GONE
+from utils.audit import month_start
+
+
+class QuotaExceeded(Exception):
+    def __init__(self, kind: str, used: int, limit: int):
+        super().__init__(f"{kind} quota exceeded ({used} of {limit} bytes used)")
+        self.kind = kind
+        self.used = used
+        self.limit = limit
+
+
+def quota_limit(tenant_id: str, kind: str) -> int:
+    """
+    Byte limit of a quota ('storage' or 'bandwidth') for a tenant; 0 = unlimited.
+    """
+    override = settings.TENANT_QUOTAS.get(tenant_id, {})
+    if kind in override:
+        return override[kind]
+    if kind == "storage":
+        return settings.TENANT_STORAGE_QUOTA_BYTES
+    return settings.TENANT_BANDWIDTH_QUOTA_BYTES
+
+
+def storage_used(db: Session, tenant_id: str) -> int:
+    """
+    Bytes stored by a tenant: current asset sizes plus retained older versions.
+    Deleted assets (and their versions) no longer count, though their blobs
+    are only removed by the purger.
+    """
+    current = (
+        db.query(func.coalesce(func.sum(Asset.size), 0))
+        .filter(Asset.tenant_id == tenant_id, Asset.state.notin_(ASSET_GONE))
+        .scalar()
+    )
+    history = (
+        db.query(func.coalesce(func.sum(AssetVersion.size), 0))
+        .join(Asset, Asset.id == AssetVersion.asset_id)
+        .filter(
+            AssetVersion.tenant_id == tenant_id,
+            AssetVersion.version < Asset.version,
+            Asset.state.notin_(ASSET_GONE),
+        )
+        .scalar()
+    )
+    return int(current) + int(history)
+
+
+def bandwidth_used(db: Session, tenant_id: str) -> int:
+    """
+    Bytes served to a tenant this calendar month, from the usage rollups.
+    Rows of every granularity are summed since compaction moves, not copies.
+    """
+    since = month_start(datetime.utcnow().date())
+    used = (
+        db.query(func.coalesce(func.sum(AssetUsageRollup.bandwidth), 0))
+        .filter(
+            AssetUsageRollup.tenant_id == tenant_id, AssetUsageRollup.bucket >= since
+        )
+        .scalar()
+    )
+    return int(used)
+
+
+class TenantQuotas:
+    """
+    Cached per-tenant usage for one quota kind.
+    Usage is loaded from the database at most once per `ttl` per tenant; bytes
+    added by this process in between are applied to the cached value, so a
+    check is normally a dict lookup. Other workers' additions are not seen
+    until the next reload, so the limit is soft (see QUOTA_CACHE_TTL).
+    """
+
+    def __init__(self, kind: str, loader: Callable[[Session, str], int], ttl: float):
+        self.kind = kind
+        self.loader = loader
+        self.ttl = ttl
+        # tenant -> [bytes used, loaded at]
+        self.usage: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def used(self, db: Session, tenant_id: str) -> int:
+        with self._lock:
+            entry = self.usage.get(tenant_id)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                return entry[0]
+        used = self.loader(db, tenant_id)
+        with self._lock:
+            self.usage[tenant_id] = [used, time.monotonic()]
+        return used
+
+    def add(self, tenant_id: str, nbytes: int):
+        with self._lock:
+            entry = self.usage.get(tenant_id)
+            if entry is not None:
+                entry[0] += nbytes
+
+    def check(self, db: Session, tenant_id: str, extra: int = 0) -> Optional[dict]:
+        """
+        Raise QuotaExceeded if `extra` more bytes would exceed the tenant's limit.
+        :return: Quota headers, or None if the tenant has no limit.
+        """
+        limit = quota_limit(tenant_id, self.kind)
+        if not limit:
+            return None
+        used = self.used(db, tenant_id)
+        if used + extra > limit:
+            raise QuotaExceeded(self.kind, used, limit)
+        name = self.kind.capitalize()
+        return {f"X-Quota-{name}-Used": str(used), f"X-Quota-{name}-Limit": str(limit)}
+
+
+storage_quota = TenantQuotas("storage", storage_used, ttl=settings.QUOTA_CACHE_TTL)
+bandwidth_quota = TenantQuotas(
+    "bandwidth", bandwidth_used, ttl=settings.QUOTA_CACHE_TTL
+)
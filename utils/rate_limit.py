@@ -0,0 +1,184 @@
+# utils/rate_limit.py
+import math
+import threading
+import time
+from typing import Dict, Tuple
+
+from config import settings
+
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def route_class(method: str, path: str) -> str:
+    """
+    Rate-limit class of a request: transform, search, write or read.
+    """
+    if path.startswith("/transform/"):
+        return "transform"
+    if path.startswith("/search"):
+        return "search"
+    if method in MUTATING_METHODS:
+        return "write"
+    return "read"
+
+
+class LocalBucketBackend:
+    """
+    In-process token buckets. Limits are per worker process, so with N workers
+    a tenant can get up to N times the configured rate; use the shared backend
+    when that matters.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> [tokens, last refill time, rate, burst]
+        self.buckets: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def take(
+        self, key: str, rate: float, burst: int, cost: float = 1.0
+    ) -> Tuple[bool, float]:
+        """
+        Take `cost` tokens from a bucket.
+        :return: (allowed, tokens left)
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                if len(self.buckets) >= self.max_keys:
+                    self._evict(now)
+                bucket = self.buckets[key] = [float(burst), now, rate, burst]
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            bucket[0], bucket[1], bucket[2], bucket[3] = tokens, now, rate, burst
+            return allowed, tokens
+
+    def _evict(self, now: float):
+        # Buckets that have refilled completely carry no state worth keeping
+        full = [
+            k
+            for k, (tokens, ts, rate, burst) in self.buckets.items()
+            if tokens + (now - ts) * rate >= burst
+        ]
+        for k in full:
+            del self.buckets[k]
+
+
+class RedisBucketBackend:
+    """
+    Token buckets shared by all workers, kept in Redis and updated atomically
+    by a Lua script (one round-trip per request). Requires the optional `redis`
+    package. If Redis is unreachable, requests fall back to local buckets
+    rather than failing.
+    """
+
+    SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local b = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(b[1]) or burst
+local ts = tonumber(b[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 't', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, url: str):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.05)
+        self.script = self.client.register_script(self.SCRIPT)
+        self.fallback = LocalBucketBackend()
+
+    def take(
+        self, key: str, rate: float, burst: int, cost: float = 1.0
+    ) -> Tuple[bool, float]:
+        try:
+            allowed, tokens = self.script(
+                keys=[f"ratelimit:{key}"], args=[rate, burst, time.time(), cost]
+            )
+            return bool(allowed), float(tokens)
+        except Exception:
+            return self.fallback.take(key, rate, burst, cost)
+
+
+class RateLimiter:
+    """
+    Per-tenant token buckets, one per route class.
+    :param limits: Route class -> (tokens per second, burst size).
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[float, int]], backend):
+        self.limits = limits
+        self.backend = backend
+
+    def check(self, tenant_id: str, cls: str, cost: float = 1.0):
+        """
+        Charge one request of class `cls` to a tenant.
+        :return: (allowed, rate-limit headers); None if the class is unlimited.
+        """
+        limit = self.limits.get(cls)
+        if not limit:
+            return None
+        rate, burst = limit
+        allowed, tokens = self.backend.take(f"{tenant_id}:{cls}", rate, burst, cost)
+        headers = {
+            "X-RateLimit-Class": cls,
+            "X-RateLimit-Limit": str(burst),
+            "X-RateLimit-Remaining": str(max(0, int(tokens))),
+            # Seconds until the bucket is full again
+            "X-RateLimit-Reset": str(math.ceil((burst - tokens) / rate)),
+        }
+        if not allowed:
+            headers["Retry-After"] = str(max(1, math.ceil((cost - tokens) / rate)))
+        return allowed, headers
+
+
+def build_backend():
+    if settings.RATE_LIMIT_REDIS_URL:
+        return RedisBucketBackend(settings.RATE_LIMIT_REDIS_URL)
+    return LocalBucketBackend()
+
+
+rate_limiter = RateLimiter(settings.RATE_LIMITS, build_backend())
+
+
+class RateLimitHeadersMiddleware:
+    """
+    Pure ASGI middleware copying the rate-limit and quota headers computed by
+    the rate_limit dependency (kept in request.state) onto the response,
+    whatever kind of response the endpoint returned.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                extra = scope.get("state", {}).get("limit_headers")
+                if extra:
+                    present = {name.lower() for name, _ in message["headers"]}
+                    message["headers"] = list(message["headers"]) + [
+                        (k.lower().encode(), v.encode())
+                        for k, v in extra.items()
+                        if k.lower().encode() not in present
+                    ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,354 @@
+# utils/row_cache.py
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import DateTime, event, inspect
+from sqlalchemy.orm import Session, undefer
+
+from config import settings
+from models import Asset, User
+
+# Session.info key collecting (cache, primary key) pairs written in the
+# current transaction; ALL_ROWS stands for a bulk statement with unknown keys
+PENDING_KEY = "row_cache_pending"
+ALL_ROWS = object()
+
+
+class SharedRowStore:
+    """
+    Optional second tier in Redis, shared by all workers. Each table has an
+    epoch counter; bulk writes bump it, which orphans every stored row of the
+    table at once. Stores are done by a Lua script that refuses to replace a
+    newer row, a newer invalidation or a newer epoch. Errors are swallowed:
+    the cache then behaves as if the shared tier were empty.
+    """
+
+    PUT_SCRIPT = """
+local epoch = redis.call('GET', KEYS[2]) or '0'
+if epoch ~= ARGV[4] then return 0 end
+local cur = redis.call('GET', KEYS[1])
+if cur then
+    local c = cjson.decode(cur)
+    if c.invalidated and c.invalidated > tonumber(ARGV[3]) then return 0 end
+    if c.token and c.token > ARGV[2] then return 0 end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[5])
+return 1
+"""
+
+    def __init__(self, url: str, ttl: float):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.05)
+        self.put_script = self.client.register_script(self.PUT_SCRIPT)
+        self.ttl = int(ttl)
+
+    def get(self, table: str, pk: str):
+        """
+        :return: (epoch, stored entry or None)
+        """
+        try:
+            epoch, raw = self.client.mget(
+                f"rowcache:{table}:epoch", f"rowcache:{table}:{pk}"
+            )
+        except Exception:
+            return None, None
+        epoch = (epoch or b"0").decode()
+        return epoch, json.loads(raw) if raw else None
+
+    def put(self, table: str, pk: str, entry: dict, started: float, epoch: str) -> bool:
+        try:
+            return bool(
+                self.put_script(
+                    keys=[f"rowcache:{table}:{pk}", f"rowcache:{table}:epoch"],
+                    args=[json.dumps(entry), entry["token"], started, epoch, self.ttl],
+                )
+            )
+        except Exception:
+            return False
+
+    def invalidate(self, table: str, pk):
+        try:
+            if pk is ALL_ROWS:
+                self.client.incr(f"rowcache:{table}:epoch")
+            else:
+                marker = json.dumps({"invalidated": time.time()})
+                self.client.set(f"rowcache:{table}:{pk}", marker, ex=self.ttl)
+        except Exception:
+            pass
+
+
+class RowCache:
+    """
+    Read-through cache of one model's rows by primary key: an in-process LRU
+    with TTL in front of the optional shared tier.
+    Entries are column snapshots, never session-bound instances. get()
+    returns a new transient instance for reading only; changing it does not
+    write the row. Columns in `exclude` (secrets such as password hashes) are
+    never cached and are None on returned instances. Committed writes to the
+    model invalidate entries through the session event listeners below, so
+    the TTL only bounds how long a write made by another worker can go unseen.
+    Each entry carries a token built from the `version`/`updated_at` columns
+    (where the model has them). A snapshot never replaces one with a newer
+    token, and a read that started before an invalidation is not stored. A
+    read that raced a write therefore cannot put the old row back.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_entries: int,
+        ttl: float,
+        shared: SharedRowStore = None,
+        exclude: Iterable[str] = (),
+    ):
+        self.model = model
+        self.table = model.__tablename__
+        mapper = inspect(model)
+        exclude = set(exclude)
+        self.columns = [
+            attr.key for attr in mapper.column_attrs if attr.key not in exclude
+        ]
+        # Snapshots hold every cached column, so deferred ones are loaded up front
+        self.load_options = [
+            undefer(getattr(model, attr.key))
+            for attr in mapper.column_attrs
+            if attr.deferred and attr.key not in exclude
+        ]
+        self.datetime_columns = {
+            attr.key
+            for attr in mapper.column_attrs
+            if isinstance(attr.columns[0].type, DateTime)
+        }
+        self.token_columns = [c for c in ("version", "updated_at") if c in self.columns]
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+        # pk -> (snapshot or None for an invalidation marker, token, stored at)
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.epoch = 0
+        self.stats = dict.fromkeys(
+            ("hit_local", "hit_shared", "miss", "stale_rejected", "invalidated"), 0
+        )
+        self._lock = threading.Lock()
+
+    def token(self, snapshot: dict) -> str:
+        # Zero-padded so that string order is version order, as in Lua
+        parts = []
+        for column in self.token_columns:
+            value = snapshot.get(column)
+            if column == "version":
+                parts.append(f"{value or 0:010d}")
+            else:
+                parts.append(value.isoformat() if value else "")
+        return "|".join(parts)
+
+    def snapshot(self, obj) -> dict:
+        return {c: getattr(obj, c) for c in self.columns}
+
+    def build(self, snapshot: dict):
+        return self.model(**snapshot)
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _get_local(self, pk: str) -> Optional[dict]:
+        with self._lock:
+            entry = self.entries.get(pk)
+            if entry is None or entry[0] is None:
+                return None
+            if time.monotonic() - entry[2] > self.ttl:
+                del self.entries[pk]
+                return None
+            self.entries.move_to_end(pk)
+            self.stats["hit_local"] += 1
+            return entry[0]
+
+    def _put_local(self, pk: str, snapshot: dict, started: float, epoch: int) -> bool:
+        token = self.token(snapshot)
+        with self._lock:
+            current = self.entries.get(pk)
+            if current is None:
+                stale = False
+            elif current[0] is None:
+                # Invalidated after this read started
+                stale = current[2] > started
+            else:
+                stale = current[1] > token
+            if stale or epoch != self.epoch:
+                self.stats["stale_rejected"] += 1
+                return False
+            self.entries[pk] = (snapshot, token, time.monotonic())
+            self.entries.move_to_end(pk)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            return True
+
+    def get(self, db: Session, pk: str):
+        """
+        The row with primary key `pk` as a read-only transient instance, or
+        None if it does not exist (misses are not cached).
+        """
+        snapshot = self._get_local(pk)
+        if snapshot is not None:
+            return self.build(snapshot)
+        started, epoch = time.monotonic(), self.epoch
+        wall_started = time.time()
+        shared_epoch = None
+        if self.shared is not None:
+            shared_epoch, entry = self.shared.get(self.table, pk)
+            if entry and "row" in entry and entry.get("epoch") == shared_epoch:
+                snapshot = self._decode(entry["row"])
+                self._count("hit_shared")
+                self._put_local(pk, snapshot, started, epoch)
+                return self.build(snapshot)
+        self._count("miss")
+        snapshot = self._read(db, pk)
+        if snapshot is None:
+            return None
+        self._put_local(pk, snapshot, started, epoch)
+        if self.shared is not None and shared_epoch is not None:
+            entry = {
+                "row": self._encode(snapshot),
+                "token": self.token(snapshot),
+                "epoch": shared_epoch,
+            }
+            if not self.shared.put(self.table, pk, entry, wall_started, shared_epoch):
+                self._count("stale_rejected")
+        return self.build(snapshot)
+
+    def _read(self, db: Session, pk: str) -> Optional[dict]:
+        # On its own connection: the caller's transaction may hold a
+        # REPEATABLE READ snapshot older than `started`, and a row read from
+        # it could be stored after the invalidation it predates was seen
+        with Session(bind=db.get_bind(inspect(self.model))) as fresh:
+            obj = fresh.get(self.model, pk, options=self.load_options)
+            return self.snapshot(obj) if obj is not None else None
+
+    def invalidate(self, pk):
+        """
+        Drop one row (or every row, for ALL_ROWS) here and in the shared tier.
+        """
+        with self._lock:
+            self.stats["invalidated"] += 1
+            if pk is ALL_ROWS:
+                self.entries.clear()
+                self.epoch += 1
+            else:
+                # Kept as a marker so reads that started earlier are not stored
+                self.entries[pk] = (None, "", time.monotonic())
+                self.entries.move_to_end(pk)
+        if self.shared is not None:
+            self.shared.invalidate(self.table, pk)
+
+    def _encode(self, snapshot: dict) -> dict:
+        return {
+            k: v.isoformat() if k in self.datetime_columns and v else v
+            for k, v in snapshot.items()
+        }
+
+    def _decode(self, row: dict) -> dict:
+        # Keys outside self.columns can come from entries stored by an older
+        # release that still cached excluded columns
+        return {
+            k: datetime.fromisoformat(v) if k in self.datetime_columns and v else v
+            for k, v in row.items()
+            if k in self.columns
+        }
+
+    def hit_ratio(self) -> float:
+        with self._lock:
+            hits = self.stats["hit_local"] + self.stats["hit_shared"]
+            total = hits + self.stats["miss"]
+        return hits / total if total else 0.0
+
+
+def _build_shared() -> Optional[SharedRowStore]:
+    if not settings.ROW_CACHE_REDIS_URL:
+        return None
+    return SharedRowStore(settings.ROW_CACHE_REDIS_URL, settings.ROW_CACHE_SHARED_TTL)
+
+
+_shared = _build_shared()
+# Columns never copied into snapshots, locally or in Redis
+EXCLUDED_COLUMNS = {User: ("password_hash",)}
+row_caches: Dict[type, RowCache] = {
+    model: RowCache(
+        model,
+        settings.ROW_CACHE_MAX_ENTRIES,
+        settings.ROW_CACHE_TTL,
+        _shared,
+        exclude=EXCLUDED_COLUMNS.get(model, ()),
+    )
+    for model in (Asset, User)
+}
+asset_cache = row_caches[Asset]
+user_cache = row_caches[User]
+
+
+def _pending(session: Session) -> set:
+    return session.info.setdefault(PENDING_KEY, set())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        cache = row_caches.get(type(obj))
+        if cache is not None:
+            pk = inspect(obj).mapper.primary_key_from_instance(obj)[0]
+            _pending(session).add((cache, pk))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(state):
+    # UPDATE/DELETE statements bypass the unit of work. They can name the rows
+    # they touch with execution_options(row_cache_keys=[...]); bulk UPDATEs by
+    # primary key (session.execute(update(Model), [{...}, ...]), which is also
+    # what bulk_update_mappings runs) name them in their parameters. Otherwise
+    # the whole model is invalidated.
+    if not (state.is_update or state.is_delete) or state.bind_mapper is None:
+        return
+    cache = row_caches.get(state.bind_mapper.class_)
+    if cache is None:
+        return
+    keys = state.execution_options.get("row_cache_keys")
+    if keys is None and isinstance(state.parameters, (list, tuple)):
+        mapper = state.bind_mapper
+        pk = mapper.get_property_by_column(mapper.primary_key[0]).key
+        if all(pk in params for params in state.parameters):
+            keys = [params[pk] for params in state.parameters]
+    pending = _pending(state.session)
+    if keys is None:
+        pending.add((cache, ALL_ROWS))
+    else:
+        pending.update((cache, str(k)) for k in keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for cache, pk in session.info.pop(PENDING_KEY, ()):
+        cache.invalidate(pk)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(PENDING_KEY, None)
+
+
+def get_cached(cache: RowCache, db: Session, pk, tenant_id: str):
+    """
+    Read-through lookup restricted to a tenant; None if the row does not
+    exist or belongs to another tenant.
+    """
+    if not settings.ROW_CACHE_ENABLED:
+        obj = db.get(cache.model, str(pk))
+    else:
+        obj = cache.get(db, str(pk))
+    if obj is None or obj.tenant_id != tenant_id:
+        return None
+    return obj
@@ -1,7 +1,5 @@
 # utils/s3_utils.py
-import boto3
 from typing import Optional
-from botocore.exceptions import ClientError
 
 from config import settings
 
@@ -10,7 +8,19 @@ S3_ACCESS_KEY = settings.S3_ACCESS_KEY
 S3_SECRET_KEY = settings.S3_SECRET_KEY
 S3_REGION = settings.S3_REGION
 
-s3_client = boto3.client("s3")
+_s3_client = None
+
+
+def get_s3_client():
+    """
+    Return the module's S3 client, created (and boto3 imported) on first use.
+    """
+    global _s3_client
+    if _s3_client is None:
+        import boto3
+
+        _s3_client = boto3.client("s3")
+    return _s3_client
 
 
 def download_file_from_s3(bucket: str, key: str, local_path: str) -> bool:
@@ -21,8 +31,10 @@ def download_file_from_s3(bucket: str, key: str, local_path: str) -> bool:
     :param local_path: Local path to save the downloaded file.
     :return: True if download was successful, False otherwise.
     """
+    from botocore.exceptions import ClientError
+
     try:
-        s3_client.download_file(bucket, key, local_path)
+        get_s3_client().download_file(bucket, key, local_path)
         return True
     except ClientError as e:
         print(f"S3 download error: {e}")
@@ -37,8 +49,10 @@ def upload_file_to_s3(local_path: str, bucket: str, key: str) -> bool:
     :param key: S3 object key.
     :return: True if upload was successful, False otherwise.
     """
+    from botocore.exceptions import ClientError
+
     try:
-        s3_client.upload_file(local_path, bucket, key)
+        get_s3_client().upload_file(local_path, bucket, key)
         return True
     except ClientError as e:
         print(f"S3 upload error: {e}")
@@ -52,8 +66,10 @@ def get_s3_object_metadata(bucket: str, key: str) -> Optional[dict]:
     :param key: S3 object key.
     :return: Metadata dictionary if successful, None otherwise.
     """
+    from botocore.exceptions import ClientError
+
     try:
-        response = s3_client.head_object(Bucket=bucket, Key=key)
+        response = get_s3_client().head_object(Bucket=bucket, Key=key)
         return response
     except ClientError as e:
         print(f"S3 metadata error: {e}")
@@ -0,0 +1,41 @@
+# utils/serialization.py
+import json
+from typing import Iterable, List, Sequence
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+
+def dumps(content) -> bytes:
+    """
+    Encode to compact JSON bytes, with orjson when installed.
+    Values outside plain JSON types (UUIDs, datetimes) are encoded as strings.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=str)
+    return json.dumps(content, separators=(",", ":"), default=str).encode()
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response for already-validated plain data. Returning it from an
+    endpoint skips FastAPI's response_model validation and jsonable_encoder
+    pass; the route's response_model still documents the schema.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def rows_to_dicts(rows: Iterable[Sequence], fields: Sequence[str]) -> List[dict]:
+    """
+    Column-only query rows (tuples in `fields` order) as JSON-ready dicts,
+    without hydrating ORM instances or pydantic models.
+    """
+    return [dict(zip(fields, row)) for row in rows]
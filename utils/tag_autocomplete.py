@@ -0,0 +1,244 @@
+# utils/tag_autocomplete.py
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import settings
+from utils.tags import collation_key
+
+# (id, name, description, usage_count)
+TagRow = Tuple[str, str, Optional[str], int]
+
+_PREFIX_END = "\U0010ffff"
+
+
+class TenantTagIndex:
+    """
+    Sorted array of tag name collation keys for one tenant, so "Café" and
+    "cafe" are one entry and match the same prefixes, as in MySQL.
+    A prefix lookup is two bisects; ranking by usage only looks at the matches.
+    Each index has its own lock, so ranking one tenant's tags does not hold up
+    lookups and updates for the others.
+    """
+
+    __slots__ = ("keys", "entries", "loaded_at", "lock")
+
+    def __init__(self, rows: Iterable[TagRow]):
+        self.entries: Dict[str, list] = {}
+        for tag_id, name, description, count in rows:
+            self.entries[collation_key(name)] = [tag_id, name, description, count or 0]
+        self.keys: List[str] = sorted(self.entries)
+        self.loaded_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def complete(
+        self, prefix: str = "", offset: int = 0, limit: int = 20, max_scan: int = 0
+    ) -> Optional[Tuple[List[TagRow], int]]:
+        """
+        Tags starting with `prefix`, most used first. Call with `lock` held.
+        :param max_scan: Give up (return None) if more tags than this match;
+                         0 ranks every match.
+        :return: (page of tag rows, total number of matches)
+        """
+        prefix = collation_key(prefix)
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + _PREFIX_END, lo)
+        if max_scan and hi - lo > max_scan:
+            return None
+        entries = self.entries
+        top = heapq.nsmallest(
+            offset + limit,
+            (entries[k] for k in self.keys[lo:hi]),
+            key=lambda e: (-e[3], e[1]),
+        )
+        return [tuple(e) for e in top[offset:]], hi - lo
+
+    def upsert(self, tag_id: str, name: str, description: Optional[str] = None):
+        key = collation_key(name)
+        if key not in self.entries:
+            self.entries[key] = [tag_id, name, description, 0]
+            insort(self.keys, key)
+        elif description is not None:
+            self.entries[key][2] = description
+
+    def add_usage(self, name: str, delta: int):
+        entry = self.entries.get(collation_key(name))
+        if entry is not None:
+            entry[3] = max(0, entry[3] + delta)
+
+
+class TagAutocomplete:
+    """
+    Per-tenant tag indexes, loaded lazily and kept in LRU order.
+    Cold tenants are evicted once the total number of cached tags or tenants
+    exceeds the configured bounds. Entries older than `ttl` are reloaded so
+    changes made by other workers show up eventually; one thread reloads a
+    tenant while the others keep using the old index (or wait for the first
+    load). Tenants with more than `max_tags` tags are remembered as too big
+    for `ttl` seconds, so they are not loaded in full on every call.
+    `_lock` guards the tenant map and counters only; each index is read and
+    updated under its own lock. Prefixes matching more than `max_scan` tags
+    (short or empty ones on big tenants) are left to the database, which
+    serves them from the (tenant_id, usage_count) index instead of a scan.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Iterable[TagRow]],
+        max_tags: int,
+        max_tenants: int,
+        ttl: float,
+        max_scan: int = 0,
+    ):
+        self.loader = loader
+        self.max_tags = max_tags
+        self.max_tenants = max_tenants
+        self.ttl = ttl
+        self.max_scan = max_scan
+        self.tenants: "OrderedDict[str, TenantTagIndex]" = OrderedDict()
+        self.total_tags = 0
+        # tenant -> when it was found to have more than max_tags tags
+        self.too_big: Dict[str, float] = {}
+        # tenant -> set when the load in flight finishes
+        self._loading: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, tenant_id: str) -> Optional[TenantTagIndex]:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                index = self.tenants.get(tenant_id)
+                if index is not None and now - index.loaded_at < self.ttl:
+                    self.tenants.move_to_end(tenant_id)
+                    return index
+                if now - self.too_big.get(tenant_id, -self.ttl) < self.ttl:
+                    return None
+                loading = self._loading.get(tenant_id)
+                if loading is None:
+                    loading = self._loading[tenant_id] = threading.Event()
+                    break
+                if index is not None:
+                    return index  # stale while another thread reloads it
+            loading.wait()
+        try:
+            index = TenantTagIndex(self.loader(tenant_id))
+            with self._lock:
+                old = self.tenants.pop(tenant_id, None)
+                if old is not None:
+                    self.total_tags -= len(old)
+                if len(index) > self.max_tags:
+                    self._mark_too_big(tenant_id)
+                    # Too big to cache; caller falls back to the database
+                    return None
+                self.tenants[tenant_id] = index
+                self.total_tags += len(index)
+                self._evict()
+            return index
+        finally:
+            with self._lock:
+                del self._loading[tenant_id]
+            loading.set()
+
+    def _mark_too_big(self, tenant_id: str):
+        now = time.monotonic()
+        if len(self.too_big) >= self.max_tenants:
+            self.too_big = {
+                t: at for t, at in self.too_big.items() if now - at < self.ttl
+            }
+        self.too_big[tenant_id] = now
+
+    def _evict(self):
+        while len(self.tenants) > 1 and (
+            self.total_tags > self.max_tags or len(self.tenants) > self.max_tenants
+        ):
+            _, index = self.tenants.popitem(last=False)
+            self.total_tags -= len(index)
+
+    def complete(
+        self, tenant_id: str, prefix: str = "", offset: int = 0, limit: int = 20
+    ) -> Optional[Tuple[List[TagRow], int]]:
+        """
+        Autocomplete a tag prefix for a tenant.
+        :return: (page of tag rows, total matches), or None if the tenant is not
+                 cacheable or the prefix matches too many tags, and the caller
+                 should query the database.
+        """
+        index = self._get(tenant_id)
+        if index is None:
+            return None
+        with index.lock:
+            return index.complete(prefix, offset, limit, self.max_scan)
+
+    def tag_created(self, tenant_id: str, tag_id: str, name: str, description=None):
+        """
+        Add a new tag to a loaded tenant index. No-op for tenants not in memory.
+        """
+        with self._lock:
+            index = self.tenants.get(tenant_id)
+        if index is None:
+            return
+        with index.lock:
+            before = len(index)
+            index.upsert(tag_id, name, description)
+            added = len(index) - before
+        with self._lock:
+            # An index evicted or reloaded meanwhile was already uncounted
+            if self.tenants.get(tenant_id) is index:
+                self.total_tags += added
+
+    def usage_changed(self, tenant_id: str, deltas: Dict[str, Tuple[str, int]]):
+        """
+        Apply usage count changes to a loaded tenant index.
+        :param deltas: Mapping of tag name to (tag ID, usage delta).
+        """
+        with self._lock:
+            index = self.tenants.get(tenant_id)
+        if index is None:
+            return
+        with index.lock:
+            before = len(index)
+            for name, (tag_id, delta) in deltas.items():
+                index.upsert(tag_id, name)
+                index.add_usage(name, delta)
+            added = len(index) - before
+        with self._lock:
+            # An index evicted or reloaded meanwhile was already uncounted
+            if self.tenants.get(tenant_id) is index:
+                self.total_tags += added
+
+    def invalidate(self, tenant_id: str):
+        with self._lock:
+            self.too_big.pop(tenant_id, None)
+            index = self.tenants.pop(tenant_id, None)
+            if index is not None:
+                self.total_tags -= len(index)
+
+
+def _load_tenant_tags(tenant_id: str) -> List[TagRow]:
+    from db import tenant_session
+    from models import Tag
+
+    db = tenant_session(tenant_id)
+    try:
+        return (
+            db.query(Tag.id, Tag.name, Tag.description, Tag.usage_count)
+            .filter(Tag.tenant_id == tenant_id)
+            .all()
+        )
+    finally:
+        db.close()
+
+
+tag_autocomplete = TagAutocomplete(
+    loader=_load_tenant_tags,
+    max_tags=settings.TAG_AUTOCOMPLETE_MAX_TAGS,
+    max_tenants=settings.TAG_AUTOCOMPLETE_MAX_TENANTS,
+    ttl=settings.TAG_AUTOCOMPLETE_TTL,
+    max_scan=settings.TAG_AUTOCOMPLETE_MAX_SCAN,
+)
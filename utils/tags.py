@@ -0,0 +1,209 @@
+# utils/tags.py
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from sqlalchemy import case, insert, text, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import AssetTag, Tag, generate_uuid
+
+
+def escape_like(value: str) -> str:
+    """
+    Escape LIKE wildcards so user input is matched literally.
+    """
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def collation_key(name: str) -> str:
+    """
+    Python approximation of the tags.name collation (accent- and
+    case-insensitive): names with the same key are the same tag in MySQL.
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def get_or_create_tags(
+    db: Session, tenant_id: str, names: List[str]
+) -> Dict[str, str]:
+    """
+    Resolve tag names to IDs, creating missing tags with one multi-row
+    INSERT IGNORE. Does not commit. A name differing from a stored tag only
+    in case or accents ("Beach" and "beach") resolves to the stored tag, as
+    the unique index sees them as equal.
+    :return: Mapping of each given tag name to its tag ID.
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+    by_key = {
+        collation_key(name): tag_id
+        for name, tag_id in db.query(Tag.name, Tag.id)
+        .filter(Tag.tenant_id == tenant_id, Tag.name.in_(names))
+        .all()
+    }
+    # First spelling of each name not stored yet
+    missing = {}
+    for n in names:
+        if collation_key(n) not in by_key:
+            missing.setdefault(collation_key(n), n)
+    missing = list(missing.values())
+    if missing:
+        db.execute(
+            insert(Tag)
+            .prefix_with("IGNORE")
+            .values(
+                [
+                    {"id": generate_uuid(), "tenant_id": tenant_id, "name": n}
+                    for n in missing
+                ]
+            )
+        )
+        by_key.update(
+            (collation_key(name), tag_id)
+            for name, tag_id in db.query(Tag.name, Tag.id)
+            .filter(Tag.tenant_id == tenant_id, Tag.name.in_(missing))
+            .all()
+        )
+    return {n: by_key[collation_key(n)] for n in names if collation_key(n) in by_key}
+
+
+def _apply_usage_deltas(db: Session, deltas: Counter):
+    deltas = {tag_id: d for tag_id, d in deltas.items() if d}
+    if not deltas:
+        return
+    db.execute(
+        update(Tag)
+        .where(Tag.id.in_(list(deltas)))
+        .values(usage_count=Tag.usage_count + case(deltas, value=Tag.id, else_=0))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def sync_asset_tags(
+    db: Session, tenant_id: str, desired: Dict[str, List[str]]
+) -> Dict[str, Tuple[str, int]]:
+    """
+    Make the asset_tags rows of many assets match the desired tag names.
+    Reads existing links in one query, writes one multi-row INSERT, one DELETE
+    and one usage_count UPDATE for the whole batch. Does not commit.
+    A concurrent sync of the same assets may add or remove some of the links
+    first; the batch is then redone row by row and only the links actually
+    changed here count towards usage.
+    :param desired: Mapping of asset ID to the full list of tag names it should have.
+    :return: Mapping of tag name to (tag ID, usage delta) for changed tags.
+    """
+    if not desired:
+        return {}
+    tag_ids = get_or_create_tags(
+        db, tenant_id, [n for names in desired.values() for n in names]
+    )
+    current: Dict[str, set] = {asset_id: set() for asset_id in desired}
+    for asset_id, tag_id in (
+        db.query(AssetTag.asset_id, AssetTag.tag_id)
+        .filter(AssetTag.tenant_id == tenant_id, AssetTag.asset_id.in_(list(desired)))
+        .all()
+    ):
+        current[asset_id].add(tag_id)
+
+    to_insert, to_delete = [], []
+    deltas = Counter()
+    for asset_id, names in desired.items():
+        wanted = {tag_ids[n] for n in names if n in tag_ids}
+        for tag_id in wanted - current[asset_id]:
+            to_insert.append(
+                {"asset_id": asset_id, "tag_id": tag_id, "tenant_id": tenant_id}
+            )
+            deltas[tag_id] += 1
+        for tag_id in current[asset_id] - wanted:
+            to_delete.append((asset_id, tag_id))
+            deltas[tag_id] -= 1
+
+    if to_insert:
+        try:
+            with db.begin_nested():
+                db.execute(insert(AssetTag).values(to_insert))
+        except IntegrityError:
+            for row in to_insert:
+                inserted = db.execute(
+                    insert(AssetTag).prefix_with("IGNORE").values(row)
+                ).rowcount
+                if not inserted:
+                    deltas[row["tag_id"]] -= 1
+    if to_delete:
+        savepoint = db.begin_nested()
+        if _delete_links(db, tenant_id, to_delete) == len(to_delete):
+            savepoint.commit()
+        else:
+            savepoint.rollback()
+            for link in to_delete:
+                if not _delete_links(db, tenant_id, [link]):
+                    deltas[link[1]] += 1
+    _apply_usage_deltas(db, deltas)
+    changed = [tag_id for tag_id, d in deltas.items() if d]
+    if not changed:
+        return {}
+    # Stored spellings, which may differ from the requested ones in case
+    names = dict(db.query(Tag.id, Tag.name).filter(Tag.id.in_(changed)).all())
+    return {names[tag_id]: (tag_id, deltas[tag_id]) for tag_id in changed}
+
+
+def _delete_links(db: Session, tenant_id: str, links: List[tuple]) -> int:
+    return (
+        db.query(AssetTag)
+        .filter(
+            AssetTag.tenant_id == tenant_id,
+            tuple_(AssetTag.asset_id, AssetTag.tag_id).in_(links),
+        )
+        .delete(synchronize_session=False)
+    )
+
+
+def search_tags(db: Session, tenant_id: str, prefix: str = None):
+    """
+    Query tags of a tenant, optionally by name prefix, most used first.
+    The prefix match is a range scan on the (tenant_id, name) unique index.
+    Without a prefix, ties are broken by id rather than name: InnoDB keeps
+    the primary key in every secondary index, so (tenant_id, usage_count)
+    then returns a page in order without sorting all of the tenant's tags.
+    """
+    query = db.query(Tag).filter(Tag.tenant_id == tenant_id)
+    if prefix:
+        query = query.filter(Tag.name.like(escape_like(prefix) + "%"))
+        return query.order_by(Tag.usage_count.desc(), Tag.name)
+    return query.order_by(Tag.usage_count.desc(), Tag.id.desc())
+
+
+def top_tags(db: Session, tenant_id: str, limit: int = 20) -> List[Tag]:
+    """
+    Most used tags of a tenant, read from the (tenant_id, usage_count) index.
+    """
+    return (
+        db.query(Tag)
+        .filter(Tag.tenant_id == tenant_id, Tag.usage_count > 0)
+        .order_by(Tag.usage_count.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def recount_tag_usage(db: Session, tenant_id: str):
+    """
+    Recompute the materialized usage counts of a tenant from asset_tags in one
+    statement. Repair tool; normal writes keep the counts current incrementally.
+    """
+    db.execute(
+        text(
+            "UPDATE tags t LEFT JOIN ("
+            " SELECT tag_id, COUNT(*) AS c FROM asset_tags"
+            " WHERE tenant_id = :tenant_id GROUP BY tag_id"
+            ") x ON x.tag_id = t.id"
+            " SET t.usage_count = COALESCE(x.c, 0)"
+            " WHERE t.tenant_id = :tenant_id"
+        ),
+        {"tenant_id": tenant_id},
+    )
+    db.commit()
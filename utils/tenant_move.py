@@ -0,0 +1,245 @@
+# utils/tenant_move.py
+import time
+from typing import Callable, Iterator, List, Set
+
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from config import settings
+from db import (
+    GLOBAL_TABLES,
+    TENANT_ACTIVE,
+    TENANT_READONLY,
+    Base,
+    engine,
+    shard_router,
+)
+from models import BulkJob, TenantShard
+
+# Rows of these tables are never updated in place, so the final sync only has
+# to copy new keys and drop removed ones
+APPEND_ONLY_TABLES = {"asset_versions"}
+
+
+def tenant_tables() -> list:
+    """
+    Tables whose rows belong to a tenant and move with it.
+    """
+    return [
+        t
+        for t in Base.metadata.sorted_tables
+        if t.name not in GLOBAL_TABLES and "tenant_id" in t.c
+    ]
+
+
+def stored_columns(table) -> list:
+    # Generated columns are computed by the server and cannot be inserted
+    return [c for c in table.c if c.computed is None]
+
+
+def _key(table, row) -> tuple:
+    return tuple(row[c.name] for c in table.primary_key.columns)
+
+
+def _key_filter(table, keys: List[tuple]):
+    pk = list(table.primary_key.columns)
+    if len(pk) == 1:
+        return pk[0].in_([k[0] for k in keys])
+    return tuple_(*pk).in_(keys)
+
+
+def _after(table, last: tuple):
+    pk = list(table.primary_key.columns)
+    if len(pk) == 1:
+        return pk[0] > last[0]
+    return tuple_(*pk) > tuple_(*last)
+
+
+def _batches(
+    conn: Connection, table, tenant_id: str, batch_size: int, columns=None, where=None
+) -> Iterator[list]:
+    """
+    A tenant's rows of a table in primary-key order, one batch per query. The
+    read transaction ends after every batch so no long snapshot is held.
+    """
+    last = None
+    while True:
+        query = select(*(columns or stored_columns(table))).where(
+            table.c.tenant_id == tenant_id
+        )
+        if where is not None:
+            query = query.where(where)
+        if last is not None:
+            query = query.where(_after(table, last))
+        query = query.order_by(*table.primary_key.columns).limit(batch_size)
+        rows = conn.execute(query).mappings().all()
+        conn.rollback()
+        if not rows:
+            return
+        yield rows
+        last = _key(table, rows[-1])
+
+
+def _write(dst: Connection, table, rows: list):
+    if not rows:
+        return
+    # Delete-then-insert makes every batch idempotent, so a move can be rerun
+    dst.execute(delete(table).where(_key_filter(table, [_key(table, r) for r in rows])))
+    dst.execute(insert(table), [dict(r) for r in rows])
+    dst.commit()
+
+
+def copy_rows(
+    src: Connection,
+    dst: Connection,
+    table,
+    tenant_id: str,
+    batch_size: int,
+    pause: float,
+    where=None,
+) -> int:
+    copied = 0
+    for rows in _batches(src, table, tenant_id, batch_size, where=where):
+        _write(dst, table, rows)
+        copied += len(rows)
+        time.sleep(pause)
+    return copied
+
+
+def key_set(conn: Connection, table, tenant_id: str, batch_size: int) -> Set[tuple]:
+    columns = list(table.primary_key.columns)
+    keys = set()
+    for rows in _batches(conn, table, tenant_id, batch_size, columns=columns):
+        keys.update(_key(table, r) for r in rows)
+    return keys
+
+
+def sync_rows(
+    src: Connection, dst: Connection, table, tenant_id: str, since, batch_size: int
+) -> int:
+    """
+    Bring the target copy of a table up to date after the bulk copy: drop rows
+    deleted since, then copy new rows and rows updated since `since`. Tables
+    without updated_at are copied again in full.
+    :return: Rows written or deleted.
+    """
+    src_keys = key_set(src, table, tenant_id, batch_size)
+    dst_keys = key_set(dst, table, tenant_id, batch_size)
+    removed = list(dst_keys - src_keys)
+    for i in range(0, len(removed), batch_size):
+        keys = removed[i : i + batch_size]
+        dst.execute(delete(table).where(_key_filter(table, keys)))
+        dst.commit()
+    if table.name not in APPEND_ONLY_TABLES and "updated_at" not in table.c:
+        return len(removed) + copy_rows(src, dst, table, tenant_id, batch_size, 0)
+    added = list(src_keys - dst_keys)
+    written = 0
+    for i in range(0, len(added), batch_size):
+        query = select(*stored_columns(table)).where(
+            _key_filter(table, added[i : i + batch_size])
+        )
+        rows = src.execute(query).mappings().all()
+        src.rollback()
+        _write(dst, table, rows)
+        written += len(rows)
+    if "updated_at" in table.c:
+        written += copy_rows(
+            src, dst, table, tenant_id, batch_size, 0, where=table.c.updated_at >= since
+        )
+    return len(removed) + written
+
+
+def set_directory(tenant_id: str, shard: str, state: str):
+    with Session(bind=engine) as db:
+        db.merge(TenantShard(tenant_id=tenant_id, shard=shard, state=state))
+        db.commit()
+    shard_router.invalidate(tenant_id)
+
+
+def _check_no_bulk_job(src_engine, tenant_id: str):
+    # Background jobs write through their own sessions, not get_db
+    with Session(bind=src_engine) as db:
+        running = (
+            db.query(BulkJob.id)
+            .filter(
+                BulkJob.tenant_id == tenant_id,
+                BulkJob.status.in_(["pending", "running"]),
+            )
+            .first()
+        )
+    if running:
+        raise ValueError(f"Tenant {tenant_id} has a bulk job running; retry later")
+
+
+def move_tenant(
+    tenant_id: str,
+    target: str,
+    batch_size: int = 1000,
+    pause: float = 0.05,
+    keep_source: bool = False,
+    log: Callable[[str], None] = print,
+):
+    """
+    Move a tenant's rows to another shard while it stays online.
+    1. Copy all rows in batches; the tenant keeps reading and writing the
+       source shard.
+    2. Mark the tenant read-only (get_db answers writes with 503 and bulk
+       patches refuse to run), wait for every worker's directory cache to
+       expire, abort if a bulk job is still pending or running, then copy
+       what changed during step 1.
+    3. Point the directory at the target shard and, after another cache
+       period, delete the source rows.
+    Writes are refused only during step 2, which is proportional to the
+    changes made during step 1 (and to the size of tables without updated_at).
+    """
+    shard_router.invalidate(tenant_id)
+    source, state = shard_router.lookup(tenant_id)
+    if source == target:
+        raise ValueError(f"Tenant {tenant_id} is already on shard {target}")
+    if state != TENANT_ACTIVE:
+        raise ValueError(f"Tenant {tenant_id} is {state}; another move may be running")
+    src_engine = shard_router.engine_for_shard(source)
+    dst_engine = shard_router.engine_for_shard(target)
+    _check_no_bulk_job(src_engine, tenant_id)
+
+    tables = tenant_tables()
+    cache_wait = settings.SHARD_DIRECTORY_TTL + 1
+    with src_engine.connect() as src, dst_engine.connect() as dst:
+        started = src.execute(select(func.now())).scalar()
+        src.rollback()
+        for table in tables:
+            copied = copy_rows(src, dst, table, tenant_id, batch_size, pause)
+            log(f"Copied {copied} {table.name} rows")
+
+        set_directory(tenant_id, source, TENANT_READONLY)
+        try:
+            log(f"Tenant is read-only; waiting {cache_wait:.0f}s for caches")
+            time.sleep(cache_wait)
+            # A job queued before the read-only state was visible everywhere
+            # could still write; jobs starting from now on refuse to run
+            _check_no_bulk_job(src_engine, tenant_id)
+            for table in tables:
+                synced = sync_rows(src, dst, table, tenant_id, started, batch_size)
+                log(f"Synced {synced} {table.name} rows")
+        except BaseException:
+            set_directory(tenant_id, source, TENANT_ACTIVE)
+            raise
+        set_directory(tenant_id, target, TENANT_ACTIVE)
+        log(f"Tenant {tenant_id} now served from shard {target}")
+
+        if keep_source:
+            return
+        # Workers with a stale directory entry may still read the source
+        time.sleep(cache_wait)
+        for table in tables:
+            deleted = 0
+            for rows in _batches(
+                src, table, tenant_id, batch_size, columns=table.primary_key.columns
+            ):
+                keys = [_key(table, r) for r in rows]
+                src.execute(delete(table).where(_key_filter(table, keys)))
+                src.commit()
+                deleted += len(keys)
+                time.sleep(pause)
+            log(f"Deleted {deleted} {table.name} rows from shard {source}")
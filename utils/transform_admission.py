@@ -0,0 +1,77 @@
+# utils/transform_admission.py
+import threading
+import time
+from contextlib import contextmanager
+
+from config import settings
+
+
+class AdmissionRejected(RuntimeError):
+    """
+    Raised when a transform job cannot be admitted within the memory budget.
+    """
+
+    pass
+
+
+class TransformAdmission:
+    """
+    Admits transform jobs against a per-process memory budget.
+    Each job reserves its estimated decode cost before running and releases it
+    when done. Small jobs run concurrently; a job that needs more than what is
+    left waits (up to `timeout` seconds) for running jobs to finish. A job larger
+    than the whole budget is rejected outright.
+    """
+
+    def __init__(self, budget_bytes: int, timeout: float = 10.0):
+        self.budget_bytes = budget_bytes
+        self.timeout = timeout
+        self.in_use = 0
+        self.active = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def admit(self, cost: int, timeout: float = None):
+        """
+        Reserve `cost` bytes of the budget for the duration of the block.
+        :param cost: Estimated memory cost of the job in bytes.
+        :param timeout: Seconds to wait for budget (defaults to the instance timeout).
+        :raises AdmissionRejected: If the job is larger than the budget or times out.
+        """
+        if cost > self.budget_bytes:
+            raise AdmissionRejected(
+                f"Job needs {cost} bytes, budget is {self.budget_bytes} bytes."
+            )
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._cond:
+            while self.in_use + cost > self.budget_bytes:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise AdmissionRejected("Transform memory budget exhausted.")
+                self._cond.wait(remaining)
+            self.in_use += cost
+            self.active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_use -= cost
+                self.active -= 1
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """
+        Return the current budget usage.
+        """
+        with self._cond:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "in_use_bytes": self.in_use,
+                "active_jobs": self.active,
+            }
+
+
+transform_admission = TransformAdmission(
+    budget_bytes=settings.TRANSFORM_MEMORY_BUDGET_MB * 1024 * 1024,
+    timeout=settings.TRANSFORM_ADMISSION_TIMEOUT,
+)
@@ -0,0 +1,224 @@
+# utils/transform_scheduler.py
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, Optional
+
+from config import settings
+
+# Strict priority between classes, highest first
+PRIORITIES = ("interactive", "background", "backfill")
+
+
+class QueueFull(RuntimeError):
+    """
+    Raised when a tenant already has too many transforms queued.
+    """
+
+    pass
+
+
+class _Job:
+    __slots__ = ("fn", "cost", "future", "context", "enqueued", "waited")
+
+    def __init__(self, fn: Callable, cost: float):
+        self.fn = fn
+        self.cost = cost
+        self.future: Future = Future()
+        # Keeps request-scoped context vars (phase timings) in the worker thread
+        self.context = contextvars.copy_context()
+        self.enqueued = time.monotonic()
+        self.waited = 0.0
+
+
+class _PriorityQueue:
+    """
+    Per-tenant FIFO queues served by deficit round robin.
+    Each visit credits a tenant `quantum * weight` cost units; it runs jobs
+    while its deficit covers them, so tenants get throughput in proportion to
+    their weights however many jobs each has queued.
+    """
+
+    def __init__(self):
+        self.queues: Dict[str, Deque[_Job]] = {}
+        self.deficits: Dict[str, float] = {}
+        self.ring: Deque[str] = deque()
+        self.size = 0
+
+    def push(self, tenant_id: str, job: _Job):
+        queue = self.queues.get(tenant_id)
+        if queue is None:
+            queue = self.queues[tenant_id] = deque()
+            self.deficits[tenant_id] = 0.0
+            self.ring.append(tenant_id)
+        queue.append(job)
+        self.size += 1
+
+    def pop(self, quantum: float, weights: Dict[str, float]) -> Optional[_Job]:
+        """
+        Next job by deficit round robin. Rounds in which nobody could run are
+        credited in one step rather than visited, so a 1 GB job behind a
+        small quantum costs one computation, not thousands of laps.
+        Weights and quantum must be positive (checked in config.py).
+        """
+        if not self.ring:
+            return None
+        job = self._visit_round(quantum, weights)
+        if job is not None:
+            return job
+        # Every tenant was credited once and none can run yet: skip ahead by
+        # the fewest rounds after which one of them can, then visit again.
+        rounds = min(
+            math.ceil(
+                (self.queues[t][0].cost - self.deficits[t])
+                / (quantum * weights.get(t, 1.0))
+            )
+            for t in self.ring
+        )
+        for tenant_id in self.ring:
+            self.deficits[tenant_id] += rounds * quantum * weights.get(tenant_id, 1.0)
+        return self._visit_round(quantum, weights)
+
+    def _visit_round(self, quantum: float, weights: Dict[str, float]) -> Optional[_Job]:
+        for _ in range(len(self.ring)):
+            tenant_id = self.ring[0]
+            queue = self.queues[tenant_id]
+            if self.deficits[tenant_id] < queue[0].cost:
+                self.deficits[tenant_id] += quantum * weights.get(tenant_id, 1.0)
+                self.ring.rotate(-1)
+                continue
+            job = queue.popleft()
+            self.deficits[tenant_id] -= job.cost
+            self.size -= 1
+            if not queue:
+                # Idle tenants do not bank credit
+                del self.queues[tenant_id], self.deficits[tenant_id]
+                self.ring.popleft()
+            return job
+        return None
+
+    def depth(self, tenant_id: str) -> int:
+        queue = self.queues.get(tenant_id)
+        return len(queue) if queue else 0
+
+
+class TransformScheduler:
+    """
+    Runs transform jobs on a fixed pool of worker threads.
+    Priority classes are served strictly in order (interactive requests before
+    background renditions before backfills); within a class, tenants share the
+    workers by deficit round robin, so one tenant's 10k queued thumbnails only
+    delay others by about one job each.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        quantum: float,
+        weights: Dict[str, float],
+        max_queued_per_tenant: int,
+    ):
+        self.workers = workers
+        self.quantum = quantum
+        self.weights = weights
+        self.max_queued_per_tenant = max_queued_per_tenant
+        self.queues = {p: _PriorityQueue() for p in PRIORITIES}
+        self.running = 0
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._run, name=f"transform-worker-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(
+        self,
+        tenant_id: str,
+        fn: Callable,
+        priority: str = "interactive",
+        cost: float = 1.0,
+    ) -> Future:
+        """
+        Queue `fn()` for a tenant.
+        :param cost: Relative cost of the job (e.g. estimated MB to decode);
+                     fairness is by cost, not by job count.
+        :return: Future resolving to (fn's result, seconds spent queued).
+        :raises QueueFull: If the tenant has too many jobs queued in this class.
+        """
+        self.start()
+        job = _Job(fn, max(cost, 1.0))
+        with self._cond:
+            queue = self.queues[priority]
+            if queue.depth(tenant_id) >= self.max_queued_per_tenant:
+                raise QueueFull("Too many transforms queued for this tenant.")
+            queue.push(tenant_id, job)
+            self._cond.notify()
+        return job.future
+
+    async def run(
+        self,
+        tenant_id: str,
+        fn: Callable,
+        priority: str = "interactive",
+        cost: float = 1.0,
+    ):
+        """
+        Submit a job and await it from the event loop.
+        :return: (fn's result, seconds spent queued)
+        """
+        future = self.submit(tenant_id, fn, priority, cost)
+        return await asyncio.wrap_future(future)
+
+    def _next(self) -> _Job:
+        with self._cond:
+            while True:
+                for priority in PRIORITIES:
+                    job = self.queues[priority].pop(self.quantum, self.weights)
+                    if job is not None:
+                        self.running += 1
+                        return job
+                self._cond.wait()
+
+    def _run(self):
+        while True:
+            job = self._next()
+            job.waited = time.monotonic() - job.enqueued
+            try:
+                if job.future.set_running_or_notify_cancel():
+                    try:
+                        result = job.context.run(job.fn)
+                    except BaseException as e:
+                        job.future.set_exception(e)
+                    else:
+                        job.future.set_result((result, job.waited))
+            finally:
+                with self._cond:
+                    self.running -= 1
+
+    def depths(self) -> Dict[str, float]:
+        """
+        Queued jobs per priority class, plus jobs running now.
+        """
+        with self._cond:
+            depths = {p: q.size for p, q in self.queues.items()}
+            depths["running"] = self.running
+            return depths
+
+
+transform_scheduler = TransformScheduler(
+    workers=settings.TRANSFORM_WORKERS,
+    quantum=settings.TRANSFORM_QUANTUM_MB,
+    weights=settings.TRANSFORM_TENANT_WEIGHTS,
+    max_queued_per_tenant=settings.TRANSFORM_MAX_QUEUED_PER_TENANT,
+)
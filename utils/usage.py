@@ -0,0 +1,231 @@
+# utils/usage.py
+import atexit
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import Session
+
+from config import settings
+from db import SessionLocal
+from models import ApiUsageRollup, AssetUsageRollup
+
+# Rollup granularities, finest first. Compaction moves rows from one to the next,
+# so each event is counted in exactly one row.
+GRANULARITIES = ("hour", "day", "month")
+
+
+def hour_bucket(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+class UsageCounters:
+    """
+    In-memory usage counters, flushed periodically as upserts into the rollup
+    tables. Recording is a dict update under a lock; the flush swaps the dicts
+    out and writes one multi-row INSERT ... ON DUPLICATE KEY UPDATE per table.
+    """
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        # (tenant, asset, hour) -> [downloads, views, bandwidth, last_accessed]
+        self.assets: Dict[Tuple[str, str, datetime], list] = {}
+        # (tenant, endpoint, hour) -> [count, last_accessed]
+        self.api: Dict[Tuple[str, str, datetime], list] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="usage-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def record_asset(
+        self, tenant_id: str, asset_id: str, kind: str, nbytes: int = 0
+    ):
+        """
+        Count an asset access.
+        :param kind: 'download' or 'view'.
+        :param nbytes: Bytes sent to the client.
+        """
+        now = datetime.utcnow()
+        key = (tenant_id, asset_id, hour_bucket(now))
+        with self._lock:
+            counter = self.assets.get(key)
+            if counter is None:
+                counter = self.assets[key] = [0, 0, 0, now]
+            if kind == "download":
+                counter[0] += 1
+            else:
+                counter[1] += 1
+            counter[2] += nbytes
+            counter[3] = now
+
+    def record_api(self, tenant_id: str, endpoint: str, n: int = 1):
+        """
+        Count API calls to an endpoint (e.g. 'GET /assets/{id}').
+        """
+        now = datetime.utcnow()
+        key = (tenant_id, endpoint, hour_bucket(now))
+        with self._lock:
+            counter = self.api.get(key)
+            if counter is None:
+                self.api[key] = [n, now]
+            else:
+                counter[0] += n
+                counter[1] = now
+
+    def flush(self):
+        """
+        Upsert all pending counters. On failure the counters are merged back.
+        """
+        with self._lock:
+            assets, self.assets = self.assets, {}
+            api, self.api = self.api, {}
+        if not assets and not api:
+            return
+        db = SessionLocal()
+        try:
+            if assets:
+                stmt = insert(AssetUsageRollup).values(
+                    [
+                        {
+                            "tenant_id": t,
+                            "asset_id": a,
+                            "granularity": "hour",
+                            "bucket": b,
+                            "downloads": c[0],
+                            "views": c[1],
+                            "bandwidth": c[2],
+                            "last_accessed": c[3],
+                        }
+                        for (t, a, b), c in assets.items()
+                    ]
+                )
+                db.execute(_add_on_duplicate(stmt, ("downloads", "views", "bandwidth")))
+            if api:
+                stmt = insert(ApiUsageRollup).values(
+                    [
+                        {
+                            "tenant_id": t,
+                            "endpoint": e[:255],
+                            "granularity": "hour",
+                            "bucket": b,
+                            "count": c[0],
+                            "last_accessed": c[1],
+                        }
+                        for (t, e, b), c in api.items()
+                    ]
+                )
+                db.execute(_add_on_duplicate(stmt, ("count",)))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Usage counter flush failed: {e}")
+            self._merge_back(assets, api)
+        finally:
+            db.close()
+
+    def _merge_back(self, assets, api):
+        with self._lock:
+            for key, c in assets.items():
+                cur = self.assets.setdefault(key, [0, 0, 0, c[3]])
+                cur[0] += c[0]
+                cur[1] += c[1]
+                cur[2] += c[2]
+                cur[3] = max(cur[3], c[3])
+            for key, c in api.items():
+                cur = self.api.setdefault(key, [0, c[1]])
+                cur[0] += c[0]
+                cur[1] = max(cur[1], c[1])
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+def _add_on_duplicate(stmt, summed: Tuple[str, ...]):
+    """
+    ON DUPLICATE KEY UPDATE that adds the counters and keeps the latest access.
+    """
+    updates = {col: getattr(stmt.table.c, col) + stmt.inserted[col] for col in summed}
+    updates["last_accessed"] = func.greatest(
+        func.coalesce(stmt.table.c.last_accessed, stmt.inserted.last_accessed),
+        stmt.inserted.last_accessed,
+    )
+    return stmt.on_duplicate_key_update(**updates)
+
+
+usage_counters = UsageCounters(flush_interval=settings.USAGE_FLUSH_INTERVAL)
+atexit.register(usage_counters.flush)
+
+
+# --- Compaction ---
+
+# Rollup table -> (per-row key column, summed counter columns)
+_ROLLUP_TABLES = {
+    "asset_usage_rollups": ("asset_id", ("downloads", "views", "bandwidth")),
+    "api_usage_rollups": ("endpoint", ("count",)),
+}
+
+_BUCKET_EXPR = {
+    "day": "DATE(bucket)",
+    "month": "DATE_FORMAT(bucket, '%Y-%m-01')",
+}
+
+
+def compact_rollups(db: Session, source: str, target: str, before: datetime) -> dict:
+    """
+    Fold `source`-granularity rows older than `before` into `target` rows,
+    in one transaction per table (INSERT ... SELECT ... GROUP BY, then DELETE).
+    :return: Number of source rows folded per table.
+    """
+    bucket = _BUCKET_EXPR[target]
+    params = {"source": source, "target": target, "before": before}
+    folded = {}
+    for table, (key, sums) in _ROLLUP_TABLES.items():
+        columns = ", ".join(("tenant_id", "granularity", "bucket", key) + sums)
+        summed = ", ".join(f"SUM({c})" for c in sums)
+        on_dup = ", ".join(f"{c} = {c} + VALUES({c})" for c in sums)
+        db.execute(
+            text(
+                f"INSERT INTO {table} ({columns}, last_accessed)"
+                f" SELECT tenant_id, :target, {bucket}, {key}, {summed},"
+                f" MAX(last_accessed) FROM {table}"
+                f" WHERE granularity = :source AND bucket < :before"
+                f" GROUP BY tenant_id, {key}, {bucket}"
+                f" ON DUPLICATE KEY UPDATE {on_dup}, last_accessed = GREATEST("
+                f"COALESCE(last_accessed, VALUES(last_accessed)),"
+                f" VALUES(last_accessed))"
+            ),
+            params,
+        )
+        result = db.execute(
+            text(
+                f"DELETE FROM {table} WHERE granularity = :source AND bucket < :before"
+            ),
+            params,
+        )
+        db.commit()
+        folded[table] = result.rowcount
+    return folded
+
+
+def compact_all(db: Session, hourly_days: int = 7, daily_days: int = 400) -> dict:
+    """
+    Hourly rows older than `hourly_days` become daily rows; daily rows older
+    than `daily_days` become monthly rows. Cutoffs are aligned to the target
+    period so a period is never split across granularities.
+    """
+    today = datetime.combine(date.today(), datetime.min.time())
+    day_cutoff = today - timedelta(days=hourly_days)
+    month_cutoff = (today - timedelta(days=daily_days)).replace(day=1)
+    return {
+        "hour->day": compact_rollups(db, "hour", "day", day_cutoff),
+        "day->month": compact_rollups(db, "day", "month", month_cutoff),
+    }
@@ -0,0 +1,121 @@
+# utils/user_directory.py
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from db import engine, shard_router, shard_session
+from models import User, UserEmail
+
+
+class EmailTaken(ValueError):
+    """
+    Raised when an email address already belongs to another user.
+    """
+
+    pass
+
+
+def claim_email(email: str, tenant_id: str, user_id: str):
+    """
+    Reserve an email address for a user in the login directory. Claiming an
+    address the same user already holds is a no-op.
+    :raises EmailTaken: If another user holds the address, in any tenant.
+    """
+    with Session(bind=engine) as db:
+        db.add(UserEmail(email=email, tenant_id=tenant_id, user_id=user_id))
+        try:
+            db.commit()
+            return
+        except IntegrityError:
+            db.rollback()
+        holder = db.get(UserEmail, email)
+    if holder is None or holder.user_id != user_id:
+        raise EmailTaken(f"Email {email} is already registered")
+
+
+def release_email(email: str, user_id: str):
+    """
+    Drop a user's entry from the login directory.
+    """
+    with Session(bind=engine) as db:
+        db.query(UserEmail).filter(
+            UserEmail.email == email, UserEmail.user_id == user_id
+        ).delete(synchronize_session=False)
+        db.commit()
+
+
+def _load_user(shard: str, **filters) -> Optional[User]:
+    db = shard_session(shard)
+    try:
+        return db.query(User).filter_by(**filters).first()
+    finally:
+        db.close()
+
+
+def find_user_by_email(email: str) -> Optional[User]:
+    """
+    The user an email address belongs to, read from the shard currently
+    serving the user's tenant. Copies left on other shards by a tenant move
+    (in progress, or kept with --keep-source) are never used, so a stale
+    password hash or is_active flag cannot let someone log in.
+    Users created before the directory existed and not yet backfilled are
+    found by asking each shard, and are registered on the way.
+    """
+    with Session(bind=engine) as db:
+        entry = db.get(UserEmail, email)
+    if entry is not None:
+        shard = shard_router.lookup(entry.tenant_id)[0]
+        return _load_user(shard, id=entry.user_id, tenant_id=entry.tenant_id)
+    for shard in shard_router.shard_names():
+        user = _load_user(shard, email=email)
+        if user is not None and shard_router.lookup(user.tenant_id)[0] == shard:
+            try:
+                claim_email(user.email, user.tenant_id, user.id)
+            except EmailTaken:
+                return None  # claimed meanwhile by a user created elsewhere
+            return user
+    return None
+
+
+def register_users(users):
+    """
+    Add directory entries for users in bulk, keeping any entry that already
+    exists for an address.
+    :param users: Objects or rows with id, email and tenant_id.
+    """
+    entries = [
+        {"email": u.email, "tenant_id": u.tenant_id, "user_id": u.id} for u in users
+    ]
+    if entries:
+        with engine.begin() as conn:
+            conn.execute(mysql_insert(UserEmail).prefix_with("IGNORE"), entries)
+
+
+def backfill_user_directory(batch_size: int = 1000) -> int:
+    """
+    Register every existing user in the login directory, shard by shard,
+    taking each tenant's users only from the shard that serves it. Existing
+    entries are kept, so the backfill can be rerun.
+    :return: Number of users read.
+    """
+    seen = 0
+    for shard in shard_router.shard_names():
+        src = shard_router.engine_for_shard(shard)
+        last = None
+        while True:
+            query = select(User.id, User.email, User.tenant_id).order_by(User.id)
+            if last is not None:
+                query = query.where(User.id > last)
+            with src.connect() as conn:
+                rows = conn.execute(query.limit(batch_size)).all()
+            if not rows:
+                break
+            last = rows[-1].id
+            seen += len(rows)
+            register_users(
+                r for r in rows if shard_router.lookup(r.tenant_id)[0] == shard
+            )
+    return seen
@@ -0,0 +1,196 @@
+# utils/versions.py
+import hashlib
+import time
+import uuid
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Asset, AssetFingerprint, AssetVersion
+from storage.factory import get_storage, asset_key
+from utils.es_indexing import update_asset_index
+
+
+class VersionConflict(RuntimeError):
+    """
+    Raised when another writer replaced the asset concurrently.
+    """
+
+    pass
+
+
+def version_etag(asset_id: str, version: int, *params) -> str:
+    """
+    Strong ETag for an asset version, optionally for a derived rendition.
+    Since blobs are immutable per version, a replace changes every ETag at once
+    and no cache (CDN, transform output, browser) needs to be purged.
+    """
+    tag = f"{asset_id}-v{version}"
+    if params:
+        digest = hashlib.sha1(repr(params).encode()).hexdigest()[:16]
+        tag = f"{tag}-{digest}"
+    return f'"{tag}"'
+
+
+def blob_keys(db: Session, assets: Iterable[Tuple[str, int]]) -> Dict[str, str]:
+    """
+    Storage keys of the given (asset id, version) blobs, by asset id.
+    Uploaded versions carry a per-upload suffix, so their keys come from the
+    history rows; a version without a row (never replaced) uses the plain key.
+    """
+    assets = [(str(asset_id), version or 1) for asset_id, version in assets]
+    keys = {asset_id: asset_key(asset_id, version) for asset_id, version in assets}
+    if assets:
+        keys.update(
+            db.query(AssetVersion.asset_id, AssetVersion.blob_key)
+            .filter(tuple_(AssetVersion.asset_id, AssetVersion.version).in_(assets))
+            .all()
+        )
+    return keys
+
+
+def blob_key(db: Session, asset_id, version: int) -> str:
+    return blob_keys(db, [(asset_id, version)])[str(asset_id)]
+
+
+def _hash_and_size(fileobj: BinaryIO):
+    sha = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: fileobj.read(1024 * 1024), b""):
+        sha.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return sha.hexdigest(), size
+
+
+def create_version(
+    db: Session,
+    asset: Asset,
+    fileobj: BinaryIO,
+    filename: str,
+    mimetype: str,
+    user_id: Optional[str] = None,
+) -> AssetVersion:
+    """
+    Store a new version of an asset and make it current.
+    The blob is written under a key unique to this upload first; then the
+    version row is inserted and the asset's version pointer is flipped with a
+    compare-and-set (UPDATE ... WHERE version = <old>) in the same transaction.
+    Concurrent uploads never share a key, so a writer that loses the race
+    deletes only its own blob before VersionConflict is raised.
+    Per-version derived data (fingerprint, extracted metadata) is cleared so the
+    backfills recompute it for the new content.
+    """
+    storage = get_storage()
+    current = asset.version or 1
+    new = current + 1
+    if not (
+        db.query(AssetVersion.id)
+        .filter(AssetVersion.asset_id == asset.id, AssetVersion.version == current)
+        .first()
+    ):
+        # Assets created before versioning have no history row for their blob
+        db.add(
+            AssetVersion(
+                asset_id=asset.id,
+                tenant_id=asset.tenant_id,
+                version=current,
+                blob_key=asset_key(asset.id, current),
+                filename=asset.filename,
+                mimetype=asset.mimetype,
+                size=asset.size,
+            )
+        )
+    content_hash, size = _hash_and_size(fileobj)
+    # Racing uploads target the same version number; the suffix keeps each
+    # attempt's blob separate so no upload overwrites or deletes another's
+    key = f"{asset_key(asset.id, new)}.{uuid.uuid4().hex}"
+    storage.save(fileobj, key)
+    metainfo = {k: v for k, v in (asset.metainfo or {}).items() if k != "technical"}
+    try:
+        version = AssetVersion(
+            asset_id=asset.id,
+            tenant_id=asset.tenant_id,
+            version=new,
+            blob_key=key,
+            filename=filename,
+            mimetype=mimetype,
+            size=size,
+            content_hash=content_hash,
+            created_by=user_id,
+        )
+        db.add(version)
+        flipped = (
+            db.query(Asset)
+            .filter(Asset.id == asset.id, Asset.version == current)
+            .execution_options(row_cache_keys=[asset.id])
+            .update(
+                {
+                    Asset.version: new,
+                    Asset.filename: filename,
+                    Asset.mimetype: mimetype,
+                    Asset.size: size,
+                    Asset.metainfo: metainfo,
+                },
+                synchronize_session=False,
+            )
+        )
+        if flipped != 1:
+            raise VersionConflict("Asset was replaced concurrently")
+        db.query(AssetFingerprint).filter(
+            AssetFingerprint.asset_id == asset.id
+        ).delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        storage.delete(key)
+        raise
+    db.refresh(version)
+    update_asset_index(
+        asset.id,
+        {
+            "version": new,
+            "filename": filename,
+            "mimetype": mimetype,
+            "size": size,
+            "metainfo": metainfo,
+        },
+    )
+    return version
+
+
+def prune_versions(
+    db: Session,
+    keep: int = None,
+    batch_size: int = 500,
+    pause: float = 0.5,
+) -> int:
+    """
+    Delete all but the newest `keep` versions of every asset (blobs and rows).
+    The current version is never pruned. Runs in batches with a pause between
+    them so it can run in the background next to live traffic.
+    :return: Number of versions pruned.
+    """
+    keep = max(1, keep or settings.ASSET_VERSIONS_KEEP)
+    storage = get_storage()
+    total = 0
+    while True:
+        rows: List[tuple] = (
+            db.query(AssetVersion.id, AssetVersion.blob_key)
+            .join(Asset, Asset.id == AssetVersion.asset_id)
+            .filter(AssetVersion.version <= Asset.version - keep)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        storage.delete_many([r[1] for r in rows])
+        db.query(AssetVersion).filter(
+            AssetVersion.id.in_([r[0] for r in rows])
+        ).delete(synchronize_session=False)
+        db.commit()
+        total += len(rows)
+        time.sleep(pause)
+    return total
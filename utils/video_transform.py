@@ -1,5 +1,4 @@
 # utils/video_transform.py
-import ffmpeg
 
 
 def video_to_thumbnail(input_path: str, output_path: str, time: float = 1.0):
@@ -9,6 +8,8 @@ def video_to_thumbnail(input_path: str, output_path: str, time: float = 1.0):
     :param output_path: Path to save the thumbnail image.
     :param time: Timestamp in seconds to extract the thumbnail (default is 1.0).
     """
+    import ffmpeg
+
     (
         ffmpeg.input(input_path, ss=time)
         .output(output_path, vframes=1)
@@ -1,9 +1,9 @@
 import requests
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer
 from models import Webhook  # Assuming Webhook model is defined in models.py
 
 def trigger_webhooks(db: Session, tenant_id: str, event: str, payload: dict):
-    webhooks = db.query(Webhook).filter(
+    webhooks = db.query(Webhook).options(undefer(Webhook.headers)).filter(
         Webhook.tenant_id == tenant_id,
         Webhook.is_active == True,
         Webhook.events.contains([event])